@@ -1,11 +1,20 @@
 # app.py - API avec système Kodi léger
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response, stream_with_context
 from flask_cors import CORS
+import json
 import os
 
 app = Flask(__name__)
 CORS(app)
 
+# Durée et compteur par route (exposés sur /metrics)
+from metrics import registry, instrument_app, CONTENT_TYPE as METRICS_CONTENT_TYPE
+instrument_app(app)
+
+# Traces par étapes (?trace=1 sur n'importe quelle route JSON)
+import tracing
+tracing.instrument_app(app)
+
 # ============ IMPORT KODI SYSTÈME ============
 try:
     from kodi_extractors import extract_with_kodi, is_kodi_available, get_kodi_status
@@ -14,6 +23,25 @@ except ImportError:
     KODI_AVAILABLE = False
     print("⚠️  Module kodi_extractors non trouvé")
 
+from batch_extractor import extract_batch, MAX_BATCH_SIZE, DEFAULT_TIMEOUT
+from my_scraper import crawl_catalogue, get_episodes_from_anime, MAX_CRAWL_PAGES
+from catalogue_store import catalogue_store, catalogue_refresher, start_background_refresh
+from catalogue_search import catalogue_index, start_search_index
+from genre_cache import genre_cache
+from page_cache import page_cache
+from parse_cache import parsed_cache
+from extraction_cache import extraction_cache
+from shared_cache import shared_cache
+from video_resolver import resolve_video
+from episode_prefetch import episode_prefetcher, select_episode_urls, PREFETCH_ENABLED
+
+# Index local du catalogue (rempli en arrière-plan) et index de recherche
+# Chaque worker démarre ces threads, mais un seul crawle / télécharge les
+# genres (bail en base) ; les autres relisent la base
+start_search_index(catalogue_store, catalogue_refresher)
+start_background_refresh()
+genre_cache.start()
+
 # ============ ROUTES SIMPLES ============
 
 @app.route('/')
@@ -25,11 +53,24 @@ def home():
         'routes': {
             '/extract': 'Extraction vidéo (url param)',
             '/extract/kodi': 'Forcer extraction Kodi',
+            '/extract/batch': 'Extraction parallèle (POST {"urls": [...]})',
+            '/animes': 'Catalogue indexé (page, limit, type, version)',
+            '/episodes': 'Épisodes d\'un animé (url, prefetch=1, from=N)',
+            '/animes/stream': 'Catalogue complet en NDJSON (url param)',
+            '/search': 'Recherche dans le catalogue (q param)',
+            '/genres': 'Liste des genres (depuis la mémoire)',
+            '/catalogue/status': "Statut de l'index du catalogue",
+            '/cache/status': 'Statistiques des caches (pages, résultats parsés, extractions, partagé, pré-résolution)',
+            '/metrics': 'Métriques Prometheus',
+            '?trace=1': 'Détail des étapes (routage, HTTP, parsing...) joint à la réponse JSON',
             '/kodi/status': 'Statut système Kodi',
             '/health': 'Santé API'
         }
     })
 
+# Pré-résolution des épisodes servis par /episodes
+episode_prefetcher.start(resolve_video)
+
 @app.route('/extract', methods=['GET'])
 def extract():
     """Extraction intelligente : Kodi si disponible, sinon fallback"""
@@ -38,14 +79,11 @@ def extract():
     if not url:
         return jsonify({'success': False, 'error': 'URL manquante'}), 400
     
-    # 1. Essayer Kodi si disponible
-    if KODI_AVAILABLE and is_kodi_available():
-        result = extract_with_kodi(url)
-        if result.get('success'):
-            result['method'] = 'kodi_primary'
-            return jsonify(result)
+    result = resolve_video(url)
+    if result.get('success'):
+        return jsonify(result)
     
-    # 2. Fallback simple (pour démo)
+    # Aucun extracteur n'a abouti
     return jsonify({
         'success': False,
         'error': 'Aucun extracteur disponible',
@@ -80,6 +118,176 @@ def extract_kodi():
     
     return jsonify(result)
 
+@app.route('/extract/batch', methods=['POST'])
+def extract_batch_route():
+    """Extraction parallèle d'une liste d'URLs (résultats partiels si délai dépassé)"""
+    data = request.get_json(silent=True) or {}
+    urls = data.get('urls')
+    
+    if isinstance(urls, list):
+        urls = [u for u in urls if isinstance(u, str) and u]
+    if not isinstance(urls, list) or not urls:
+        return jsonify({'success': False, 'error': 'Liste "urls" manquante'}), 400
+    
+    if len(urls) > MAX_BATCH_SIZE:
+        return jsonify({
+            'success': False,
+            'error': f'Trop d\'URLs (maximum {MAX_BATCH_SIZE})'
+        }), 400
+    
+    if not KODI_AVAILABLE or not is_kodi_available():
+        return jsonify({
+            'success': False,
+            'error': 'Système Kodi non disponible'
+        }), 503
+    
+    try:
+        timeout = float(data.get('timeout', DEFAULT_TIMEOUT))
+    except (TypeError, ValueError):
+        timeout = DEFAULT_TIMEOUT
+    
+    result = extract_batch(urls, extract_with_kodi, timeout=timeout)
+    result['method'] = 'kodi_batch'
+    return jsonify(result)
+
+@app.route('/episodes', methods=['GET'])
+def episodes():
+    """Épisodes d'un animé ; avec pré-résolution, les premiers liens sont extraits en arrière-plan"""
+    url = request.args.get('url', '')
+    if not url:
+        return jsonify({'success': False, 'error': 'URL manquante'}), 400
+    
+    result = get_episodes_from_anime(url)
+    
+    prefetch = request.args.get('prefetch')
+    if result.get('success') and (prefetch == '1' or (PREFETCH_ENABLED and prefetch != '0')):
+        jobs = select_episode_urls(result['episodes'], start=request.args.get('from'))
+        result['prefetch'] = {'queued': episode_prefetcher.submit(jobs), 'requested': len(jobs)}
+    
+    return jsonify(result)
+
+@app.route('/animes', methods=['GET'])
+def animes():
+    """Catalogue servi depuis l'index local (pas de requête au site)"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    limit = max(1, min(request.args.get('limit', 30, type=int), 100))
+    
+    total, results = catalogue_store.list(
+        offset=(page - 1) * limit,
+        limit=limit,
+        anime_type=request.args.get('type'),
+        version=request.args.get('version')
+    )
+    return jsonify({
+        'success': True,
+        'count': len(results),
+        'total': total,
+        'page': page,
+        'next_page': page + 1 if page * limit < total else None,
+        'results': results
+    })
+
+@app.route('/search', methods=['GET'])
+def search():
+    """Recherche plein texte (titres, descriptions) ; dernier mot en préfixe"""
+    query = request.args.get('q', '').strip()
+    
+    if not query:
+        return jsonify({'success': False, 'error': 'Paramètre q manquant'}), 400
+    
+    limit = max(1, min(request.args.get('limit', 30, type=int), 100))
+    results = catalogue_index.search(query, limit=limit)
+    return jsonify({
+        'success': True,
+        'query': query,
+        'count': len(results),
+        'results': results
+    })
+
+@app.route('/genres', methods=['GET'])
+def genres():
+    """Genres servis depuis la mémoire (rafraîchis en arrière-plan)"""
+    result = genre_cache.get()
+    return jsonify(result), (200 if result['success'] else 503)
+
+@app.route('/catalogue/status', methods=['GET'])
+def catalogue_status():
+    return jsonify({
+        'index': catalogue_refresher.stats(),
+        'search': catalogue_index.stats(),
+        'genres': genre_cache.stats()
+    })
+
+@app.route('/cache/status', methods=['GET'])
+def cache_status():
+    return jsonify({
+        'pages': page_cache.stats(),
+        'parsed': parsed_cache.stats(),
+        'extraction': extraction_cache.stats(),
+        'prefetch': episode_prefetcher.stats(),
+        'shared': shared_cache.stats()
+    })
+
+def _state_metrics():
+    """Caches, index et disjoncteurs, lus au moment du rendu de /metrics"""
+    families = []
+    for cache_name, stats in (('pages', page_cache.stats()), ('parsed', parsed_cache.stats()),
+                              ('extraction', extraction_cache.stats())):
+        families.append((f'cache_{cache_name}_entries', f'Entrées du cache {cache_name}', 'gauge',
+                         {(): stats['entries']}))
+        families.append((f'cache_{cache_name}_hit_rate', f'Taux de succès du cache {cache_name}', 'gauge',
+                         {(): stats['hit_rate']}))
+    pages = page_cache.stats()
+    families.append(('cache_pages_bytes_saved_total', 'Octets non retéléchargés grâce au cache', 'counter',
+                     {(): pages['bytes_saved']}))
+    families.append(('cache_pages_revalidations_total', 'Revalidations conditionnelles', 'counter',
+                     {(('result', 'not_modified'),): pages['not_modified'],
+                      (('result', 'modified'),): pages['revalidations'] - pages['not_modified']}))
+    shared = shared_cache.stats()
+    if shared['enabled']:
+        families.append(('cache_shared_entries', 'Entrées du cache partagé entre workers', 'gauge',
+                         {(('namespace', ns),): v['entries'] for ns, v in shared.get('namespaces', {}).items()}))
+        families.append(('cache_shared_hit_rate', 'Taux de succès du cache partagé (ce worker)', 'gauge',
+                         {(): shared['hit_rate']}))
+    
+    prefetch = episode_prefetcher.stats()
+    families.append(('prefetch_jobs_total', 'Jobs de pré-résolution par issue', 'counter',
+                     {(('result', name),): prefetch[name]
+                      for name in ('succeeded', 'failed', 'skipped_cached', 'dropped_full', 'dropped_stale')}))
+    families.append(('catalogue_entries', 'Animés dans l\'index du catalogue', 'gauge',
+                     {(): catalogue_store.count()}))
+    
+    if KODI_AVAILABLE:
+        hosters = get_kodi_status()['hosters']
+        families.append(('hoster_circuit_open', 'Disjoncteur ouvert (1) ou non (0) par hébergeur', 'gauge',
+                         {(('hoster', name),): int(h['state'] != 'closed') for name, h in hosters.items()}))
+        families.append(('hoster_timeout_seconds', 'Timeout adaptatif par hébergeur', 'gauge',
+                         {(('hoster', name),): h['timeout'] for name, h in hosters.items()}))
+    return families
+
+registry.add_collector(_state_metrics)
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/animes/stream', methods=['GET'])
+def animes_stream():
+    """Catalogue en NDJSON : un animé par ligne, envoyé dès que sa page est parsée"""
+    url = request.args.get('url', '')
+    
+    if not url:
+        return jsonify({'success': False, 'error': 'URL manquante'}), 400
+    
+    max_pages = request.args.get('max_pages', 50, type=int)
+    max_pages = max(1, min(max_pages, MAX_CRAWL_PAGES))
+    
+    def generate():
+        for anime in crawl_catalogue(url, max_pages=max_pages):
+            yield json.dumps(anime, ensure_ascii=False) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/kodi/status', methods=['GET'])
 def kodi_status():
     """Statut du système Kodi"""
@@ -110,6 +318,14 @@ if __name__ == '__main__':
     print("🌐 Routes:")
     print("   /extract?url=URL → Extraction intelligente")
     print("   /extract/kodi?url=URL → Kodi uniquement")
+    print("   POST /extract/batch → Extraction parallèle")
+    print("   /animes?page=N → Catalogue indexé")
+    print("   /episodes?url=URL → Épisodes (+ pré-résolution des premiers liens)")
+    print("   /animes/stream?url=URL → Catalogue en NDJSON")
+    print("   /search?q=TEXTE → Recherche dans le catalogue")
+    print("   /genres → Liste des genres")
+    print("   /metrics → Métriques Prometheus")
+    print("   ?trace=1 → Étapes de la requête dans la réponse JSON")
     print("   /kodi/status → Statut Kodi")
     print("=" * 60)
     
@@ -0,0 +1,86 @@
+"""
+asgi.py
+Point d'entrée ASGI : /extract est servi par le moteur async (async_engine),
+toutes les autres routes sont déléguées à l'application Flask.
+
+Lancement : uvicorn asgi:app
+       ou : gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+"""
+import json
+import time
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+import app as flask_module
+import async_engine
+from metrics import record_request
+from video_resolver import kodi_ready, resolve_video_async
+
+flask_asgi = WsgiToAsgi(flask_module.app)
+
+
+async def send_json(send, payload, status=200):
+    body = json.dumps(payload, sort_keys=True).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            (b'access-control-allow-origin', b'*'),
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def extract(query):
+    """Comme app.extract() (video_resolver), plus les extracteurs natifs async en dernier recours"""
+    url = query.get('url', [''])[0]
+
+    if not url:
+        return {'success': False, 'error': 'URL manquante'}, 400
+
+    result = await resolve_video_async(url)
+    if result.get('success'):
+        return result, 200
+
+    # Aucun extracteur n'a abouti
+    return {
+        'success': False,
+        'error': 'Aucun extracteur disponible',
+        'kodi_available': kodi_ready(),
+        'method': 'fallback'
+    }, 200
+
+
+ASYNC_ROUTES = {
+    ('GET', '/extract'): extract,
+}
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Session aiohttp de la boucle du serveur, fermée à l'arrêt
+                await async_engine.get_session()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_engine.close_session()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] == 'http':
+        handler = ASYNC_ROUTES.get((scope['method'], scope['path']))
+        if handler is not None:
+            # Mêmes mesures que les routes Flask (metrics.instrument_app)
+            started = time.perf_counter()
+            query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+            payload, status = await handler(query)
+            await send_json(send, payload, status)
+            record_request(scope['path'], scope['method'], status, time.perf_counter() - started)
+            return
+
+    await flask_asgi(scope, receive, send)
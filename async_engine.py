@@ -0,0 +1,139 @@
+"""
+async_engine.py
+Moteur d'extraction asynchrone (asyncio + aiohttp)
+Versions async des extracteurs natifs, servies par asgi.py (/extract).
+Le parsing est partagé avec la version synchrone (parse()).
+- Une seule session aiohttp, ouverte au démarrage du lifespan ASGI et
+  fermée à son arrêt
+- Les hébergeurs Kodi (modules cHoster synchrones) ne sont pas portés :
+  video_resolver les exécute encore dans des threads
+"""
+import asyncio
+import time
+
+import aiohttp
+
+import http_client
+from extraction_cache import normalize_url
+from extractors import ExtractorRegistry, KodiVidmolyExtractor, DirectExtractor
+from metrics import record_extraction
+
+# ============ CLIENT HTTP ASYNC ============
+
+# Session unique, liée à la boucle qui l'a ouverte (celle du lifespan
+# ASGI) et fermée avec elle
+_session = None
+_session_loop = None
+
+
+async def get_session():
+    """Session aiohttp partagée (pools par hôte), ouverte au premier appel"""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is not None and not _session.closed:
+        if _session_loop is loop:
+            return _session
+        if not _session_loop.is_closed():
+            raise RuntimeError('session aiohttp ouverte dans une autre boucle')
+        # Boucle terminée sans close_session() : ses sockets sont déjà perdus
+        print("[Async] ⚠️  Session d'une boucle terminée abandonnée (close_session() manquant)")
+
+    connector = aiohttp.TCPConnector(
+        limit=http_client.POOL_CONNECTIONS * http_client.POOL_MAXSIZE,
+        limit_per_host=http_client.POOL_MAXSIZE,
+        ttl_dns_cache=300
+    )
+    _session = aiohttp.ClientSession(connector=connector)
+    _session_loop = loop
+    return _session
+
+
+async def close_session():
+    """Ferme la session (arrêt du lifespan, fin d'un asyncio.run)"""
+    global _session, _session_loop
+    session, _session, _session_loop = _session, None, None
+    if session is not None and not session.closed:
+        await session.close()
+
+
+async def fetch_text(url, profile='browser', headers=None, timeout=http_client.DEFAULT_TIMEOUT, encoding=None):
+    """GET async avec réessais sur erreur de connexion (comme http_client)"""
+    session = await get_session()
+    request_headers = http_client.build_headers(profile, headers)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    attempt = 0
+    while True:
+        try:
+            async with session.get(url, headers=request_headers, timeout=client_timeout, allow_redirects=True) as response:
+                response.raise_for_status()
+                return await response.text(encoding=encoding, errors='replace')
+        except aiohttp.ClientConnectorError:
+            if attempt >= http_client.CONNECT_RETRIES:
+                raise
+            await asyncio.sleep(http_client.BACKOFF_FACTOR * (2 ** attempt))
+            attempt += 1
+
+# ============ EXTRACTEURS ASYNC ============
+
+class AsyncKodiVidmolyExtractor(KodiVidmolyExtractor):
+    """Version async de KodiVidmolyExtractor (même parsing)"""
+
+    async def extract(self, url):
+        try:
+            url = self.normalize(url)
+            print(f"[KodiVidmoly] Extraction async de: {url}")
+
+            headers = self.request_headers(url)
+            html = await fetch_text(url, profile='embed', headers=headers, timeout=15)
+
+            return self.parse(url, html, headers)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"[KodiVidmoly] Erreur réseau: {e}")
+            return {
+                'success': False,
+                'error': f'Erreur réseau: {str(e) or e.__class__.__name__}',
+                'extractor': 'kodi_vidmoly'
+            }
+        except Exception as e:
+            print(f"[KodiVidmoly] Erreur inattendue: {e}")
+            return {
+                'success': False,
+                'error': f'Erreur: {str(e)}',
+                'extractor': 'kodi_vidmoly'
+            }
+
+
+class AsyncDirectExtractor(DirectExtractor):
+    """Version async de DirectExtractor (aucune I/O)"""
+
+    async def extract(self, url):
+        return DirectExtractor.extract(self, url)
+
+
+# Registre async (mêmes règles de routage que le registre synchrone)
+async_registry = ExtractorRegistry(fallback=AsyncDirectExtractor())
+async_registry.register(AsyncKodiVidmolyExtractor())
+
+_inflight = {}
+
+
+async def _extract_recorded(url):
+    """Extraction native mesurée (une fois par extraction, pas par appel regroupé)"""
+    started = time.perf_counter()
+    result = await async_registry.route(url)[0].extract(url)
+    record_extraction('native', result, time.perf_counter() - started)
+    return result
+
+
+async def extract_video_url(url):
+    """Équivalent async de extractors.extract_video_url (avec regroupement des appels)"""
+    key = normalize_url(url)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_extract_recorded(url))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    result = await asyncio.shield(task)
+    return dict(result)
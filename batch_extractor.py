@@ -0,0 +1,139 @@
+"""
+batch_extractor.py
+Extraction d'une liste d'URLs en parallèle (pool de threads borné)
+avec une limite de concurrence par hébergeur et un délai global
+- Au-delà de PER_HOSTER_LIMIT, les URLs d'un hébergeur attendent dans sa
+  file (hors du pool) et sont soumises quand une extraction se termine :
+  aucun thread du pool n'est bloqué par un hébergeur saturé
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+from extraction_cache import normalize_url
+
+# ============ CONFIGURATION ============
+
+# Taille du pool partagé par tous les lots
+BATCH_WORKERS = 8
+
+# Nombre maximal d'URLs par lot
+MAX_BATCH_SIZE = 50
+
+# Extractions simultanées maximum vers un même hébergeur (anti-ban)
+PER_HOSTER_LIMIT = 2
+
+# Délai global d'un lot (secondes)
+DEFAULT_TIMEOUT = 20
+MAX_TIMEOUT = 60
+
+# Pool partagé : les extractions non terminées à l'échéance continuent
+# en arrière-plan (et remplissent le cache)
+_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch')
+
+# Extractions en cours et en attente par hébergeur (tous lots confondus)
+_in_flight = {}
+_waiting = {}
+_dispatch_lock = threading.Lock()
+
+QUEUE_TIMEOUT_RESULT = {
+    'success': False,
+    'error': 'Délai dépassé en attente de l\'hébergeur',
+    'timeout': True
+}
+
+
+def hoster_key(url):
+    """Clé de limitation : domaine normalisé de l'URL"""
+    return urlparse(normalize_url(url)).netloc or 'unknown'
+
+
+def _submit(extract_fn, url, deadline):
+    """Soumet au pool si l'hébergeur a une place libre, sinon met en file ; retourne un Future"""
+    key = hoster_key(url)
+    job = (extract_fn, url, deadline, Future())
+    with _dispatch_lock:
+        if _in_flight.get(key, 0) >= PER_HOSTER_LIMIT:
+            _waiting.setdefault(key, deque()).append(job)
+            return job[3]
+        _in_flight[key] = _in_flight.get(key, 0) + 1
+    _executor.submit(_run, key, job)
+    return job[3]
+
+
+def _run(key, job):
+    extract_fn, url, _, future = job
+    try:
+        future.set_result(extract_fn(url))
+    except Exception as e:
+        future.set_exception(e)
+    finally:
+        _dispatch_next(key)
+
+
+def _dispatch_next(key):
+    """Place libérée : soumet le prochain job non expiré de l'hébergeur, sinon la rend"""
+    expired = []
+    job = None
+    with _dispatch_lock:
+        queue = _waiting.get(key)
+        while queue and job is None:
+            candidate = queue.popleft()
+            if candidate[2] > time.time():
+                job = candidate
+            else:
+                expired.append(candidate)
+        if queue is not None and not queue:
+            del _waiting[key]
+        if job is None:
+            _in_flight[key] -= 1
+            if not _in_flight[key]:
+                del _in_flight[key]
+
+    for candidate in expired:
+        candidate[3].set_result(dict(QUEUE_TIMEOUT_RESULT))
+    if job is not None:
+        _executor.submit(_run, key, job)
+
+
+def extract_batch(urls, extract_fn, timeout=DEFAULT_TIMEOUT):
+    """
+    Extrait plusieurs URLs en parallèle.
+    Retourne les résultats dans l'ordre d'entrée ; les URLs non résolues
+    avant l'échéance sont marquées 'timeout' (résultats partiels).
+    """
+    timeout = max(1, min(float(timeout), MAX_TIMEOUT))
+    deadline = time.time() + timeout
+
+    futures = [_submit(extract_fn, url, deadline) for url in urls]
+    wait(futures, timeout=timeout)
+
+    results = []
+    for url, future in zip(urls, futures):
+        if not future.done():
+            result = {
+                'success': False,
+                'error': 'Délai dépassé',
+                'timeout': True
+            }
+        else:
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+        results.append(dict(result, source_url=url))
+
+    succeeded = sum(1 for r in results if r.get('success'))
+    timed_out = sum(1 for r in results if r.get('timeout'))
+
+    return {
+        'success': True,
+        'count': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded - timed_out,
+        'timed_out': timed_out,
+        'partial': timed_out > 0,
+        'results': results
+    }
@@ -0,0 +1,77 @@
+"""
+benchmarks/bench_async.py
+Compare le débit (requêtes/s) du chemin synchrone (workers bloquants)
+et du moteur async face à un faux hébergeur local lent.
+
+Usage : python -m benchmarks.bench_async --requests 200 --workers 4 --latency 0.1
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import async_engine
+import extractors
+from benchmarks.fake_server import start_fake_hoster
+
+
+def bench_sync(urls, workers):
+    """Simule N workers gunicorn synchrones : une extraction bloquante à la fois par worker"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(extractors.extract_video_url, urls))
+    return time.perf_counter() - start, results
+
+
+async def _run_async(urls, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(url):
+        async with semaphore:
+            return await async_engine.extract_video_url(url)
+
+    try:
+        return await asyncio.gather(*(one(url) for url in urls))
+    finally:
+        await async_engine.close_session()
+
+
+def bench_async(urls, concurrency):
+    start = time.perf_counter()
+    results = asyncio.run(_run_async(urls, concurrency))
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=4, help='workers synchrones simulés')
+    parser.add_argument('--concurrency', type=int, default=100, help='requêtes async simultanées')
+    parser.add_argument('--latency', type=float, default=0.1, help='latence du faux hébergeur (s)')
+    args = parser.parse_args()
+
+    server, base_url = start_fake_hoster(latency=args.latency)
+    try:
+        # URLs distinctes : pas de regroupement single-flight
+        sync_urls = [f'{base_url}/embed-sync{i}.html' for i in range(args.requests)]
+        async_urls = [f'{base_url}/embed-async{i}.html' for i in range(args.requests)]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            sync_time, sync_results = bench_sync(sync_urls, args.workers)
+            async_time, async_results = bench_async(async_urls, args.concurrency)
+    finally:
+        server.shutdown()
+
+    for label, elapsed, results in (
+        (f'sync  ({args.workers} workers)', sync_time, sync_results),
+        (f'async (concurrence {args.concurrency})', async_time, async_results),
+    ):
+        ok = sum(1 for r in results if r.get('success'))
+        print(f'{label:28s} {len(results) / elapsed:8.1f} req/s  '
+              f'{elapsed:6.2f} s  succès {ok}/{len(results)}')
+
+
+if __name__ == '__main__':
+    main()
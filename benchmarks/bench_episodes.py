@@ -0,0 +1,92 @@
+"""
+benchmarks/bench_episodes.py
+Parsing de la section des épisodes : passage unique contre l'ancienne
+implémentation (copie ###NEWLINE### de la page, recherche de chaque URL
+dans toute la section). Le temps de l'ancienne croît avec le carré du
+nombre d'épisodes, celui de la nouvelle linéairement.
+
+Usage : python -m benchmarks.bench_episodes [--episodes 250,1000,4000]
+"""
+import argparse
+import re
+import time
+
+import my_scraper
+from benchmarks.fixtures import episode_page
+
+ANIME_URL = 'https://www.frenchanime.com/animes-vostfr/1000-one-piece.html'
+
+
+def legacy_parse_episodes_html(html, anime_url):
+    """Implémentation d'origine, conservée pour comparaison"""
+    html_content = html.replace('\n', '###NEWLINE###')
+    start_index = html_content.find('class="eps"')
+    if start_index == -1:
+        return {'success': False, 'error': 'Section des épisodes non trouvée', 'episodes': []}
+    end_index = html_content.find('/div>', start_index)
+    eps_section = html_content[start_index:] if end_index == -1 else html_content[start_index:end_index]
+    eps_section = eps_section.replace('###NEWLINE###', '\n')
+    eps_section = eps_section.replace('!//', '!https://').replace(',//', ',https://')
+
+    episodes = []
+    for episode_num, url in re.findall(r'(\d+)!([^\s,]+)', eps_section):
+        episodes.append({
+            'episode': episode_num,
+            'url': url,
+            'quality': my_scraper._detect_video_quality(url, eps_section),
+            'host': my_scraper._extract_host_from_url(url)
+        })
+    if not episodes:
+        for i, url in enumerate(re.findall(r'(https?://[^\s,]+)', eps_section), 1):
+            episodes.append({
+                'episode': str(i),
+                'url': url,
+                'quality': my_scraper._detect_video_quality(url, eps_section),
+                'host': my_scraper._extract_host_from_url(url)
+            })
+    return {
+        'success': True,
+        'anime_url': anime_url,
+        'episodes': episodes,
+        'total_episodes': len(episodes),
+        'qualities_available': list(set(ep['quality'] for ep in episodes)),
+        'hosts_available': list(set(ep['host'] for ep in episodes))
+    }
+
+
+def same_result(new, old):
+    return (
+        new['episodes'] == old['episodes']
+        and sorted(new['qualities_available']) == sorted(old['qualities_available'])
+        and sorted(new['hosts_available']) == sorted(old['hosts_available'])
+    )
+
+
+def timed(parse, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse(html, ANIME_URL)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--episodes', default='250,1000,4000', help='tailles de série, séparées par des virgules')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for count in (int(n) for n in args.episodes.split(',')):
+        html = episode_page(count)
+        new = my_scraper.parse_episodes_html(html, ANIME_URL)
+        old = legacy_parse_episodes_html(html, ANIME_URL)
+        status = 'identiques' if same_result(new, old) else '⚠️  DIFFÉRENTS'
+
+        old_time = timed(legacy_parse_episodes_html, html, args.repeat)
+        new_time = timed(my_scraper.parse_episodes_html, html, args.repeat)
+        print(f"{count:5} épisodes ({new['total_episodes']} liens, {status}) : "
+              f"ancien {old_time * 1000:8.2f} ms  nouveau {new_time * 1000:7.2f} ms  "
+              f"(x{old_time / new_time:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+benchmarks/bench_hosts.py
+Nom d'hébergeur des liens d'épisodes : ancienne fonction (urlparse +
+table reconstruite + recherche linéaire à chaque URL) contre l'index
+partagé avec le routage Kodi, mémorisé par domaine.
+Les divergences attendues sont les alias connus du routage
+(ex: ds2play.com → DoodStream), affichés pour contrôle.
+
+Usage : python -m benchmarks.bench_hosts [--series 20] [--episodes 1000]
+"""
+import argparse
+import time
+from urllib.parse import urlparse
+
+import my_scraper
+from benchmarks.fixtures import episode_page
+from hoster_routing import hoster_router
+
+EXTRA_URLS = [
+    'https://ds2play.com/e/abc', 'https://www.mp4upload.com/embed-x.html',
+    'https://ok.ru/videoembed/1', 'https://hqq.to/e/x', 'https://www.youtube.com/embed/x',
+]
+
+
+def legacy_extract_host_from_url(url):
+    """Implémentation d'origine, conservée pour comparaison"""
+    try:
+        hostname = urlparse(url).netloc.lower()
+        host_mapping = {
+            'vidmoly': 'Vidmoly', 'voe': 'Voe', 'streamtape': 'Streamtape', 'dood': 'DoodStream',
+            'mp4upload': 'Mp4Upload', 'okru': 'OK.ru', 'youtube': 'YouTube', 'vimeo': 'Vimeo',
+            'uptostream': 'Uptostream', 'mystream': 'MyStream'
+        }
+        for host_key, host_name in host_mapping.items():
+            if host_key in hostname:
+                return host_name
+        parts = hostname.split('.')
+        if len(parts) >= 2:
+            return parts[-2].capitalize()
+        return hostname
+    except Exception:
+        return 'Hébergeur inconnu'
+
+
+def episode_urls(series, episodes):
+    urls = []
+    for seed in range(series):
+        page = my_scraper.parse_episodes_html(episode_page(episodes, seed=seed), '')
+        urls.extend(ep['url'] for ep in page['episodes'])
+    return urls + EXTRA_URLS
+
+
+def timed(fn, urls, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for url in urls:
+            fn(url)
+    return (time.perf_counter() - start) / (repeat * len(urls))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--series', type=int, default=20)
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    urls = episode_urls(args.series, args.episodes)
+    netlocs = {urlparse(url).netloc for url in urls}
+    print(f"{len(urls)} liens, {len(netlocs)} domaines distincts")
+
+    divergences = {}
+    for url in urls:
+        old, new = legacy_extract_host_from_url(url), my_scraper._extract_host_from_url(url)
+        if old != new:
+            divergences[urlparse(url).netloc] = (old, new)
+    for netloc, (old, new) in sorted(divergences.items()):
+        print(f"  {netloc}: {old} → {new}")
+
+    old_time = timed(legacy_extract_host_from_url, urls, args.repeat)
+    hoster_router._label_netloc.cache_clear()
+    new_time = timed(my_scraper._extract_host_from_url, urls, args.repeat)
+    print(f"ancien  : {old_time * 1e6:6.2f} µs/lien")
+    print(f"mémorisé: {new_time * 1e6:6.2f} µs/lien  (x{old_time / new_time:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+benchmarks/bench_listing.py
+Parsing des pages de liste : lxml (un seul parsing) contre l'ancienne
+implémentation BeautifulSoup/html.parser. Temps et pic mémoire par page,
+et vérification que les deux donnent les mêmes résultats.
+Le pic mémoire est mesuré avec tracemalloc (allocations Python uniquement :
+les arbres lxml, alloués en C, n'y apparaissent pas).
+
+Usage : python -m benchmarks.bench_listing [--pages DOSSIER] [--cards 30]
+"""
+import argparse
+import time
+import tracemalloc
+
+import my_scraper
+from benchmarks.fixtures import listing_page, load_pages
+
+PAGE_URL = 'https://www.frenchanime.com/animes-vostfr/page/2/'
+
+
+def measure(parse, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, html in pages:
+            parse(html, PAGE_URL, 1000)
+    elapsed = (time.perf_counter() - start) / (repeat * len(pages))
+
+    tracemalloc.start()
+    for _, html in pages:
+        parse(html, PAGE_URL, 1000)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', help='dossier de pages de liste capturées (*.html)')
+    parser.add_argument('--cards', type=int, default=30, help='cartes par page synthétique')
+    parser.add_argument('--count', type=int, default=10, help='pages synthétiques')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = load_pages(args.pages)
+    else:
+        pages = [(f'synthetic-{i}', listing_page(args.cards, page=i + 2)) for i in range(args.count)]
+
+    diffs = 0
+    for name, html in pages:
+        new = my_scraper.parse_animes_html(html, PAGE_URL, 1000)
+        old = my_scraper._parse_animes_html_bs4(html, PAGE_URL, 1000)
+        if new != old:
+            diffs += 1
+            print(f'⚠️  résultats différents : {name}')
+
+    size = sum(len(html) for _, html in pages) / len(pages)
+    print(f'{len(pages)} pages, {size / 1024:.0f} Ko en moyenne, {diffs} divergences')
+
+    old_time, old_peak = measure(my_scraper._parse_animes_html_bs4, pages, args.repeat)
+    new_time, new_peak = measure(my_scraper.parse_animes_html, pages, args.repeat)
+
+    print(f'bs4/html.parser : {old_time * 1000:7.2f} ms/page  pic Python {old_peak / 1024:8.0f} Ko')
+    print(f'lxml            : {new_time * 1000:7.2f} ms/page  pic Python {new_peak / 1024:8.0f} Ko  '
+          f'(x{old_time / new_time:.1f})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+benchmarks/bench_metrics.py
+Coût de l'instrumentation : mesure unitaire (compteur, histogramme,
+décorateur) et surcoût par requête Flask avec et sans instrument_app,
+sur une application minimale (sans démarrer les tâches de fond d'app.py).
+
+Usage : python -m benchmarks.bench_metrics [--iterations 200000]
+"""
+import argparse
+import time
+
+from flask import Flask, jsonify
+
+import metrics
+
+
+def per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def flask_client(instrumented):
+    app = Flask(f'bench_{instrumented}')
+
+    @app.route('/health')
+    def health():
+        return jsonify({'status': 'healthy'})
+
+    if instrumented:
+        metrics.instrument_app(app)
+    return app.test_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=200000)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    registry = metrics.Registry()
+    counter = registry.counter('bench_total', 'bench', ('route', 'status'))
+    histogram = registry.histogram('bench_seconds', 'bench', ('route',))
+
+    def noop():
+        return {'success': True}
+
+    decorated = metrics.instrumented('bench')(noop)
+
+    baseline = per_call(noop, args.iterations)
+    print(f"compteur.inc          : {per_call(lambda: counter.inc('/extract', '200'), args.iterations) * 1e9:7.0f} ns")
+    print(f"histogramme.observe   : {per_call(lambda: histogram.observe(0.042, '/extract'), args.iterations) * 1e9:7.0f} ns")
+    print(f"décorateur (surcoût)  : {(per_call(decorated, args.iterations) - baseline) * 1e9:7.0f} ns")
+
+    bare, instrumented = flask_client(False), flask_client(True)
+    bare.get('/health')
+    instrumented.get('/health')
+    bare_time = per_call(lambda: bare.get('/health'), args.requests)
+    instrumented_time = per_call(lambda: instrumented.get('/health'), args.requests)
+    overhead = instrumented_time - bare_time
+    print(f"requête Flask         : {bare_time * 1e6:7.1f} µs sans, {instrumented_time * 1e6:7.1f} µs avec "
+          f"(+{overhead * 1e6:.1f} µs, {overhead / bare_time * 100:.1f} %)")
+
+    start = time.perf_counter()
+    text = metrics.registry.render()
+    print(f"rendu /metrics        : {(time.perf_counter() - start) * 1000:7.2f} ms ({len(text.splitlines())} lignes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""
+benchmarks/bench_replay.py
+Référence hors-ligne de bout en bout contre le faux site local
+(benchmarks.fake_server) : débit, latences p50/p99 et pic de RSS pour
+- get_animes_from_page, get_episodes_from_anime, extract_video_url
+- les routes Flask /animes, /search et /extract (client de test)
+
+--unique borne le nombre d'URLs distinctes : la première passe sur chaque
+URL est un miss des caches, les suivantes des hits. --cold vide les caches
+de pages, de résultats parsés et partagé avant chaque scénario.
+Le pic de RSS est échantillonné pendant chaque scénario (/proc/self/statm,
+sinon ru_maxrss du processus entier).
+
+Scénario slow_hoster : --callers appels simultanés de extract_video_url
+sur chacune des --slow-urls URLs d'un hébergeur lent (--slow-latency) ;
+vérifie une seule extraction par URL (single-flight), code de sortie 1
+sinon.
+
+Usage : python -m benchmarks.bench_replay --requests 200 --concurrency 8 \\
+        --latency 0.02 --failure-rate 0.05 [--site DOSSIER] [--output base.json] \\
+        [--callers 16 --slow-urls 4 --slow-latency 0.3]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from benchmarks.fake_server import start_fake_hoster, start_fake_site
+from benchmarks.fixtures import load_site
+
+SCENARIOS = ('animes', 'episodes', 'extract', 'route_animes', 'route_search', 'route_extract', 'slow_hoster')
+
+RSS_SAMPLE_INTERVAL = 0.01
+
+
+def current_rss():
+    """RSS courant en octets (None hors Linux)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class RssSampler:
+    """Pic de RSS pendant un bloc `with`"""
+
+    def __enter__(self):
+        self.peak = current_rss() or 0
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while not self.stop.wait(RSS_SAMPLE_INTERVAL):
+            rss = current_rss()
+            if rss is None:
+                return
+            self.peak = max(self.peak, rss)
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+        if not self.peak:
+            # ru_maxrss : Ko sous Linux, pic du processus depuis son démarrage
+            self.peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return False
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_scenario(call, count, concurrency):
+    """call(i) → succès (bool) ; retourne les mesures du scénario"""
+    latencies = [0.0] * count
+    successes = [False] * count
+
+    def one(i):
+        started = time.perf_counter()
+        try:
+            successes[i] = bool(call(i))
+        except Exception:
+            successes[i] = False
+        latencies[i] = time.perf_counter() - started
+
+    with RssSampler() as rss:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(count)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        'requests': count,
+        'success': sum(successes),
+        'throughput': round(count / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'peak_rss_mb': round(rss.peak / 1024 / 1024, 1),
+    }
+
+
+def build_scenarios(base_url, unique):
+    """Appels par scénario (importés ici : l'environnement doit être prêt)"""
+    import app as flask_app
+    import my_scraper
+    from extractors import extract_video_url
+
+    client = flask_app.app.test_client()
+
+    def listing_url(i):
+        return f'{base_url}/animes-vostfr/page/{i % unique + 1}/'
+
+    def anime_url(i):
+        return f'{base_url}/animes-vostfr/{1000 + i % unique}-naruto-shippuden.html'
+
+    def embed_url(i):
+        return f'{base_url}/embed-{i % unique:05d}.html'
+
+    def route_ok(path):
+        response = client.get(path)
+        return response.status_code == 200 and (response.get_json(silent=True) or {}).get('success', True)
+
+    def route_served(path):
+        # /extract sans Kodi chargé (hors-ligne) : réponse « fallback », mesure du chemin cache + route
+        return client.get(path).status_code == 200
+
+    return {
+        'animes': lambda i: my_scraper.get_animes_from_page(listing_url(i)).get('success'),
+        'episodes': lambda i: my_scraper.get_episodes_from_anime(anime_url(i)).get('success'),
+        'extract': lambda i: extract_video_url(embed_url(i)).get('success'),
+        'route_animes': lambda i: route_ok(f'/animes?page={i % 5 + 1}&limit=30'),
+        'route_search': lambda i: route_ok(f'/search?q={("naruto", "one pie", "kaisen", "death")[i % 4]}'),
+        'route_extract': lambda i: route_served(f'/extract?url={quote(embed_url(i), safe="")}'),
+    }
+
+
+def run_slow_hoster(base_url, urls, callers):
+    """
+    `callers` appels simultanés par URL (barrière) sur un hébergeur lent ;
+    retourne les mesures et le nombre d'extractions réellement lancées par URL
+    """
+    import extractors
+    from extraction_cache import normalize_url
+
+    registry = extractors.extractor_registry
+    extract = registry.extract
+    executions = Counter()
+    executions_lock = threading.Lock()
+
+    def counted_extract(url):
+        with executions_lock:
+            executions[normalize_url(url)] += 1
+        return extract(url)
+
+    embeds = [f'{base_url}/embed-{i:05d}.html' for i in range(urls)]
+    calls = [url for url in embeds for _ in range(callers)]
+    barrier = threading.Barrier(len(calls))
+
+    def call(i):
+        barrier.wait()
+        return extractors.extract_video_url(calls[i]).get('success')
+
+    registry.extract = counted_extract
+    try:
+        result = run_scenario(call, len(calls), len(calls))
+    finally:
+        del registry.extract
+
+    result['extractions'] = {url: executions[normalize_url(url)] for url in embeds}
+    return result
+
+
+def seed_catalogue(base_url, pages):
+    """Remplit la base et l'index du catalogue depuis le faux site (routes /animes, /search)"""
+    import my_scraper
+    from catalogue_search import catalogue_index
+    from catalogue_store import catalogue_store
+
+    records = []
+    for page in range(1, pages + 1):
+        records.extend(my_scraper.get_animes_from_page(f'{base_url}/animes-vostfr/page/{page}/', 1000).get('results', []))
+    catalogue_store.upsert_many(records)
+    catalogue_index.add_many(records)
+
+
+def clear_caches():
+    from page_cache import page_cache
+    from parse_cache import parsed_cache
+    from shared_cache import shared_cache
+    page_cache.clear()
+    parsed_cache.clear()
+    if shared_cache.enabled:
+        with shared_cache.connection() as conn:
+            conn.execute('DELETE FROM cache')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='appels par scénario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--unique', type=int, default=50, help='URLs distinctes par scénario')
+    parser.add_argument('--latency', type=float, default=0.02, help='latence du faux site (s)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='gigue ajoutée à la latence (s)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='part des réponses en 503')
+    parser.add_argument('--episodes', type=int, default=24, help='épisodes par fiche synthétique')
+    parser.add_argument('--site', help='site capturé à rejouer (voir fixtures.load_site)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cold', action='store_true', help='vider les caches avant chaque scénario')
+    parser.add_argument('--callers', type=int, default=16, help='appels simultanés par URL (slow_hoster)')
+    parser.add_argument('--slow-urls', type=int, default=4, help='URLs distinctes (slow_hoster)')
+    parser.add_argument('--slow-latency', type=float, default=0.3, help='latence de l\'hébergeur lent (s)')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--output', help='écrire les résultats en JSON')
+    args = parser.parse_args()
+
+    server, base_url = start_fake_site(
+        latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+        pages=load_site(args.site) if args.site else None,
+        episodes=args.episodes, seed=args.seed
+    )
+    slow_server, slow_url = start_fake_hoster(latency=args.slow_latency)
+
+    # Base temporaire, pas de crawl en arrière-plan, genres servis par le faux site
+    workdir = tempfile.mkdtemp(prefix='bench_replay_')
+    os.environ['CATALOGUE_DB'] = os.path.join(workdir, 'catalogue.db')
+    os.environ['SHARED_CACHE_PATH'] = os.path.join(workdir, 'shared_cache.db')
+    os.environ['CATALOGUE_REFRESH'] = '0'
+    os.environ['GENRES_URL'] = f'{base_url}/'
+    os.environ['TRACE_SAMPLE_RATE'] = '0'
+
+    results = {}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            scenarios = build_scenarios(base_url, args.unique)
+            seed_catalogue(base_url, pages=5)
+            for name in args.scenarios.split(','):
+                if args.cold:
+                    clear_caches()
+                if name == 'slow_hoster':
+                    results[name] = run_slow_hoster(slow_url, args.slow_urls, args.callers)
+                else:
+                    results[name] = run_scenario(scenarios[name], args.requests, args.concurrency)
+    finally:
+        server.shutdown()
+        slow_server.shutdown()
+
+    print(f"{'scénario':15s} {'req/s':>9s} {'p50 ms':>9s} {'p99 ms':>9s} {'RSS Mo':>8s}  succès")
+    for name, r in results.items():
+        print(f"{name:15s} {r['throughput']:9.1f} {r['p50_ms']:9.2f} {r['p99_ms']:9.2f} "
+              f"{r['peak_rss_mb']:8.1f}  {r['success']}/{r['requests']}")
+
+    duplicated = {}
+    if 'slow_hoster' in results:
+        extractions = results['slow_hoster']['extractions']
+        duplicated = {url: n for url, n in extractions.items() if n != 1}
+        print(f"\n{'❌' if duplicated else '✅'} single-flight : {sum(extractions.values())} extraction(s) "
+              f"pour {len(extractions)} URL(s) × {args.callers} appels simultanés")
+        for url, n in duplicated.items():
+            print(f"   {url} : {n} extractions")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+        print(f"Résultats écrits dans {args.output}")
+
+    if duplicated:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+benchmarks/bench_routing.py
+Micro-benchmark du routage URL → hébergeur : ancien balayage linéaire
+par sous-chaînes contre l'index HosterRouter, avec N hébergeurs.
+
+Usage : python -m benchmarks.bench_routing --hosters 500
+"""
+import argparse
+import random
+import timeit
+
+from hoster_routing import HOSTER_RULES, HosterRouter
+
+# Miroirs reconnus par l'ancien balayage (sous-chaînes) à ne pas perdre
+MIRROR_URLS = [
+    'https://doods.pro/e/abc',
+    'https://dood.yt/e/abc',
+    'https://strtapeadblock.me/e/abc',
+    'https://streamtapeadblock.art/e/abc',
+    'https://voeunblock3.com/e/abc',
+    'https://voe-unblock.net/e/abc',
+    'https://mixdroop.bz/e/abc',
+    'https://hqq.ac/e/abc',
+]
+
+
+def build_rules(count):
+    """Règles réelles + hébergeurs synthétiques jusqu'à `count`"""
+    rules = dict(HOSTER_RULES)
+    for i in range(count - len(rules)):
+        name = f'hoster{i:04d}'
+        rules[name] = {'domains': [f'{name}.com', f'{name}.to'], 'labels': [name, f'{name}cdn']}
+    return rules
+
+
+def legacy_route(mapping, url):
+    """Ancien algorithme : sous-chaînes testées une à une sur l'URL"""
+    url_lower = url.lower()
+    for name, keywords in mapping.items():
+        for keyword in keywords:
+            if keyword in url_lower:
+                return name
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hosters', type=int, default=500)
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+
+    rules = build_rules(args.hosters)
+    mapping = {name: rule['labels'] + rule['domains'] for name, rule in rules.items()}
+    router = HosterRouter(rules)
+
+    names = list(rules)
+    random.seed(42)
+    urls = [f'https://www.{rules[n]["domains"][-1]}/e/{i}' for i, n in
+            enumerate(random.choice(names) for _ in range(1000))]
+    urls += ['https://unknown-host.example/embed/1'] * 50
+
+    # Vérification : mêmes décisions pour les URLs connues
+    mismatches = sum(1 for u in urls[:1000] + MIRROR_URLS if legacy_route(mapping, u) != router.route(u)[0])
+
+    legacy = timeit.timeit(lambda: [legacy_route(mapping, u) for u in urls], number=args.lookups // len(urls) or 1)
+    indexed = timeit.timeit(lambda: [router.route(u) for u in urls], number=args.lookups // len(urls) or 1)
+    total = (args.lookups // len(urls) or 1) * len(urls)
+
+    print(f'{len(rules)} hébergeurs, {total} routages, {mismatches} divergences')
+    print(f'linéaire : {legacy / total * 1e6:8.2f} µs/URL')
+    print(f'index    : {indexed / total * 1e6:8.2f} µs/URL  (x{legacy / indexed:.0f})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+benchmarks/bench_search.py
+Recherche dans le catalogue : index inversé contre un balayage linéaire
+des titres (équivalent d'un LIKE '%...%'). Temps de construction et
+latence par requête sur un catalogue synthétique, à froid (résultats
+gardés par requête vidés avant chaque appel, médiane) et répétée.
+
+Usage : python -m benchmarks.bench_search [--records 30000]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.fixtures import TITLES
+from catalogue_search import CatalogueIndex, fold
+
+WORDS = [
+    'héros', 'démon', 'épée', 'école', 'dragon', 'ninja', 'pirate', 'titan',
+    'magie', 'royaume', 'vengeance', 'amitié', 'lycée', 'guerre', 'destin', 'chasseur',
+]
+
+QUERIES = ['one', 'naruto shipp', 'kimetsu', 'hero', 'epee demon', 'chainsaw m', 'dragon', 'x', 'zzz']
+
+
+def synthetic_catalogue(count, seed=1):
+    rng = random.Random(seed)
+    # Vocabulaire de descriptions : quelques mots fréquents, beaucoup de rares
+    vocabulary = WORDS + [
+        ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 10)))
+        for _ in range(5000)
+    ]
+    records = []
+    for i in range(count):
+        title = f"{rng.choice(TITLES)} {rng.choice(WORDS).capitalize()} {i}"
+        records.append({
+            'url': f'https://www.frenchanime.com/animes-vostfr/{i}.html',
+            'title': title,
+            'description': ' '.join(rng.choice(vocabulary) for _ in range(25)),
+        })
+    return records
+
+
+def linear_search(records, query, limit=30):
+    needle = fold(query)
+    return [r for r in records if needle in fold(r['title'])][:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=30000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    records = synthetic_catalogue(args.records)
+
+    start = time.perf_counter()
+    index = CatalogueIndex()
+    for i in range(0, len(records), 100):
+        index.add_many(records[i:i + 100])
+    build = time.perf_counter() - start
+    print(f"{args.records} fiches, {index.stats()['terms']} mots, construction {build:.2f} s (lots de 100)")
+
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            index.results.clear()
+            start = time.perf_counter()
+            index.search(query)
+            timings.append(time.perf_counter() - start)
+        cold = statistics.median(timings)
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            results = index.search(query)
+        indexed = (time.perf_counter() - start) / args.repeat
+
+        start = time.perf_counter()
+        linear_search(records, query)
+        linear = time.perf_counter() - start
+
+        print(f"{query!r:16} index à froid {cold * 1000:7.3f} ms, répétée {indexed * 1000:7.3f} ms  "
+              f"({len(results):2} résultats)  balayage {linear * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
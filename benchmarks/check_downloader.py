@@ -0,0 +1,114 @@
+"""
+benchmarks/check_downloader.py
+Vérification hors-ligne de kodi_downloader contre le faux dossier hosters
+GitHub (benchmarks.fake_server) :
+- premier passage : tout est téléchargé
+- SHA de l'arbre identique au fichier local : aucune requête raw
+- sans SHA dans la liste : requêtes conditionnelles, 304 partout
+- un module modifié en amont : lui seul est retéléchargé
+- échec pendant le rename : ancien fichier intact, aucun fichier temporaire
+
+Usage : python -m benchmarks.check_downloader
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+# Pas de téléchargement GitHub à l'import de kodi_downloader
+os.environ['KODI_AUTO_DOWNLOAD'] = '0'
+
+import kodi_downloader
+from benchmarks.fake_server import start_fake_hosters_directory
+from benchmarks.fixtures import hoster_module, hosters_directory
+
+failures = []
+
+
+def check(condition, message):
+    print(f"{'✅' if condition else '❌'} {message}")
+    if not condition:
+        failures.append(message)
+
+
+def raw_hits(handler, status=None):
+    with handler.hits_lock:
+        return [path for path, code in handler.hits if '/raw/' in path and status in (None, code)]
+
+
+def run(downloader, handler):
+    """Un passage complet (liste + fichiers) ; retourne (décompte, requêtes raw)"""
+    with handler.hits_lock:
+        handler.hits.clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        counts = downloader.fetch_many(downloader.get_extractor_list())
+    return counts, raw_hits(handler)
+
+
+def temp_files(directory):
+    return [name for name in os.listdir(directory) if name.endswith('.tmp')]
+
+
+def main():
+    files = hosters_directory()
+    server, handler, api_url, raw_url = start_fake_hosters_directory(files)
+    directory = tempfile.mkdtemp(prefix='kodi_hosters_')
+
+    def downloader():
+        d = kodi_downloader.KodiDownloader(base_url=api_url, raw_base_url=raw_url, extractors_dir=directory)
+        d.rate_limiter = kodi_downloader.TokenBucket(1000, 1000)
+        return d
+
+    try:
+        counts, hits = run(downloader(), handler)
+        check(counts['downloaded'] == len(files), f"premier passage : {counts}")
+        check(all(open(os.path.join(directory, n), 'rb').read() == data for n, data in files.items()),
+              "contenus identiques à l'amont")
+
+        counts, hits = run(downloader(), handler)
+        check(counts['unchanged'] == len(files) and not hits,
+              f"SHA identiques : {counts}, {len(hits)} requêtes raw")
+
+        handler.include_sha = False
+        counts, hits = run(downloader(), handler)
+        not_modified = raw_hits(handler, 304)
+        check(counts['unchanged'] == len(files) and len(not_modified) == len(files),
+              f"sans SHA : {counts}, {len(not_modified)}/{len(hits)} réponses 304")
+        handler.include_sha = True
+
+        handler.files['voe.py'] = hoster_module('voe', version=2).encode('utf-8')
+        d = downloader()
+        counts, hits = run(d, handler)
+        check(counts['downloaded'] == 1 and d.downloaded == ['voe.py'] and len(hits) == 1,
+              f"voe.py modifié : {counts}, retéléchargés {d.downloaded}")
+        check(open(os.path.join(directory, 'voe.py'), 'rb').read() == handler.files['voe.py'],
+              "voe.py remplacé par la version 2")
+
+        # Rename qui échoue : l'ancien module reste en place, pas de fichier temporaire
+        handler.files['voe.py'] = hoster_module('voe', version=3).encode('utf-8')
+        real_replace = os.replace
+
+        def failing_replace(src, dst):
+            if dst.endswith('voe.py'):
+                raise OSError('disque plein (simulé)')
+            return real_replace(src, dst)
+
+        kodi_downloader.os.replace = failing_replace
+        try:
+            counts, _ = run(downloader(), handler)
+        finally:
+            kodi_downloader.os.replace = real_replace
+        check(counts['failed'] == 1, f"rename en échec : {counts}")
+        check(b'version 2' in open(os.path.join(directory, 'voe.py'), 'rb').read(),
+              "ancien voe.py intact après l'échec")
+        check(not temp_files(directory), f"fichiers temporaires restants : {temp_files(directory)}")
+    finally:
+        server.shutdown()
+
+    print(f"\n{'❌ %d échec(s)' % len(failures) if failures else '✅ Tout est conforme'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
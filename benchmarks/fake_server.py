@@ -0,0 +1,214 @@
+"""
+benchmarks/fake_server.py
+Faux site + faux hébergeurs locaux pour les benchmarks hors-ligne
+- Pages de liste (/<section>/, /<section>/page/<n>/), fiches animés avec
+  section class="eps" (/<section>/<id>-<slug>.html), pages embed
+  vidmoly (/embed-<id>.html) et voe (/e/<id>)
+- Pages générées par benchmarks.fixtures (déterministes par chemin) ou
+  rejouées depuis un site capturé (fixtures.load_site)
+- Latence (+ gigue) et taux d'échec (503) configurables ; ETag et 304
+  comme le vrai site, pour exercer la revalidation de page_cache
+- Faux dossier hosters GitHub (API contents + raw, ETag/304) pour
+  kodi_downloader
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from benchmarks.fixtures import episode_page, listing_page
+
+EMBED_PAGE = """<html><head><title>embed</title></head><body>
+<div id="player"></div>
+<script>
+var player = jwplayer("player").setup({
+    sources: [{file:"https://cdn.fake-hoster.test/hls/%(id)s/master.m3u8"}],
+    image: "https://cdn.fake-hoster.test/img/%(id)s.jpg"
+});
+</script>
+</body></html>"""
+
+VOE_PAGE = """<html><head><title>voe</title></head><body>
+<div class="player"></div>
+<script>
+var sources = {
+    'hls': 'https://cdn.fake-hoster.test/voe/%(id)s/master.m3u8',
+    'video_height': 1080,
+};
+</script>
+</body></html>"""
+
+LISTING_PATH_RE = re.compile(r'^/[\w-]+/(?:page/(\d+)/)?$')
+ANIME_PATH_RE = re.compile(r'^/[\w-]+/(\d+)-[\w-]+\.html$')
+VIDMOLY_PATH_RE = re.compile(r'^/embed-([\w-]+)\.html$')
+VOE_PATH_RE = re.compile(r'^/e/([\w-]+)$')
+
+
+@lru_cache(maxsize=4096)
+def render_page(path, base_url, episodes):
+    """HTML synthétique pour un chemin (None si inconnu)"""
+    match = VIDMOLY_PATH_RE.match(path)
+    if match:
+        return EMBED_PAGE % {'id': match.group(1)}
+
+    match = VOE_PATH_RE.match(path)
+    if match:
+        return VOE_PAGE % {'id': match.group(1)}
+
+    match = ANIME_PATH_RE.match(path)
+    if match:
+        # Lecteurs pointant vers ce serveur : la chaîne liste → épisodes → extraction reste locale
+        hosts = [f'{base_url}/embed-{{id}}.html', f'{base_url}/e/{{id}}']
+        return episode_page(episodes, seed=int(match.group(1)), hosts=hosts)
+
+    match = LISTING_PATH_RE.match(path)
+    if match:
+        return listing_page(page=int(match.group(1) or 1))
+
+    return None
+
+
+class FakeSiteHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers et corps écrits séparément : sans TCP_NODELAY, Nagle + ACK retardé ajoutent ~40 ms
+    disable_nagle_algorithm = True
+    latency = 0.0
+    jitter = 0.0
+    failure_rate = 0.0
+    episodes = 24
+    pages = {}
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+
+    def do_GET(self):
+        with self.rng_lock:
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            failed = self.failure_rate and self.rng.random() < self.failure_rate
+        if delay:
+            time.sleep(delay)
+
+        if failed:
+            return self._send(503, b'injected failure')
+
+        path = self.path.split('?', 1)[0]
+        html = self.pages.get(path)
+        if html is None:
+            html = render_page(path, f'http://{self.headers.get("Host")}', self.episodes)
+        if html is None:
+            return self._send(404, b'not found')
+
+        body = html.encode('utf-8')
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            return self._send(304, b'', etag)
+        self._send(200, body, etag)
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_site(latency=0.0, jitter=0.0, failure_rate=0.0, pages=None, episodes=24, seed=0, port=0):
+    """
+    Démarre le faux site dans un thread ; retourne (serveur, url de base).
+    pages : {chemin: html} rejoué en priorité sur les pages générées
+    """
+    handler = type('Handler', (FakeSiteHandler,), {
+        'latency': latency,
+        'jitter': jitter,
+        'failure_rate': failure_rate,
+        'episodes': episodes,
+        'pages': pages or {},
+        'rng': random.Random(seed),
+        'rng_lock': threading.Lock(),
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+class FakeHostersHandler(BaseHTTPRequestHandler):
+    """
+    Dossier resources/hosters façon GitHub :
+    - /contents : liste JSON [{name, sha}] (sha git du blob, sauf si include_sha=False)
+    - /raw/<fichier> : contenu, ETag, 304 sur If-None-Match
+    Chaque requête est comptée dans `hits` : [(chemin, statut)]
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    files = {}
+    include_sha = True
+    hits = []
+    hits_lock = threading.Lock()
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/contents':
+            listing = [
+                {'name': name, 'sha': git_blob_sha(data) if self.include_sha else None}
+                for name, data in sorted(self.files.items())
+            ]
+            return self._send(200, json.dumps(listing).encode('utf-8'), 'application/json')
+
+        data = self.files.get(path[len('/raw/'):]) if path.startswith('/raw/') else None
+        if data is None:
+            return self._send(404, b'not found')
+
+        etag = '"%s"' % git_blob_sha(data)
+        if self.headers.get('If-None-Match') == etag:
+            return self._send(304, b'', etag=etag)
+        self._send(200, data, 'text/x-python', etag)
+
+    def _send(self, status, body, content_type='text/plain', etag=None):
+        with self.hits_lock:
+            self.hits.append((self.path, status))
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def git_blob_sha(data):
+    """SHA git d'un contenu (champ 'sha' de l'API GitHub)"""
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def start_fake_hosters_directory(files, port=0):
+    """
+    Démarre le faux dossier hosters ; retourne (serveur, handler, url API, url raw).
+    handler.files, handler.include_sha et handler.hits se modifient/lisent en cours de test.
+    """
+    handler = type('Handler', (FakeHostersHandler,), {
+        'files': dict(files),
+        'hits': [],
+        'hits_lock': threading.Lock(),
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    return server, handler, f'{base_url}/contents', f'{base_url}/raw'
+
+
+def start_fake_hoster(latency=0.1, port=0):
+    """Démarre le faux hébergeur dans un thread ; retourne (serveur, url de base)"""
+    return start_fake_site(latency=latency, port=port)
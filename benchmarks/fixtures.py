@@ -0,0 +1,166 @@
+"""
+benchmarks/fixtures.py
+Pages synthétiques reproduisant la structure du site (template DLE)
+pour les benchmarks hors-ligne. Des pages réellement capturées peuvent
+être placées dans un dossier et passées aux benchmarks à la place.
+"""
+import os
+import random
+
+TITLES = [
+    'Naruto Shippuden', 'One Piece', 'Shingeki no Kyojin', 'Kimetsu no Yaiba',
+    'Jujutsu Kaisen', 'Boku no Hero Academia', 'Death Note', 'Fullmetal Alchemist',
+    'Hunter x Hunter', 'Dragon Ball Super', 'Spy x Family', 'Chainsaw Man',
+    'Vinland Saga', 'Mob Psycho 100', 'Tokyo Revengers', 'Black Clover',
+]
+
+LISTING_CARD = """
+<div class="mov clearfix">
+    <div class="mov-i img-box">
+        <a href="/{section}/{id}-{slug}.html" class="mov-t nowrap">
+            <img src="/uploads/posts/{id}.jpg" alt="{title} wiflix">
+        </a>
+        <div class="mov-m">{quality}</div>
+    </div>
+    <div class="block-sai">
+        Saison {season}
+\t\t<span>Episode {episode}</span>
+    </div>
+    <div class="nbloc1"><span>Version</span> {version}</div>
+    <div class="mov-desc">
+        <span>{year}</span>
+        <p>Synopsis : {title} suit les aventures d'un héros qui doit affronter ses démons &amp; sauver ses amis, épisode après épisode.</p>
+    </div>
+    <!-- fin carte -->
+</div>"""
+
+LISTING_PAGE = """<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8"><title>Animes VOSTFR - page {page}</title>
+<script>var dle_root = '/';</script>
+<style>.mov{{float:left}}</style>
+</head><body>
+<div id="header"><ul class="menu">{menu}</ul></div>
+<div id="dle-content">{cards}
+</div>
+<div class="navigation">
+    <a class="prev" href="/animes-vostfr/page/{prev}/">Précédent</a>
+    <a class="next" href="/animes-vostfr/page/{next}/">Suivant</a>
+</div>
+<div id="footer">{footer}</div>
+</body></html>"""
+
+
+def listing_page(cards=30, page=1, seed=None):
+    """Page de liste avec `cards` cartes d'animés"""
+    rng = random.Random(seed if seed is not None else page)
+    rendered = []
+    for i in range(cards):
+        title = rng.choice(TITLES)
+        item_id = page * 1000 + i
+        rendered.append(LISTING_CARD.format(
+            section=rng.choice(['animes-vostfr', 'animes-vf', 'films-vf-vostfr']),
+            id=item_id,
+            slug=title.lower().replace(' ', '-'),
+            title=title,
+            quality=rng.choice(['HD', '1080p', 'SD']),
+            season=rng.randint(1, 5),
+            episode=rng.randint(1, 500),
+            version=rng.choice(['VF', 'VOSTFR']),
+            year=rng.randint(1995, 2024),
+        ))
+    menu = ''.join(f'<li><a href="/genre/{g}/">{g}</a></li>' for g in ('action', 'drame', 'comedie'))
+    footer = '<p>' + ' '.join('lorem ipsum' for _ in range(200)) + '</p>'
+    return LISTING_PAGE.format(
+        page=page, menu=menu, cards=''.join(rendered),
+        prev=max(page - 1, 1), next=page + 1, footer=footer
+    )
+
+
+def load_pages(directory):
+    """Pages HTML capturées (*.html) d'un dossier"""
+    pages = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith('.html'):
+            with open(os.path.join(directory, filename), 'r', encoding='utf-8', errors='replace') as f:
+                pages.append((filename, f.read()))
+    return pages
+
+def load_site(directory):
+    """
+    Site capturé : chemin URL → HTML. Le chemin d'un fichier est son chemin
+    relatif au dossier (index.html représente le dossier lui-même).
+    """
+    pages = {}
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            if not filename.endswith('.html'):
+                continue
+            file_path = os.path.join(root, filename)
+            relative = os.path.relpath(file_path, directory).replace(os.sep, '/')
+            if relative == 'index.html' or relative.endswith('/index.html'):
+                relative = relative[:-len('index.html')]
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                pages['/' + relative] = f.read()
+    return pages
+
+EPISODE_HOSTS = [
+    '//vidmoly.to/embed-{id}.html', 'https://voe.sx/e/{id}', 'https://streamtape.com/e/{id}',
+    'https://dood.wf/e/{id}', '//uqload.co/embed-{id}.html', 'https://mixdrop.co/e/{id}hd',
+]
+
+EPISODE_PAGE = """<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8"><title>{title} - Episodes</title></head><body>
+<div id="header"><ul class="menu">{menu}</ul></div>
+<div class="full-text">{synopsis}</div>
+<div class="eps" style="display:none">
+{episodes}
+</div>
+<div id="footer">{footer}</div>
+</body></html>"""
+
+
+def episode_page(episodes=1000, seed=None, hosts=None):
+    """
+    Page d'animé avec `episodes` épisodes (plusieurs lecteurs par épisode).
+    hosts : modèles d'URL de lecteurs ({id}), EPISODE_HOSTS par défaut
+    """
+    hosts = hosts or EPISODE_HOSTS
+    rng = random.Random(seed if seed is not None else episodes)
+    title = rng.choice(TITLES)
+    lines = []
+    for number in range(1, episodes + 1):
+        players = rng.sample(hosts, rng.randint(1, min(3, len(hosts))))
+        urls = ','.join(p.format(id=f'{number:04d}{rng.randint(0, 99999):05d}') for p in players)
+        marker = rng.choice(['', '', ' [FHD]', ' 720p', ' SD'])
+        lines.append(f'{number}!{urls}{marker}')
+    menu = ''.join(f'<li><a href="/genre/{g}/">{g}</a></li>' for g in ('action', 'drame', 'comedie'))
+    footer = '<p>' + ' '.join('lorem ipsum' for _ in range(200)) + '</p>'
+    return EPISODE_PAGE.format(
+        title=title, menu=menu, synopsis=f'Synopsis : {title}. ' * 20,
+        episodes='\n'.join(lines), footer=footer
+    )
+
+
+HOSTER_MODULE = '''# -*- coding: utf-8 -*-
+# Extracteur {name} (version {version}) - dossier hosters de test
+from resources.hosters.hoster import iHoster
+
+
+class cHoster(iHoster):
+
+    def __init__(self):
+        iHoster.__init__(self, '{name}', '{title}')
+
+    def _getMediaLinkForGuest(self, autoPlay=False):
+        return True, 'https://cdn.fake-hoster.test/{name}/v{version}/master.m3u8'
+'''
+
+
+def hoster_module(name, version=1):
+    """Source d'un module hébergeur Kodi minimal (contenu différent par version)"""
+    return HOSTER_MODULE.format(name=name, title=name.capitalize(), version=version)
+
+
+def hosters_directory(names=('vidmoly', 'voe', 'streamtape', 'dood', 'mixdrop', 'netu')):
+    """{fichier: contenu} d'un dossier resources/hosters"""
+    return {f'{name}.py': hoster_module(name).encode('utf-8') for name in names}
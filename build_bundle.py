@@ -0,0 +1,171 @@
+"""
+build_bundle.py
+Étape de build : empaquète les hébergeurs Kodi (resources/hosters/*.py)
+et les modules resources.* qu'ils importent dans une archive zip
+importable (zipimport), avec un manifest versionné.
+
+Au démarrage, hoster_loader importe directement depuis l'archive :
+plus de git clone / téléchargement au runtime.
+
+Usage : python build_bundle.py [--source kodi-addons] [--output kodi_bundle.zip]
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+import zipfile
+
+from hoster_loader import BUNDLE_PATH, BUNDLE_MANIFEST
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Même dépôt que kodi_loader
+KODI_REPO_URL = "https://github.com/TechEnthusiast47/venom-xbmc-addons.git"
+DEFAULT_SOURCE = os.path.join(BASE_DIR, 'kodi-addons')
+
+HOSTERS_PACKAGE = 'resources.hosters'
+
+
+def module_file(source, module_name):
+    """Chemin du fichier d'un module (module.py ou package/__init__.py), ou None"""
+    base = os.path.join(source, *module_name.split('.'))
+    for candidate in (base + '.py', os.path.join(base, '__init__.py')):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def imported_modules(path, module_name):
+    """Modules resources.* importés par un fichier (imports relatifs résolus)"""
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    is_package = path.endswith('__init__.py')
+    package = module_name if is_package else module_name.rpartition('.')[0]
+
+    found = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            found.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                parts = package.split('.')
+                base = '.'.join(parts[:len(parts) - node.level + 1])
+                target = f'{base}.{node.module}' if node.module else base
+            else:
+                target = node.module or ''
+            found.add(target)
+            # from package import sous_module
+            found.update(f'{target}.{alias.name}' for alias in node.names)
+
+    return {name for name in found if name == 'resources' or name.startswith('resources.')}
+
+
+def collect_files(source, hosters):
+    """Hébergeurs + dépendances resources.* transitives → {chemin dans l'archive: fichier}"""
+    files = {}
+    pending = [f'{HOSTERS_PACKAGE}.{name}' for name in hosters]
+    seen = set()
+
+    while pending:
+        module_name = pending.pop()
+        if module_name in seen:
+            continue
+        seen.add(module_name)
+
+        path = module_file(source, module_name)
+        if path is None:
+            continue
+
+        files[os.path.relpath(path, source).replace(os.sep, '/')] = path
+
+        # Packages parents (leurs __init__ sont exécutés à l'import)
+        parts = module_name.split('.')
+        pending.extend('.'.join(parts[:i]) for i in range(1, len(parts)))
+        pending.extend(imported_modules(path, module_name))
+
+    return files
+
+
+def build(source, output, hosters=None):
+    hosters_dir = os.path.join(source, *HOSTERS_PACKAGE.split('.'))
+    if hosters is None:
+        hosters = sorted(
+            f[:-3] for f in os.listdir(hosters_dir)
+            if f.endswith('.py') and not f.startswith('__') and f != 'hoster.py'
+        )
+
+    files = collect_files(source, hosters)
+
+    # zipimport ne gère pas les packages implicites : ajouter les __init__ manquants
+    packages = {os.path.dirname(arcname) for arcname in files}
+    for package in list(packages):
+        while package:
+            packages.add(package)
+            package = os.path.dirname(package)
+    generated = {f'{p}/__init__.py' for p in packages if f'{p}/__init__.py' not in files}
+
+    digest = hashlib.sha256()
+    entries = {}
+    for arcname in sorted(files):
+        with open(files[arcname], 'rb') as f:
+            data = f.read()
+        entries[arcname] = data
+        digest.update(arcname.encode() + b'\0' + data)
+
+    hosters_present = sorted(
+        name for name in hosters
+        if f"{HOSTERS_PACKAGE.replace('.', '/')}/{name}.py" in entries
+    )
+    manifest = {
+        'version': digest.hexdigest()[:16],
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'package': HOSTERS_PACKAGE,
+        'hosters': hosters_present,
+        'files': {name: hashlib.sha256(data).hexdigest() for name, data in entries.items()},
+    }
+
+    tmp_output = output + '.tmp'
+    with zipfile.ZipFile(tmp_output, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=9) as bundle:
+        for arcname, data in entries.items():
+            bundle.writestr(arcname, data)
+        for arcname in sorted(generated):
+            bundle.writestr(arcname, b'')
+        bundle.writestr(BUNDLE_MANIFEST, json.dumps(manifest, indent=1, sort_keys=True))
+    os.replace(tmp_output, output)
+
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--source', default=DEFAULT_SOURCE, help='racine du dépôt Kodi (contient resources/)')
+    parser.add_argument('--output', default=BUNDLE_PATH)
+    parser.add_argument('--hosters', help='liste séparée par des virgules (défaut: tous)')
+    args = parser.parse_args()
+
+    if not os.path.isdir(os.path.join(args.source, 'resources', 'hosters')):
+        print(f"📥 Clonage de {KODI_REPO_URL}...")
+        result = subprocess.run(
+            ['git', 'clone', '--depth', '1', KODI_REPO_URL, args.source],
+            capture_output=True, text=True, timeout=180
+        )
+        if result.returncode != 0:
+            print(f"❌ Échec du clone: {result.stderr[:200]}")
+            return 1
+
+    hosters = [h.strip() for h in args.hosters.split(',')] if args.hosters else None
+    manifest = build(args.source, args.output, hosters)
+
+    size = os.path.getsize(args.output)
+    print(f"📦 {args.output} v{manifest['version']} : {len(manifest['hosters'])} hébergeurs, "
+          f"{len(manifest['files'])} fichiers, {size / 1024:.0f} Ko")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+catalogue_search.py
+Recherche plein texte dans le catalogue indexé
+- Index inversé en mémoire (titres + descriptions), mis à jour à chaque
+  lot du crawler de catalogue
+- Normalisation : minuscules, accents supprimés (é → e), ponctuation ignorée
+- Dernier mot de la requête en préfixe (autocomplétion)
+- Classement : titre > description, mot exact > préfixe
+- Meilleurs résultats gardés par requête (autocomplétion : les mêmes
+  préfixes reviennent), oubliés à chaque modification de l'index
+"""
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+
+# ============ CONFIGURATION ============
+
+# Poids d'un mot selon le champ où il apparaît
+TITLE_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Un préfixe compte moins qu'un mot complet
+PREFIX_FACTOR = 0.5
+
+# Longueur minimale d'un préfixe seul (« x » ne développe rien,
+# « chainsaw m » oui) ; au-delà, tous les mots du vocabulaire qui le
+# prolongent sont classés (coût absorbé par le cache de résultats)
+MIN_PREFIX_LENGTH = 2
+
+# Requêtes dont les meilleurs résultats sont gardés en mémoire
+RESULT_CACHE_SIZE = 512
+
+# Bonus si le titre commence par la requête
+TITLE_START_BONUS = 2.0
+
+# Mots vides ignorés dans les descriptions et les requêtes
+STOPWORDS = frozenset({
+    'a', 'au', 'aux', 'ce', 'ces', 'd', 'dans', 'de', 'des', 'du', 'en', 'et',
+    'il', 'elle', 'l', 'la', 'le', 'les', 'par', 'pour', 'qui', 'que', 'sa',
+    'se', 'ses', 'son', 'sur', 'un', 'une',
+})
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def fold(text):
+    """Minuscules et accents supprimés (« Épée » → « epee »)"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(fold(text or ''))
+
+
+class CatalogueIndex:
+    """Index inversé : mot → {document: poids}"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.postings = {}
+        self.vocabulary = []  # mots triés (recherche de préfixe par dichotomie)
+        self.vocabulary_dirty = False
+        self.documents = {}   # id → fiche
+        self.doc_terms = {}   # id → mots indexés (pour les mises à jour)
+        self.titles = {}      # id → titre normalisé
+        self.title_keys = []  # titres normalisés triés (bonus « commence par »)...
+        self.title_ids = []   # ... et leurs ids, dans le même ordre
+        self.titles_dirty = False
+        self.ids = {}         # url → id
+        self.next_id = 0
+        self.results = OrderedDict()  # (mots, limite) → [(id, score)]
+
+    def add_many(self, records):
+        """Ajoute ou remplace des fiches (clé : url)"""
+        with self.lock:
+            for record in records:
+                if record.get('url') and record.get('title'):
+                    self._add(record)
+            self.results.clear()
+
+    def _add(self, record):
+        doc_id = self.ids.get(record['url'])
+        if doc_id is None:
+            doc_id = self.next_id
+            self.next_id += 1
+            self.ids[record['url']] = doc_id
+        else:
+            self._remove_terms(doc_id)
+
+        weights = {}
+        for token in tokenize(record.get('description')):
+            if token not in STOPWORDS:
+                weights[token] = weights.get(token, 0) + DESCRIPTION_WEIGHT
+        for token in tokenize(record['title']):
+            weights[token] = weights.get(token, 0) + TITLE_WEIGHT
+
+        for token, weight in weights.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = {}
+                self.vocabulary_dirty = True
+            posting[doc_id] = weight
+
+        self.documents[doc_id] = dict(record)
+        self.doc_terms[doc_id] = tuple(weights)
+        self.titles[doc_id] = ' '.join(tokenize(record['title']))
+        self.titles_dirty = True
+
+    def _remove_terms(self, doc_id):
+        for token in self.doc_terms.get(doc_id, ()):
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[token]
+                    self.vocabulary_dirty = True
+
+    def _expand_prefix(self, prefix):
+        """Mots du vocabulaire qui prolongent `prefix`"""
+        if self.vocabulary_dirty:
+            # Trié à la demande : une seule fois après une série d'ajouts
+            self.vocabulary = sorted(self.postings)
+            self.vocabulary_dirty = False
+
+        # Mots en [a-z0-9] : « { » suit « z » et « 9 »
+        start = bisect_left(self.vocabulary, prefix)
+        end = bisect_left(self.vocabulary, prefix + '{', start)
+        return [term for term in self.vocabulary[start:end] if term != prefix]
+
+    def _prefix_scores(self, prefix):
+        """Score de chaque fiche pour un mot en cours de frappe"""
+        scores = {}
+        for term in self._expand_prefix(prefix):
+            partial = {doc_id: weight * PREFIX_FACTOR for doc_id, weight in self.postings[term].items()}
+            for doc_id in partial.keys() & scores.keys():
+                partial[doc_id] = max(partial[doc_id], scores[doc_id])
+            scores.update(partial)
+        exact = self.postings.get(prefix)
+        if exact:
+            merged = dict(exact)
+            for doc_id in exact.keys() & scores.keys():
+                merged[doc_id] = max(exact[doc_id], scores[doc_id])
+            scores.update(merged)
+        return scores
+
+    def _prefix_scores_within(self, prefix, candidates):
+        """Même score, restreint aux fiches `candidates` (intersection du plus petit côté)"""
+        scores = {}
+        terms = [(term, PREFIX_FACTOR) for term in self._expand_prefix(prefix)]
+        if prefix in self.postings:
+            terms.append((prefix, 1.0))
+        for term, factor in terms:
+            posting = self.postings[term]
+            if len(posting) < len(candidates):
+                common = posting.keys() & candidates.keys()
+            else:
+                common = candidates.keys() & posting.keys()
+            partial = {doc_id: posting[doc_id] * factor for doc_id in common}
+            for doc_id in partial.keys() & scores.keys():
+                partial[doc_id] = max(partial[doc_id], scores[doc_id])
+            scores.update(partial)
+        return scores
+
+    def _title_starts(self, phrase):
+        """Fiches dont le titre normalisé commence par `phrase` (dichotomie)"""
+        if self.titles_dirty:
+            ordered = sorted((title, doc_id) for doc_id, title in self.titles.items())
+            self.title_keys = [title for title, _ in ordered]
+            self.title_ids = [doc_id for _, doc_id in ordered]
+            self.titles_dirty = False
+        # Titres en [a-z0-9 ] : « { » suit tous ces caractères
+        start = bisect_left(self.title_keys, phrase)
+        end = bisect_left(self.title_keys, phrase + '{', start)
+        return self.title_ids[start:end]
+
+    def search(self, query, limit=30):
+        """Fiches contenant tous les mots de la requête, les plus pertinentes d'abord"""
+        folded = tokenize(query)
+        tokens = folded
+        meaningful = [t for t in tokens if t not in STOPWORDS]
+        if meaningful:
+            # Le dernier mot tapé reste un préfixe même s'il est vide de sens
+            if tokens[-1] != meaningful[-1]:
+                meaningful.append(tokens[-1])
+            tokens = meaningful
+        if not tokens:
+            return []
+
+        *words, last = tokens
+
+        with self.lock:
+            # Requête complète dans la clé : le bonus « commence par » en dépend
+            key = (tuple(folded), limit)
+            best = self.results.get(key)
+            if best is None:
+                best = self._search(words, last, ' '.join(folded), limit)
+                self.results[key] = best
+                if len(self.results) > RESULT_CACHE_SIZE:
+                    self.results.popitem(last=False)
+            else:
+                self.results.move_to_end(key)
+            return [dict(self.documents[doc_id], score=round(score, 2)) for doc_id, score in best]
+
+    def _search(self, words, last, phrase, limit):
+        """[(id, score)] des meilleures fiches (verrou tenu) ; `phrase` : requête normalisée, mots vides compris"""
+        if not words:
+            if len(last) >= MIN_PREFIX_LENGTH:
+                scores = self._prefix_scores(last)
+            else:
+                scores = dict(self.postings.get(last, {}))
+        else:
+            # Intersection des mots complets (plus petite liste d'abord)...
+            per_word = sorted((self.postings.get(w, {}) for w in words), key=len)
+            if len(per_word) == 1:
+                scores = dict(per_word[0])
+            else:
+                scores = {}
+                for doc_id, score in per_word[0].items():
+                    for other in per_word[1:]:
+                        extra = other.get(doc_id)
+                        if extra is None:
+                            break
+                        score += extra
+                    else:
+                        scores[doc_id] = score
+
+            # ... puis préfixe évalué uniquement sur les fiches restantes
+            extra = self._prefix_scores_within(last, scores)
+            scores = {d: scores[d] + weight for d, weight in extra.items()}
+
+        # Titres stockés avec leurs mots vides : comparés à la requête complète
+        for doc_id in scores.keys() & self._title_starts(phrase):
+            scores[doc_id] += TITLE_START_BONUS
+
+        # À score égal, l'ordre d'indexation (id croissant) est conservé
+        if len(scores) <= limit:
+            return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+        # Seuil du limit-ième score : les fiches au-dessus sont triées, les
+        # ex aequo au seuil (souvent nombreux) départagés par id seulement
+        threshold = heapq.nlargest(limit, scores.values())[-1]
+        above = [(d, score) for d, score in scores.items() if score > threshold]
+        above.sort(key=lambda item: (-item[1], item[0]))
+        ties = heapq.nsmallest(limit - len(above), [d for d, score in scores.items() if score == threshold])
+        return above + [(d, threshold) for d in ties]
+
+    def stats(self):
+        with self.lock:
+            return {
+                'documents': len(self.documents),
+                'terms': len(self.postings),
+            }
+
+# Instance globale
+catalogue_index = CatalogueIndex()
+
+
+def start_search_index(store, refresher):
+    """Charge l'index depuis la base puis suit les lots du crawler"""
+    refresher.listeners.append(catalogue_index.add_many)
+
+    def load():
+        catalogue_index.add_many(store.all())
+        print(f"[Search] 🔎 {catalogue_index.stats()['documents']} fiches indexées")
+
+    threading.Thread(target=load, daemon=True).start()
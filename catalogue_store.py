@@ -0,0 +1,391 @@
+"""
+catalogue_store.py
+Index local (SQLite) du catalogue d'animés
+- Rempli par un crawler en arrière-plan (my_scraper.crawl_catalogue)
+- Crawl complet de chaque liste jusqu'à ce qu'il aboutisse (marqueur en
+  base, reprise à la page d'arrêt), puis rafraîchissement incrémental :
+  arrêt dès qu'une page ne contient que des animés déjà connus
+- Un seul worker gunicorn crawle (bail en base) ; les autres relisent les
+  fiches modifiées pour leur index de recherche
+- Les endpoints de liste/recherche lisent l'index au lieu du site
+- Ordre « plus récemment découverts d'abord » : date du rafraîchissement
+  qui a découvert l'animé, puis sa position dans ce crawl (page 1 du site
+  = plus récents)
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from my_scraper import crawl_catalogue
+
+# ============ CONFIGURATION ============
+
+CATALOGUE_DB = os.environ.get(
+    'CATALOGUE_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalogue.db')
+)
+
+# Pages de départ du crawler
+CATALOGUE_URLS = [
+    url.strip() for url in os.environ.get(
+        'CATALOGUE_URLS',
+        'https://www.frenchanime.com/animes-vostfr/,'
+        'https://www.frenchanime.com/animes-vf/,'
+        'https://www.frenchanime.com/films-vf-vostfr/'
+    ).split(',') if url.strip()
+]
+
+# Intervalle entre deux rafraîchissements (secondes)
+REFRESH_INTERVAL = int(os.environ.get('CATALOGUE_REFRESH_INTERVAL', 3600))
+
+# Pages maximum par crawl complet (premier remplissage) / incrémental
+FULL_CRAWL_PAGES = int(os.environ.get('CATALOGUE_MAX_PAGES', 200))
+INCREMENTAL_PAGES = 20
+
+# CATALOGUE_REFRESH=0 désactive le crawler (index en lecture seule)
+REFRESH_ENABLED = os.environ.get('CATALOGUE_REFRESH', '1') != '0'
+
+# Bail du crawler : durée (renouvelé à chaque lot stocké) et fréquence à
+# laquelle chaque worker vérifie s'il doit crawler et relit les fiches
+# modifiées par le worker qui crawle
+LEASE_NAME = 'catalogue_crawler'
+LEASE_TTL = 300
+SYNC_INTERVAL = 60
+
+# Recouvrement de la relecture (écritures validées après la précédente)
+SYNC_MARGIN = 60
+
+FIELDS = ('url', 'title', 'season', 'version', 'year', 'type', 'thumbnail', 'description')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS animes (
+    url TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    season TEXT,
+    version TEXT,
+    year TEXT,
+    type TEXT,
+    thumbnail TEXT,
+    description TEXT,
+    first_seen REAL NOT NULL,
+    seen_rank INTEGER NOT NULL DEFAULT 0,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS animes_type ON animes (type);
+CREATE INDEX IF NOT EXISTS animes_last_seen ON animes (last_seen);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+# Bases créées avant la colonne seen_rank
+MIGRATION = """
+DROP INDEX IF EXISTS animes_first_seen;
+CREATE INDEX IF NOT EXISTS animes_position ON animes (first_seen DESC, seen_rank ASC);
+"""
+
+
+def log(message):
+    print(f"[Catalogue] {message}")
+
+
+class CatalogueStore:
+    """Accès à la base SQLite (une connexion par thread et par processus)"""
+
+    def __init__(self, path=CATALOGUE_DB):
+        self.path = path
+        self.local = threading.local()
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(animes)')}
+            if 'seen_rank' not in columns:
+                conn.execute('ALTER TABLE animes ADD COLUMN seen_rank INTEGER NOT NULL DEFAULT 0')
+            conn.executescript(MIGRATION)
+
+    def connection(self):
+        # Connexion propre au processus : gunicorn --preload forke après l'import
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def known_urls(self, urls):
+        """Sous-ensemble des URLs déjà présentes dans l'index"""
+        urls = [u for u in urls if u]
+        if not urls:
+            return set()
+        placeholders = ','.join('?' * len(urls))
+        rows = self.connection().execute(
+            f'SELECT url FROM animes WHERE url IN ({placeholders})', urls
+        ).fetchall()
+        return {row['url'] for row in rows}
+
+    def upsert_many(self, records, discovered_at=None, first_rank=0):
+        """
+        Insère ou met à jour des animés ; retourne le nombre de nouveaux.
+        Un nouvel animé prend la date `discovered_at` (un rafraîchissement)
+        et sa position first_rank + i dans le crawl ; un animé connu garde
+        les siennes.
+        """
+        now = time.time()
+        if discovered_at is None:
+            discovered_at = now
+        rows = [
+            tuple(r.get(f, '') or '' for f in FIELDS) + (discovered_at, first_rank + i, now)
+            for i, r in enumerate(records) if r.get('url') and r.get('title')
+        ]
+        if not rows:
+            return 0
+
+        conn = self.connection()
+        with conn:
+            before = conn.execute('SELECT COUNT(*) FROM animes').fetchone()[0]
+            conn.executemany(
+                f"""INSERT INTO animes ({', '.join(FIELDS)}, first_seen, seen_rank, last_seen)
+                    VALUES ({', '.join('?' * len(FIELDS))}, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        title=excluded.title, season=excluded.season, version=excluded.version,
+                        year=excluded.year, type=excluded.type, thumbnail=excluded.thumbnail,
+                        description=excluded.description, last_seen=excluded.last_seen""",
+                rows
+            )
+            after = conn.execute('SELECT COUNT(*) FROM animes').fetchone()[0]
+        return after - before
+
+    def list(self, offset=0, limit=30, anime_type=None, version=None):
+        """Animés les plus récemment découverts d'abord"""
+        clauses, params = [], []
+        if anime_type:
+            clauses.append('type = ?')
+            params.append(anime_type)
+        if version:
+            clauses.append('version = ?')
+            params.append(version)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        conn = self.connection()
+        total = conn.execute(f'SELECT COUNT(*) FROM animes {where}', params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {', '.join(FIELDS)} FROM animes {where} "
+            f"ORDER BY first_seen DESC, seen_rank ASC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        return total, [dict(row) for row in rows]
+
+    def all(self):
+        rows = self.connection().execute(f"SELECT {', '.join(FIELDS)} FROM animes").fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self):
+        return self.connection().execute('SELECT COUNT(*) FROM animes').fetchone()[0]
+
+    def updated_since(self, timestamp):
+        """Animés insérés ou mis à jour depuis `timestamp`"""
+        rows = self.connection().execute(
+            f"SELECT {', '.join(FIELDS)} FROM animes WHERE last_seen >= ?", (timestamp,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_meta(self, key, default=None):
+        row = self.connection().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else default
+
+    def set_meta(self, key, value):
+        with self.connection() as conn:
+            conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, str(value)))
+
+    def delete_meta(self, key):
+        with self.connection() as conn:
+            conn.execute('DELETE FROM meta WHERE key = ?', (key,))
+
+    def acquire_lease(self, name, owner, ttl):
+        """
+        Prend (ou renouvelle) le bail `name` pour `ttl` secondes ; True si
+        `owner` le détient. Un bail expiré (worker mort) peut être repris.
+        """
+        now = time.time()
+        with self.connection() as conn:
+            conn.execute(
+                """INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)
+                   ON CONFLICT(name) DO UPDATE SET owner=excluded.owner, expires_at=excluded.expires_at
+                   WHERE leases.owner = excluded.owner OR leases.expires_at <= ?""",
+                (name, owner, now + ttl, now)
+            )
+            row = conn.execute('SELECT owner FROM leases WHERE name = ?', (name,)).fetchone()
+        return row is not None and row['owner'] == owner
+
+    def release_lease(self, name, owner):
+        with self.connection() as conn:
+            conn.execute('DELETE FROM leases WHERE name = ? AND owner = ?', (name, owner))
+
+    def lease_owner(self, name):
+        row = self.connection().execute(
+            'SELECT owner FROM leases WHERE name = ? AND expires_at > ?', (name, time.time())
+        ).fetchone()
+        return row['owner'] if row else None
+
+
+class CatalogueRefresher:
+    """Crawler d'arrière-plan qui tient l'index à jour"""
+
+    def __init__(self, store, start_urls=None, interval=REFRESH_INTERVAL):
+        self.store = store
+        self.start_urls = list(CATALOGUE_URLS if start_urls is None else start_urls)
+        self.interval = interval
+        self.running = False
+        self.last_refresh = None
+        self.last_new = 0
+        self.listeners = []
+        self.thread = None
+        # L'index de recherche est chargé depuis la base au démarrage
+        self.synced_at = time.time()
+
+    @property
+    def owner(self):
+        # Lu dans le thread du crawler : pid du worker, pas du maître gunicorn
+        return f'pid:{os.getpid()}'
+
+    def refresh(self):
+        """
+        Parcourt chaque liste : crawl complet tant qu'il n'a pas abouti
+        (repris à la page d'arrêt), sinon arrêt à la première page qui ne
+        contient que des animés connus
+        """
+        new_total = 0
+        # Une date par rafraîchissement ; position continue d'une liste à l'autre
+        position = {'at': time.time(), 'rank': 0}
+
+        for start_url in self.start_urls:
+            if self.store.get_meta(f'full_crawl_done:{start_url}'):
+                new_total += self._crawl(start_url, INCREMENTAL_PAGES, self.store.known_urls, {}, position)
+            else:
+                new_total += self._full_crawl(start_url, position)
+
+        self.last_refresh = time.time()
+        self.last_new = new_total
+        self.store.set_meta('last_refresh', self.last_refresh)
+        log(f"🔄 {new_total} nouveaux animés ({self.store.count()} au total)")
+        return new_total
+
+    def _full_crawl(self, start_url, position):
+        """
+        Crawl complet depuis la page d'arrêt du précédent ; marqué terminé en
+        base s'il aboutit. Une reprise garde la date et la position du crawl
+        interrompu : ses pages suivent celles déjà stockées.
+        """
+        cursor_key = f'full_crawl_cursor:{start_url}'
+        position_key = f'full_crawl_position:{start_url}'
+        resume_url = self.store.get_meta(cursor_key) or start_url
+        saved = self.store.get_meta(position_key)
+        if resume_url != start_url:
+            log(f"↪️  Reprise du crawl complet à {resume_url}")
+            if saved:
+                at, rank = saved.split()
+                position = {'at': float(at), 'rank': int(rank)}
+
+        state = {}
+        try:
+            return self._crawl(resume_url, FULL_CRAWL_PAGES, None, state, position)
+        finally:
+            if state.get('resume', resume_url) is None:
+                self.store.set_meta(f'full_crawl_done:{start_url}', time.time())
+                self.store.delete_meta(cursor_key)
+                self.store.delete_meta(position_key)
+                log(f"✅ Crawl complet terminé: {start_url}")
+            else:
+                self.store.set_meta(cursor_key, state.get('resume', resume_url))
+                self.store.set_meta(position_key, f"{position['at']!r} {position['rank']}")
+
+    def _crawl(self, start_url, max_pages, known_urls, state, position):
+        new_total = 0
+        batch = []
+        for anime in crawl_catalogue(start_url, max_pages=max_pages, known_urls=known_urls, state=state):
+            batch.append(anime)
+            if len(batch) >= 100:
+                new_total += self._store_batch(batch, position)
+                batch = []
+        new_total += self._store_batch(batch, position)
+        return new_total
+
+    def _store_batch(self, batch, position):
+        if not batch:
+            return 0
+        # Bail perdu (crawl trop long, base bloquée) : un autre worker a pu reprendre
+        if not self.store.acquire_lease(LEASE_NAME, self.owner, LEASE_TTL):
+            raise RuntimeError('bail du crawler perdu')
+        new_count = self.store.upsert_many(batch, position['at'], position['rank'])
+        position['rank'] += len(batch)
+        for listener in self.listeners:
+            listener(batch)
+        return new_count
+
+    def _due(self):
+        """Dernier rafraîchissement (tous workers confondus) plus vieux que l'intervalle"""
+        last = float(self.store.get_meta('last_refresh', 0))
+        return time.time() - last >= self.interval
+
+    def sync(self):
+        """Transmet aux listeners les fiches écrites par le worker qui crawle"""
+        now = time.time()
+        records = self.store.updated_since(self.synced_at - SYNC_MARGIN)
+        self.synced_at = now
+        if records:
+            for listener in self.listeners:
+                listener(records)
+        return len(records)
+
+    def run(self):
+        while self.running:
+            try:
+                if self._due() and self.store.acquire_lease(LEASE_NAME, self.owner, LEASE_TTL):
+                    try:
+                        self.refresh()
+                    finally:
+                        self.store.release_lease(LEASE_NAME, self.owner)
+                        # Lots déjà transmis aux listeners pendant le crawl
+                        self.synced_at = time.time()
+                else:
+                    self.sync()
+            except Exception as e:
+                log(f"❌ Erreur rafraîchissement: {e}")
+            time.sleep(SYNC_INTERVAL)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stats(self):
+        return {
+            'entries': self.store.count(),
+            'last_refresh': self.last_refresh,
+            'last_new': self.last_new,
+            'refresh_interval': self.interval,
+            'running': self.running,
+            'crawler': self.store.lease_owner(LEASE_NAME),
+            'full_crawl_done': {
+                url: self.store.get_meta(f'full_crawl_done:{url}') is not None for url in self.start_urls
+            },
+        }
+
+# Instances globales
+catalogue_store = CatalogueStore()
+catalogue_refresher = CatalogueRefresher(catalogue_store)
+
+def start_background_refresh():
+    if REFRESH_ENABLED:
+        log("🚀 Démarrage du crawler de catalogue...")
+        catalogue_refresher.start()
@@ -0,0 +1,180 @@
+"""
+episode_prefetch.py
+Pré-résolution des liens d'épisodes après l'envoi d'une liste d'épisodes
+- Les premiers épisodes (ou ceux à partir du prochain à regarder) sont
+  extraits en arrière-plan dans extraction_cache : le clic sur « lecture »
+  devient un hit du cache
+- File à priorité bornée (épisode le plus proche d'abord) ; quand elle est
+  pleine, le job le moins prioritaire est abandonné
+- Jobs trop anciens (PREFETCH_MAX_AGE) abandonnés : l'utilisateur est
+  passé à autre chose
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from extraction_cache import extraction_cache, normalize_url
+
+# ============ CONFIGURATION ============
+
+# Activé par défaut sur /episodes (sinon seulement avec ?prefetch=1)
+PREFETCH_ENABLED = os.environ.get('EPISODE_PREFETCH', '0') == '1'
+
+# Épisodes pré-résolus par liste servie, et lecteurs par épisode
+PREFETCH_EPISODES = int(os.environ.get('PREFETCH_EPISODES', 3))
+PREFETCH_PLAYERS = int(os.environ.get('PREFETCH_PLAYERS', 1))
+
+# Taille de la file et extractions simultanées
+PREFETCH_QUEUE_SIZE = 200
+PREFETCH_WORKERS = 4
+
+# Âge maximal d'un job en attente (secondes)
+PREFETCH_MAX_AGE = 60
+
+
+def select_episode_urls(episodes, start=None, count=PREFETCH_EPISODES, players=PREFETCH_PLAYERS):
+    """
+    URLs à pré-résoudre, par priorité : `count` épisodes à partir du numéro
+    `start` (le premier sinon), `players` lecteurs par épisode.
+    Retourne [(priorité, url)].
+    """
+    by_episode = {}
+    for episode in episodes:
+        urls = by_episode.setdefault(str(episode.get('episode')), [])
+        if len(urls) < players and episode.get('url'):
+            urls.append(episode['url'])
+
+    numbers = list(by_episode)
+    if start is not None and str(start) in by_episode:
+        numbers = numbers[numbers.index(str(start)):]
+
+    selected = []
+    for rank, number in enumerate(numbers[:count]):
+        for player, url in enumerate(by_episode[number]):
+            selected.append((rank * players + player, url))
+    return selected
+
+
+class EpisodePrefetcher:
+    def __init__(self, max_queue=PREFETCH_QUEUE_SIZE, workers=PREFETCH_WORKERS, max_age=PREFETCH_MAX_AGE):
+        self.max_queue = max_queue
+        self.workers = workers
+        self.max_age = max_age
+        self.resolve = None
+        self.heap = []  # (priorité, ordre, clé, url, date)
+        self.pending = set()
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.threads = []
+
+        self.enqueued = 0
+        self.skipped_cached = 0
+        self.duplicates = 0
+        self.dropped_full = 0
+        self.dropped_stale = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def start(self, resolve):
+        """Démarre les workers ; resolve(url) doit mettre le résultat dans extraction_cache"""
+        with self.condition:
+            self.resolve = resolve
+            if self.threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'prefetch-{i}', daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def submit(self, jobs):
+        """Ajoute des [(priorité, url)] ; retourne le nombre de jobs mis en file"""
+        added = 0
+        now = time.time()
+        # Lectures du cache (SQLite) hors verrou : les workers ne les attendent pas.
+        # Couche kodi seulement : celle que lit /extract (Flask)
+        checked = [(priority, url, normalize_url(url), extraction_cache.contains(url))
+                   for priority, url in jobs]
+        with self.condition:
+            for priority, url, key, cached in checked:
+                if key in self.pending:
+                    self.duplicates += 1
+                    continue
+                if cached:
+                    self.skipped_cached += 1
+                    continue
+                if len(self.heap) >= self.max_queue and not self._drop_lowest(priority):
+                    self.dropped_full += 1
+                    continue
+
+                heapq.heappush(self.heap, (priority, next(self.sequence), key, url, now))
+                self.pending.add(key)
+                self.enqueued += 1
+                added += 1
+
+            if added:
+                self.condition.notify(added)
+        return added
+
+    def _drop_lowest(self, priority):
+        """Libère une place en retirant le job le moins prioritaire (s'il l'est moins que `priority`)"""
+        lowest = max(range(len(self.heap)), key=lambda i: self.heap[i][:2])
+        if self.heap[lowest][0] <= priority:
+            return False
+        job = self.heap[lowest]
+        self.heap[lowest] = self.heap[-1]
+        self.heap.pop()
+        heapq.heapify(self.heap)
+        self.pending.discard(job[2])
+        self.dropped_full += 1
+        return True
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.heap:
+                    self.condition.wait()
+                _, _, key, url, queued_at = heapq.heappop(self.heap)
+                resolve = self.resolve
+
+            try:
+                if time.time() - queued_at > self.max_age:
+                    with self.condition:
+                        self.dropped_stale += 1
+                    continue
+                if extraction_cache.contains(url):
+                    with self.condition:
+                        self.skipped_cached += 1
+                    continue
+
+                result = resolve(url)
+                with self.condition:
+                    if result.get('success'):
+                        self.succeeded += 1
+                    else:
+                        self.failed += 1
+            except Exception as e:
+                with self.condition:
+                    self.failed += 1
+                print(f"[Prefetch] ⚠️  {url[:80]}: {e}")
+            finally:
+                with self.condition:
+                    self.pending.discard(key)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'running': bool(self.threads),
+                'queued': len(self.heap),
+                'enqueued': self.enqueued,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'skipped_cached': self.skipped_cached,
+                'duplicates': self.duplicates,
+                'dropped_full': self.dropped_full,
+                'dropped_stale': self.dropped_stale,
+            }
+
+# Instance globale
+episode_prefetcher = EpisodePrefetcher()
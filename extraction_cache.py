@@ -0,0 +1,245 @@
+"""
+extraction_cache.py
+Cache TTL + LRU des résultats d'extraction (URL vidéo + headers)
+Évite de re-solliciter l'hébergeur pour un même lien embed
+Second niveau partagé entre les workers (shared_cache)
+Entrées séparées par couche (kodi / native)
+"""
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+from shared_cache import shared_cache
+
+# ============ CONFIGURATION ============
+
+# Nombre maximal d'entrées gardées en mémoire
+CACHE_MAX_ENTRIES = 2000
+
+# Durée de vie par défaut (secondes)
+DEFAULT_TTL = 300
+
+# Durée de vie par hébergeur (les liens signés expirent plus ou moins vite)
+HOSTER_TTL = {
+    'vidmoly': 600,
+    'voe': 300,
+    'streamtape': 300,
+    'dood': 120,
+    'mixdrop': 300,
+    'filelions': 300,
+    'netu': 120,
+    'streamlare': 300,
+    'direct': 3600,
+}
+
+# Espace de noms dans le cache partagé
+SHARED_NAMESPACE = 'extraction'
+
+# Couche ayant produit le résultat : les résultats natifs ne sont jamais
+# servis aux chemins « Kodi uniquement » (/extract/kodi, /extract/batch)
+KODI_LAYER = 'kodi'
+NATIVE_LAYER = 'native'
+LAYERS = (KODI_LAYER, NATIVE_LAYER)
+
+# Marge de sécurité avant l'expiration d'un lien signé
+EXPIRY_MARGIN = 30
+
+# Paramètres de query contenant un timestamp d'expiration
+EXPIRY_PARAMS = ('expires', 'expire', 'expiry', 'exp', 'e')
+
+# Alias de domaines (comme KodiVidmolyExtractor: vidmoly.to → vidmoly.net)
+DOMAIN_ALIASES = {
+    'vidmoly.to': 'vidmoly.net',
+}
+
+# ============ NORMALISATION ============
+
+def normalize_url(url):
+    """
+    Normalise une URL d'hébergeur pour servir de clé de cache
+    (schéma/domaine en minuscules, sans www ni fragment, query triée)
+    """
+    try:
+        parsed = urlparse(url.strip())
+        netloc = parsed.netloc.lower()
+        if netloc.startswith('www.'):
+            netloc = netloc[4:]
+        netloc = DOMAIN_ALIASES.get(netloc, netloc)
+        query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+        return urlunparse(((parsed.scheme or 'https').lower(), netloc, parsed.path, '', query, ''))
+    except Exception:
+        return url.strip()
+
+def hoster_from_result(result):
+    """Nom de l'hébergeur depuis le champ 'extractor' (ex: kodi_vidmoly → vidmoly)"""
+    name = result.get('extractor') or ''
+    if name.startswith('kodi_'):
+        name = name[5:]
+    return name
+
+def _signed_link_ttl(video_url, now):
+    """Durée restante avant expiration d'un lien signé, ou None"""
+    try:
+        params = parse_qsl(urlparse(video_url).query)
+    except Exception:
+        return None
+
+    for key, value in params:
+        if key.lower() in EXPIRY_PARAMS and value.isdigit():
+            expires_at = int(value)
+            # Ignorer les valeurs qui ne ressemblent pas à un timestamp
+            if expires_at > now:
+                return expires_at - now - EXPIRY_MARGIN
+    return None
+
+# ============ CACHE ============
+
+class ExtractionCache:
+    """Cache borné (LRU) avec expiration par entrée"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, default_ttl=DEFAULT_TTL, hoster_ttl=None, shared=shared_cache):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.hoster_ttl = dict(HOSTER_TTL if hoster_ttl is None else hoster_ttl)
+        self.shared = shared
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def ttl_for(self, result):
+        """Calcule la durée de vie d'un résultat (TTL hébergeur borné par l'expiration du lien)"""
+        ttl = self.hoster_ttl.get(hoster_from_result(result), self.default_ttl)
+        signed_ttl = _signed_link_ttl(result.get('url') or '', int(time.time()))
+        if signed_ttl is not None:
+            ttl = min(ttl, signed_ttl)
+        return ttl
+
+    def get(self, url, layers=(KODI_LAYER,)):
+        """
+        Retourne une copie du résultat en cache (mémoire puis partagé), ou None.
+        layers : couches acceptées, dans l'ordre (kodi seule par défaut)
+        """
+        normalized = normalize_url(url)
+        now = time.time()
+
+        with self.lock:
+            for layer in layers:
+                key = (layer, normalized)
+                entry = self.entries.get(key)
+                if entry is not None and entry[0] <= now:
+                    del self.entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is not None:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(entry[1])
+
+        # Extrait par un autre worker ?
+        for layer in layers:
+            key = (layer, normalized)
+            entry = self._shared_get(key, now)
+            if entry is not None:
+                with self.lock:
+                    self.hits += 1
+                    self.shared_hits += 1
+                    self._put(key, *entry)
+                return copy.deepcopy(entry[1])
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def contains(self, url, layers=(KODI_LAYER,)):
+        """True si une entrée valide existe (sans compter de hit ni de miss)"""
+        normalized = normalize_url(url)
+        now = time.time()
+        with self.lock:
+            for layer in layers:
+                entry = self.entries.get((layer, normalized))
+                if entry is not None and entry[0] > now:
+                    return True
+        return any(self._shared_get((layer, normalized), now) is not None for layer in layers)
+
+    def _shared_get(self, key, now):
+        """(expiration, résultat) depuis le cache partagé, ou None"""
+        if self.shared is None:
+            return None
+        data = self.shared.get(SHARED_NAMESPACE, '%s:%s' % key)
+        if data is None:
+            return None
+        try:
+            entry = json.loads(data)
+        except ValueError:
+            return None
+        if entry['expires_at'] <= now:
+            return None
+        return entry['expires_at'], entry['result']
+
+    def _put(self, key, expires_at, result):
+        self.entries[key] = (expires_at, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def set(self, url, result, layer=KODI_LAYER):
+        """Met en cache un résultat d'extraction réussi (dans sa couche)"""
+        if not result or not result.get('success'):
+            return False
+
+        ttl = self.ttl_for(result)
+        if ttl <= 0:
+            return False
+
+        key = (layer, normalize_url(url))
+        expires_at = time.time() + ttl
+        with self.lock:
+            self._put(key, expires_at, copy.deepcopy(result))
+
+        # Partagé avec les autres workers (même expiration)
+        if self.shared is not None:
+            data = json.dumps({'expires_at': expires_at, 'result': result}, default=str)
+            self.shared.set(SHARED_NAMESPACE, '%s:%s' % key, data.encode('utf-8'), ttl)
+        return True
+
+    def invalidate(self, url):
+        """Supprime l'URL de toutes les couches"""
+        normalized = normalize_url(url)
+        removed = False
+        for layer in LAYERS:
+            key = (layer, normalized)
+            if self.shared is not None:
+                self.shared.delete(SHARED_NAMESPACE, '%s:%s' % key)
+            with self.lock:
+                removed = self.entries.pop(key, None) is not None or removed
+        return removed
+
+    def clear(self):
+        """Vide le niveau mémoire de ce worker (le cache partagé expire de lui-même)"""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+# Instance globale
+extraction_cache = ExtractionCache()
@@ -2,12 +2,33 @@
 import requests
 import re
 import json
+import threading
+import time
 from urllib.parse import urlparse, urljoin
 from abc import ABC, abstractmethod
 
+import http_client
+from extraction_cache import normalize_url
+from metrics import record_extraction
+from tracing import span
+from singleflight import SingleFlight
+
+# Patterns Vidmoly compilés une fois (pattern exact de Kodi vidmoly.py, puis repli)
+VIDMOLY_KODI_RE = re.compile(r'sources: *\[{file:"([^"]+)', re.IGNORECASE)
+VIDMOLY_FALLBACK_RES = [
+    re.compile(r'file\s*:\s*["\'](https?://[^"\']+)["\']', re.IGNORECASE),
+    re.compile(r'src\s*:\s*["\'](https?://[^"\']+)["\']', re.IGNORECASE),
+    re.compile(r'"file"\s*:\s*"([^"]+)"', re.IGNORECASE),
+    re.compile(r'sources\s*:\s*\[\s*{\s*["\']?file["\']?\s*:\s*["\']([^"\']+)["\']', re.IGNORECASE),
+]
+
 class BaseExtractor(ABC):
     """Classe de base pour tous les extracteurs"""
     
+    # Règles de routage utilisées par ExtractorRegistry
+    domains = ()    # domaines exacts (ex: 'vidmoly.net')
+    patterns = ()   # regex de repli appliquées à l'URL complète
+    
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:139.0) Gecko/20100101 Firefox/139.0',
@@ -26,125 +47,36 @@ class BaseExtractor(ABC):
 class KodiVidmolyExtractor(BaseExtractor):
     """Extracteur Vidmoly EXACTEMENT comme Kodi"""
     
+    domains = ('vidmoly.net', 'vidmoly.to', 'vidmoly.me')
+    patterns = (r'vidmoly', r'/embed-')
+    
     def can_extract(self, url):
         url_lower = url.lower()
         return any(x in url_lower for x in ['vidmoly', 'vidmoly.to', 'vidmoly.net', '/embed-'])
     
+    def normalize(self, url):
+        """Normalisation EXACTE comme Kodi"""
+        return url.replace('vidmoly.to', 'vidmoly.net')
+    
+    def request_headers(self, url):
+        """Headers EXACTES comme Kodi cRequestHandler"""
+        return http_client.build_headers('embed', {'Referer': url})
+    
     def extract(self, url):
         try:
             # ÉTAPE 1: Normalisation EXACTE comme Kodi
-            url = url.replace('vidmoly.to', 'vidmoly.net')
+            url = self.normalize(url)
             print(f"[KodiVidmoly] Extraction de: {url}")
             
             # ÉTAPE 2: Headers EXACTES comme Kodi cRequestHandler
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:139.0) Gecko/20100101 Firefox/139.0',
-                'Referer': url,
-                'Sec-Fetch-Dest': 'iframe',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'fr,fr-FR;q=0.8,en-US;q=0.5,en;q=0.3',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1'
-            }
+            headers = self.request_headers(url)
             
-            # ÉTAPE 3: Requête avec timeout comme Kodi
-            response = requests.get(url, headers=headers, timeout=15, allow_redirects=True)
+            # ÉTAPE 3: Requête avec timeout comme Kodi (session partagée keep-alive)
+            response = http_client.get(url, profile='embed', headers=headers, timeout=15, allow_redirects=True)
             response.raise_for_status()
-            html = response.text
-            
-            # ÉTAPE 4: Pattern EXACT de Kodi vidmoly.py
-            # Pattern: sources: *[{file:"URL"
-            sPattern = r'sources: *\[{file:"([^"]+)'
-            match = re.search(sPattern, html, re.IGNORECASE)
-            
-            if match:
-                api_call = match.group(1).strip()
-                print(f"[KodiVidmoly] Pattern Kodi trouvé: {api_call[:100]}...")
-                
-                # ÉTAPE 5: Nettoyage COMME Kodi (parfois commenté, parfois activé)
-                # Dans Kodi: #api_call = api_call.replace(',', '').replace('.urlset', '')
-                # On active le nettoyage car ça semble nécessaire
-                api_call = api_call.replace(',', '').replace('.urlset', '')
-                api_call = api_call.replace('\\/', '/')  # Décoder les slashes
-                
-                # ÉTAPE 6: Ajout du Referer EXACTEMENT comme Kodi
-                # Kodi fait: api_call + '|Referer=' + util.urlHostName(self._url)
-                # util.urlHostName() retourne juste le hostname
-                parsed_url = urlparse(url)
-                hostname = parsed_url.hostname
-                kodi_full_url = api_call + '|Referer=' + hostname
-                
-                print(f"[KodiVidmoly] URL Kodi complète: {kodi_full_url[:150]}...")
-                
-                # ÉTAPE 7: Retourner COMME Kodi mais adapté pour le web
-                # Pour le web, on sépare l'URL du Referer
-                video_url = api_call  # URL pure pour la lecture
-                referer = f"https://{hostname}"
-                
-                return {
-                    'success': True,
-                    'url': video_url,  # Pour le lecteur web
-                    'kodi_url': kodi_full_url,  # Format exact Kodi
-                    'method': 'kodi_exact_pattern',
-                    'extractor': 'kodi_vidmoly',
-                    'headers': {
-                        'Referer': referer,
-                        'User-Agent': headers['User-Agent'],
-                        'Origin': referer
-                    },
-                    'kodi_compatible': True,
-                    'note': 'Extraction identique à Kodi vidmoly.py'
-                }
-            
-            # ÉTAPE 8: Fallback si pattern Kodi non trouvé
-            print(f"[KodiVidmoly] Pattern Kodi non trouvé, recherche alternatives...")
-            
-            # Méthodes alternatives (comme Kodi pourrait faire)
-            fallback_patterns = [
-                r'file\s*:\s*["\'](https?://[^"\']+)["\']',
-                r'src\s*:\s*["\'](https?://[^"\']+)["\']',
-                r'"file"\s*:\s*"([^"]+)"',
-                r'sources\s*:\s*\[\s*{\s*["\']?file["\']?\s*:\s*["\']([^"\']+)["\']',
-            ]
-            
-            for i, pattern in enumerate(fallback_patterns):
-                match = re.search(pattern, html, re.IGNORECASE)
-                if match:
-                    video_url = match.group(1).strip()
-                    print(f"[KodiVidmoly] Fallback {i} trouvé: {video_url[:100]}...")
-                    
-                    # Appliquer le même nettoyage
-                    video_url = video_url.replace(',', '').replace('.urlset', '').replace('\\/', '/')
-                    
-                    parsed_url = urlparse(url)
-                    hostname = parsed_url.hostname
-                    
-                    return {
-                        'success': True,
-                        'url': video_url,
-                        'method': f'kodi_fallback_{i}',
-                        'extractor': 'kodi_vidmoly',
-                        'headers': {
-                            'Referer': f"https://{hostname}",
-                            'User-Agent': headers['User-Agent']
-                        }
-                    }
-            
-            # ÉTAPE 9: Aucun pattern trouvé
-            print(f"[KodiVidmoly] Aucun pattern vidéo trouvé")
-            
-            return {
-                'success': False,
-                'error': 'Aucun pattern vidéo trouvé (identique à Kodi)',
-                'extractor': 'kodi_vidmoly',
-                'debug': {
-                    'url': url,
-                    'html_preview': html[:500],
-                    'patterns_tried': ['kodi_exact'] + [f'fallback_{i}' for i in range(len(fallback_patterns))]
-                }
-            }
             
+            with span('parse', extractor='kodi_vidmoly'):
+                return self.parse(url, response.text, headers)
         except requests.RequestException as e:
             print(f"[KodiVidmoly] Erreur réseau: {e}")
             return {
@@ -159,6 +91,94 @@ class KodiVidmolyExtractor(BaseExtractor):
                 'error': f'Erreur: {str(e)}',
                 'extractor': 'kodi_vidmoly'
             }
+    
+    def parse(self, url, html, headers):
+        """Recherche du lien vidéo dans la page embed (sans I/O, partagé avec la version async)"""
+        # ÉTAPE 4: Pattern EXACT de Kodi vidmoly.py
+        # Pattern: sources: *[{file:"URL"
+        with span('pattern_match', pattern='kodi_exact'):
+            match = VIDMOLY_KODI_RE.search(html)
+        
+        if match:
+            api_call = match.group(1).strip()
+            print(f"[KodiVidmoly] Pattern Kodi trouvé: {api_call[:100]}...")
+            
+            # ÉTAPE 5: Nettoyage COMME Kodi (parfois commenté, parfois activé)
+            # Dans Kodi: #api_call = api_call.replace(',', '').replace('.urlset', '')
+            # On active le nettoyage car ça semble nécessaire
+            api_call = api_call.replace(',', '').replace('.urlset', '')
+            api_call = api_call.replace('\\/', '/')  # Décoder les slashes
+            
+            # ÉTAPE 6: Ajout du Referer EXACTEMENT comme Kodi
+            # Kodi fait: api_call + '|Referer=' + util.urlHostName(self._url)
+            # util.urlHostName() retourne juste le hostname
+            parsed_url = urlparse(url)
+            hostname = parsed_url.hostname
+            kodi_full_url = api_call + '|Referer=' + hostname
+            
+            print(f"[KodiVidmoly] URL Kodi complète: {kodi_full_url[:150]}...")
+            
+            # ÉTAPE 7: Retourner COMME Kodi mais adapté pour le web
+            # Pour le web, on sépare l'URL du Referer
+            video_url = api_call  # URL pure pour la lecture
+            referer = f"https://{hostname}"
+            
+            return {
+                'success': True,
+                'url': video_url,  # Pour le lecteur web
+                'kodi_url': kodi_full_url,  # Format exact Kodi
+                'method': 'kodi_exact_pattern',
+                'extractor': 'kodi_vidmoly',
+                'headers': {
+                    'Referer': referer,
+                    'User-Agent': headers['User-Agent'],
+                    'Origin': referer
+                },
+                'kodi_compatible': True,
+                'note': 'Extraction identique à Kodi vidmoly.py'
+            }
+        
+        # ÉTAPE 8: Fallback si pattern Kodi non trouvé
+        print(f"[KodiVidmoly] Pattern Kodi non trouvé, recherche alternatives...")
+        
+        # Méthodes alternatives (comme Kodi pourrait faire)
+        for i, pattern in enumerate(VIDMOLY_FALLBACK_RES):
+            with span('pattern_match', pattern=f'fallback_{i}'):
+                match = pattern.search(html)
+            if match:
+                video_url = match.group(1).strip()
+                print(f"[KodiVidmoly] Fallback {i} trouvé: {video_url[:100]}...")
+                
+                # Appliquer le même nettoyage
+                video_url = video_url.replace(',', '').replace('.urlset', '').replace('\\/', '/')
+                
+                parsed_url = urlparse(url)
+                hostname = parsed_url.hostname
+                
+                return {
+                    'success': True,
+                    'url': video_url,
+                    'method': f'kodi_fallback_{i}',
+                    'extractor': 'kodi_vidmoly',
+                    'headers': {
+                        'Referer': f"https://{hostname}",
+                        'User-Agent': headers['User-Agent']
+                    }
+                }
+        
+        # ÉTAPE 9: Aucun pattern trouvé
+        print(f"[KodiVidmoly] Aucun pattern vidéo trouvé")
+        
+        return {
+            'success': False,
+            'error': 'Aucun pattern vidéo trouvé (identique à Kodi)',
+            'extractor': 'kodi_vidmoly',
+            'debug': {
+                'url': url,
+                'html_preview': html[:500],
+                'patterns_tried': ['kodi_exact'] + [f'fallback_{i}' for i in range(len(VIDMOLY_FALLBACK_RES))]
+            }
+        }
 
 class DirectExtractor(BaseExtractor):
     """Pour liens directs (fallback)"""
@@ -184,26 +204,94 @@ class DirectExtractor(BaseExtractor):
             'extractor': 'direct'
         }
 
+class ExtractorRegistry:
+    """
+    Registre des extracteurs, construit une seule fois.
+    Routage : domaine exact (hash, puis domaines parents), sinon une seule
+    regex compilée (alternance de tous les patterns), sinon le fallback.
+    """
+    
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self.domains = {}
+        self.patterns = []
+        self.lock = threading.Lock()
+        self._index = ({}, None, [])
+    
+    def register(self, extractor, domains=None, patterns=None):
+        """Ajoute un extracteur (les plugins peuvent s'enregistrer ici)"""
+        with self.lock:
+            for domain in (extractor.domains if domains is None else domains):
+                self.domains[domain.lower()] = extractor
+            for pattern in (extractor.patterns if patterns is None else patterns):
+                self.patterns.append((pattern, extractor))
+            self._rebuild()
+        return extractor
+    
+    def _rebuild(self):
+        compiled = None
+        if self.patterns:
+            alternation = '|'.join(f'(?P<p{i}>{pattern})' for i, (pattern, _) in enumerate(self.patterns))
+            compiled = re.compile(alternation, re.IGNORECASE)
+        # Remplacement atomique : les lectures se font sans verrou
+        self._index = (dict(self.domains), compiled, list(self.patterns))
+    
+    def route(self, url):
+        """Retourne (extracteur, règle utilisée)"""
+        with span('routing'):
+            return self._route(url)
+    
+    def _route(self, url):
+        domains, compiled, patterns = self._index
+        
+        host = (urlparse(url).hostname or '').lower()
+        while host:
+            extractor = domains.get(host)
+            if extractor is not None:
+                return extractor, f'domain:{host}'
+            _, _, host = host.partition('.')
+        
+        if compiled is not None:
+            match = compiled.search(url)
+            if match:
+                pattern, extractor = patterns[int(match.lastgroup[1:])]
+                return extractor, f'pattern:{pattern}'
+        
+        return self.fallback, 'fallback'
+    
+    def get_extractor(self, url):
+        extractor, rule = self.route(url)
+        print(f"[Registry] Sélection: {extractor.__class__.__name__} ({rule})")
+        return extractor
+    
+    def extract(self, url):
+        started = time.perf_counter()
+        result = self.get_extractor(url).extract(url)
+        record_extraction('native', result, time.perf_counter() - started)
+        return result
+
+# Registre global (fallback: liens directs)
+extractor_registry = ExtractorRegistry(fallback=DirectExtractor())
+extractor_registry.register(KodiVidmolyExtractor())
+
+def register_extractor(extractor, domains=None, patterns=None):
+    """Enregistre un extracteur supplémentaire dans le registre global"""
+    return extractor_registry.register(extractor, domains, patterns)
+
 class ExtractorFactory:
-    """Factory de gestion des extracteurs"""
+    """Factory de gestion des extracteurs (délègue au registre global)"""
     
-    def __init__(self):
-        self.extractors = [
-            KodiVidmolyExtractor(),  # Premier: Kodi exact
-            DirectExtractor()         # Dernier: fallback
-        ]
-        print(f"[Factory] {len(self.extractors)} extracteurs chargés")
+    def __init__(self, registry=None):
+        self.registry = registry or extractor_registry
     
     def get_extractor(self, url):
-        for extractor in self.extractors:
-            if extractor.can_extract(url):
-                print(f"[Factory] Sélection: {extractor.__class__.__name__}")
-                return extractor
-        return DirectExtractor()
+        return self.registry.get_extractor(url)
     
     def extract(self, url):
-        extractor = self.get_extractor(url)
-        return extractor.extract(url)
+        return self.registry.extract(url)
+
+# Regroupe les extractions concurrentes d'une même URL
+extraction_flight = SingleFlight()
 
 # Fonction principale pour l'API
 def extract_video_url(url):
@@ -212,8 +300,7 @@ def extract_video_url(url):
     print(f"URL: {url}")
     print(f"{'='*60}")
     
-    factory = ExtractorFactory()
-    result = factory.extract(url)
+    result = extraction_flight.do(normalize_url(url), extractor_registry.extract, url)
     
     print(f"{'='*60}")
     if result.get('success'):
@@ -0,0 +1,127 @@
+"""
+genre_cache.py
+Liste des genres gardée en mémoire (elle ne change presque jamais)
+- Premier appel : téléchargement bloquant (une seule fois, verrouillé)
+- Ensuite : réponse immédiate depuis la mémoire
+- Rafraîchissement périodique en arrière-plan ; un échec garde la
+  dernière liste valide
+- Copie partagée dans la base du catalogue : un seul worker gunicorn
+  (bail en base) télécharge la liste, les autres relisent sa copie
+"""
+import json
+import os
+import threading
+import time
+
+from catalogue_store import catalogue_store
+from my_scraper import get_genres_from_page
+
+# ============ CONFIGURATION ============
+
+GENRES_URL = os.environ.get('GENRES_URL', 'https://www.frenchanime.com')
+
+# Intervalle de rafraîchissement (secondes)
+GENRES_REFRESH_INTERVAL = int(os.environ.get('GENRES_REFRESH_INTERVAL', 6 * 3600))
+
+# Bail du téléchargement et fréquence de relecture de la copie partagée
+GENRES_LEASE = 'genres'
+GENRES_LEASE_TTL = 300
+GENRES_CHECK_INTERVAL = 60
+
+
+class GenreCache:
+    def __init__(self, url=GENRES_URL, interval=GENRES_REFRESH_INTERVAL, fetch=get_genres_from_page, store=None):
+        self.url = url
+        self.interval = interval
+        self.fetch = fetch
+        self.store = store
+        self.result = None
+        self.updated = None
+        self.last_error = None
+        self.lock = threading.Lock()
+        self.running = False
+
+    def refresh(self):
+        """Télécharge la liste ; retourne True si elle a été remplacée"""
+        with self.lock:
+            return self._refresh()
+
+    def _refresh(self):
+        result = self.fetch(self.url)
+        if not result.get('success'):
+            self.last_error = result.get('error')
+            print(f"[Genres] ⚠️  Rafraîchissement échoué: {self.last_error}")
+            return False
+        self.result = result
+        self.updated = time.time()
+        self.last_error = None
+        if self.store is not None:
+            self.store.set_meta(f'genres:{self.url}', json.dumps({'updated': self.updated, 'result': result}))
+        return True
+
+    def _load_shared(self):
+        """Reprend la copie d'un autre worker si plus récente ; True si la liste est à jour"""
+        if self.store is None:
+            return False
+        data = self.store.get_meta(f'genres:{self.url}')
+        if data is not None:
+            shared = json.loads(data)
+            if self.updated is None or shared['updated'] > self.updated:
+                self.result = shared['result']
+                self.updated = shared['updated']
+        return self.updated is not None and time.time() - self.updated < self.interval
+
+    def get(self):
+        """Genres depuis la mémoire (copie partagée ou téléchargés au premier appel)"""
+        if self.result is None:
+            with self.lock:
+                # Un seul téléchargement si plusieurs requêtes arrivent avant le premier
+                if self.result is None and not self._load_shared():
+                    self._refresh()
+
+        if self.result is None:
+            return {'success': False, 'error': self.last_error or 'Genres indisponibles', 'genres': []}
+
+        return dict(self.result, cached=True, age=round(time.time() - self.updated, 1))
+
+    def stats(self):
+        return {
+            'genres': len(self.result['genres']) if self.result else 0,
+            'updated': self.updated,
+            'last_error': self.last_error,
+            'refresh_interval': self.interval,
+        }
+
+    def run(self):
+        if self.store is None:
+            while self.running:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"[Genres] ❌ Erreur: {e}")
+                time.sleep(self.interval)
+            return
+
+        owner = f'pid:{os.getpid()}'
+        while self.running:
+            try:
+                with self.lock:
+                    fresh = self._load_shared()
+                # Copie trop vieille : un seul worker la télécharge
+                if not fresh and self.store.acquire_lease(GENRES_LEASE, owner, GENRES_LEASE_TTL):
+                    try:
+                        self.refresh()
+                    finally:
+                        self.store.release_lease(GENRES_LEASE, owner)
+            except Exception as e:
+                print(f"[Genres] ❌ Erreur: {e}")
+            time.sleep(GENRES_CHECK_INTERVAL)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        threading.Thread(target=self.run, daemon=True).start()
+
+# Instance globale
+genre_cache = GenreCache(store=catalogue_store)
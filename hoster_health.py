@@ -0,0 +1,153 @@
+"""
+hoster_health.py
+Santé des hébergeurs pour KodiExtractorSystem
+- Disjoncteur par hébergeur : ouvert après FAILURE_THRESHOLD échecs
+  consécutifs, refus immédiat pendant OPEN_DURATION, puis une requête
+  d'essai (demi-ouvert) qui le referme ou le rouvre
+- Timeout adaptatif : percentile des latences observées × marge,
+  borné entre MIN_TIMEOUT et MAX_TIMEOUT
+"""
+import threading
+import time
+from collections import deque
+
+# ============ CONFIGURATION ============
+
+# Échecs consécutifs avant ouverture du disjoncteur
+FAILURE_THRESHOLD = 5
+
+# Durée d'ouverture avant une requête d'essai (secondes)
+OPEN_DURATION = 30
+
+# Latences gardées par hébergeur et minimum avant d'adapter le timeout
+LATENCY_WINDOW = 100
+MIN_SAMPLES = 10
+
+# Timeout = percentile × marge, borné
+TIMEOUT_PERCENTILE = 0.95
+TIMEOUT_MARGIN = 2.0
+MIN_TIMEOUT = 3.0
+MAX_TIMEOUT = 15.0
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def percentile(values, fraction):
+    """Percentile (rang le plus proche) d'une liste non vide"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+class HosterHealth:
+    """Disjoncteur + historique de latence d'un hébergeur"""
+
+    def __init__(self, name):
+        self.name = name
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """True si une requête peut partir maintenant"""
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+
+            if self.state == OPEN and time.time() - self.opened_at >= OPEN_DURATION:
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+
+            self.rejected += 1
+            return False
+
+    def retry_after(self):
+        """Secondes avant la prochaine requête d'essai"""
+        with self.lock:
+            if self.state != OPEN:
+                return 0
+            return max(0, round(OPEN_DURATION - (time.time() - self.opened_at), 1))
+
+    def timeout(self):
+        """Timeout adaptatif (MAX_TIMEOUT tant que l'historique est trop court)"""
+        with self.lock:
+            if len(self.latencies) < MIN_SAMPLES:
+                return MAX_TIMEOUT
+            observed = percentile(self.latencies, TIMEOUT_PERCENTILE)
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, observed * TIMEOUT_MARGIN))
+
+    def record_success(self, latency):
+        with self.lock:
+            self.latencies.append(latency)
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            if self.state != CLOSED:
+                print(f"[Health] ✅ {self.name} rétabli")
+            self.state = CLOSED
+
+    def record_failure(self, timeout=False):
+        with self.lock:
+            self.failures += 1
+            if timeout:
+                self.timeouts += 1
+            self.consecutive_failures += 1
+            self.probe_in_flight = False
+
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED and self.consecutive_failures >= FAILURE_THRESHOLD
+            ):
+                self.state = OPEN
+                self.opened_at = time.time()
+                print(f"[Health] 🔌 {self.name} : disjoncteur ouvert "
+                      f"({self.consecutive_failures} échecs consécutifs)")
+
+    def snapshot(self):
+        timeout = self.timeout()
+        with self.lock:
+            latencies = list(self.latencies)
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'successes': self.successes,
+                'failures': self.failures,
+                'timeouts': self.timeouts,
+                'rejected': self.rejected,
+                'latency_p50': round(percentile(latencies, 0.5), 3) if latencies else None,
+                'latency_p95': round(percentile(latencies, 0.95), 3) if latencies else None,
+                'timeout': round(timeout, 2),
+            }
+
+
+class HosterHealthRegistry:
+    def __init__(self):
+        self.hosters = {}
+        self.lock = threading.Lock()
+
+    def get(self, name):
+        health = self.hosters.get(name)
+        if health is None:
+            with self.lock:
+                health = self.hosters.setdefault(name, HosterHealth(name))
+        return health
+
+    def stats(self):
+        with self.lock:
+            hosters = dict(self.hosters)
+        return {name: health.snapshot() for name, health in sorted(hosters.items())}
+
+# Instance globale
+hoster_health = HosterHealthRegistry()
@@ -0,0 +1,193 @@
+"""
+hoster_loader.py
+Chargement à la demande des modules hébergeurs Kodi (cHoster)
+- Import au premier routage d'une URL vers l'hébergeur
+- Cache d'import thread-safe (un seul import par module)
+- Cache négatif pour les modules qui échouent à l'import
+- Préchargement optionnel des hébergeurs les plus demandés
+- Mode archive : import direct depuis le bundle produit par build_bundle.py
+"""
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+import zipfile
+
+from hoster_routing import hoster_router
+from tracing import span
+
+# ============ CONFIGURATION ============
+
+# Hébergeurs importés dès le démarrage (en arrière-plan)
+PRELOAD_EXTRACTORS = [
+    name.strip() for name in os.environ.get('KODI_PRELOAD', 'vidmoly,voe').split(',') if name.strip()
+]
+
+# Durée pendant laquelle un échec d'import n'est pas retenté (secondes)
+NEGATIVE_TTL = 300
+
+# Intervalle minimum entre deux ré-indexations du dossier (secondes)
+RESCAN_INTERVAL = 30
+
+# Archive pré-construite des hébergeurs (voir build_bundle.py)
+BUNDLE_PATH = os.environ.get('KODI_BUNDLE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kodi_bundle.zip'))
+BUNDLE_MANIFEST = 'manifest.json'
+
+
+def log(message):
+    print(f"[HosterLoader] {message}")
+
+
+class HosterModuleCache:
+    """Cache des classes cHoster importées depuis un dossier de modules"""
+
+    def __init__(self, directory, negative_ttl=NEGATIVE_TTL):
+        self.directory = directory
+        self.negative_ttl = negative_ttl
+        self.classes = {}
+        self.failures = {}
+        self.available = set()
+        self.last_scan = 0
+        self.lock = threading.Lock()
+        self.module_locks = {}
+
+    def scan(self):
+        """
+        Indexe les modules présents (simple listing, aucun import)
+        et les enregistre dans le routeur partagé
+        """
+        self.last_scan = time.time()
+        if not os.path.isdir(self.directory):
+            return set()
+
+        if self.directory not in sys.path:
+            sys.path.insert(0, self.directory)
+
+        names = {
+            filename[:-3] for filename in os.listdir(self.directory)
+            if filename.endswith('.py') and not filename.startswith('__')
+        }
+        for name in names - self.available:
+            hoster_router.add_hoster(name)
+        self.available |= names
+        return names
+
+    def refresh(self):
+        """Ré-indexe le dossier si le dernier listing est ancien (fichiers ajoutés entre-temps)"""
+        if time.time() - self.last_scan >= RESCAN_INTERVAL:
+            self.scan()
+
+    def _module_lock(self, name):
+        with self.lock:
+            lock = self.module_locks.get(name)
+            if lock is None:
+                lock = self.module_locks[name] = threading.Lock()
+            return lock
+
+    def get(self, name):
+        """Retourne la classe cHoster du module (importé au premier appel), ou None"""
+        extractor_class = self.classes.get(name)
+        if extractor_class is not None:
+            return extractor_class
+
+        failure = self.failures.get(name)
+        if failure and time.time() - failure[0] < self.negative_ttl:
+            return None
+
+        with self._module_lock(name):
+            # Un autre thread a pu importer le module pendant l'attente
+            extractor_class = self.classes.get(name)
+            if extractor_class is not None:
+                return extractor_class
+            return self._import(name)
+
+    def _load_module(self, name):
+        """Exécute le module hébergeur depuis le dossier"""
+        file_path = os.path.join(self.directory, f"{name}.py")
+        if not os.path.exists(file_path):
+            raise ImportError(f"{name}.py introuvable")
+
+        spec = importlib.util.spec_from_file_location(name, file_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    def _import(self, name):
+        start = time.time()
+        try:
+            with span('module_load', module=name):
+                module = self._load_module(name)
+
+            if not hasattr(module, 'cHoster'):
+                raise ImportError(f"cHoster non trouvé dans {name}")
+
+            hoster_router.add_module(name, module)
+            self.classes[name] = module.cHoster
+            self.failures.pop(name, None)
+            log(f"✅ {name} ({(time.time() - start) * 1000:.0f} ms)")
+            return module.cHoster
+
+        except Exception as e:
+            self.failures[name] = (time.time(), str(e)[:200])
+            log(f"⚠️  Erreur chargement {name}: {str(e)[:100]}")
+            return None
+
+    def preload(self, names=None):
+        """Importe à l'avance les hébergeurs les plus demandés"""
+        for name in (PRELOAD_EXTRACTORS if names is None else names):
+            if name in self.available:
+                self.get(name)
+
+    def stats(self):
+        return {
+            'source': self.directory,
+            'available': len(self.available),
+            'loaded': sorted(self.classes),
+            'failed': {name: error for name, (_, error) in self.failures.items()},
+        }
+
+
+class BundleModuleCache(HosterModuleCache):
+    """Même cache, mais les modules sont importés depuis l'archive zip (zipimport)"""
+
+    def __init__(self, bundle_path, negative_ttl=NEGATIVE_TTL):
+        super().__init__(bundle_path, negative_ttl)
+        self.manifest = {}
+
+    def scan(self):
+        """Liste des hébergeurs lue dans le manifest de l'archive"""
+        self.last_scan = time.time()
+        with zipfile.ZipFile(self.directory) as bundle:
+            self.manifest = json.loads(bundle.read(BUNDLE_MANIFEST))
+
+        if self.directory not in sys.path:
+            sys.path.insert(0, self.directory)
+
+        names = set(self.manifest.get('hosters', []))
+        for name in names - self.available:
+            hoster_router.add_hoster(name)
+        self.available |= names
+        return names
+
+    def refresh(self):
+        # Archive immuable : rien à ré-indexer
+        pass
+
+    def _load_module(self, name):
+        return importlib.import_module(f"{self.manifest.get('package', 'resources.hosters')}.{name}")
+
+    def stats(self):
+        stats = super().stats()
+        stats['bundle_version'] = self.manifest.get('version')
+        return stats
+
+
+def open_module_cache(directory):
+    """Archive pré-construite si présente, sinon le dossier de modules"""
+    if os.path.isfile(BUNDLE_PATH):
+        log(f"📦 Hébergeurs chargés depuis {BUNDLE_PATH}")
+        return BundleModuleCache(BUNDLE_PATH)
+    return HosterModuleCache(directory)
@@ -0,0 +1,223 @@
+"""
+hoster_routing.py
+Index de routage URL → module hébergeur Kodi, construit une seule fois
+et partagé par kodi_extractors et kodi_loader.
+
+Recherche en O(nombre de labels du domaine), indépendante du nombre
+d'hébergeurs :
+1. domaine enregistré (hash sur le domaine puis ses domaines parents)
+2. label du domaine (ex: 'dood' dans dood.wf, 'hqq' dans hqq.to)
+3. label prolongeant un label de HOSTER_RULES d'au moins
+   MIN_LABEL_PREFIX caractères (miroirs : doods.pro → dood,
+   strtapeadblock.me → strtape, voeunblock3.com → voeunblock) ; les
+   labels tirés des seuls noms de modules ne comptent qu'exacts
+
+Le résultat est mémorisé par domaine (LRU, vidé à chaque nouvel
+hébergeur) : le même petit ensemble de domaines revient des milliers
+de fois dans une liste d'épisodes. Le nom d'hébergeur affiché
+(hosts_available) vient des seules correspondances exactes sur
+HOSTER_RULES, puis de OTHER_HOSTS : il ne dépend ni des modules
+scannés ni des prolongements de labels.
+"""
+import re
+import threading
+from functools import lru_cache
+
+# ============ RÈGLES CONNUES ============
+
+# Domaines et labels des hébergeurs les plus utilisés
+HOSTER_RULES = {
+    'vidmoly': {
+        'domains': ['vidmoly.to', 'vidmoly.net', 'vidmoly.me'],
+        'labels': ['vidmoly'],
+    },
+    'voe': {
+        'domains': ['voe.sx'],
+        'labels': ['voe', 'voe-unblock', 'voeunblock'],
+    },
+    'streamtape': {
+        'domains': ['streamtape.com', 'streamtape.net', 'strtape.cloud', 'streamtapeadblock.art'],
+        'labels': ['streamtape', 'strtape', 'stape'],
+    },
+    'dood': {
+        'domains': ['dood.wf', 'dood.so', 'dood.la', 'doods.pro', 'doodstream.com', 'ds2play.com'],
+        'labels': ['dood', 'doods', 'doodstream', 'ds2play'],
+    },
+    'mixdrop': {
+        'domains': ['mixdrop.co', 'mixdrop.ag'],
+        'labels': ['mixdrop', 'mixdroop'],
+    },
+    'filelions': {
+        'domains': ['filelions.to'],
+        'labels': ['filelions', 'fviplions'],
+    },
+    'netu': {
+        'domains': ['netu.tv', 'waaw.to', 'hqq.tv', 'hqq.to'],
+        'labels': ['netu', 'waaw', 'hqq'],
+    },
+    'streamlare': {
+        'domains': ['streamlare.com'],
+        'labels': ['streamlare', 'slares'],
+    },
+    'streamvid': {
+        'domains': ['streamvid.net'],
+        'labels': ['streamvid'],
+    },
+    'vudeo': {
+        'domains': ['vudeo.net', 'vudeo.io'],
+        'labels': ['vudeo'],
+    },
+}
+
+# Nom affiché des hébergeurs Kodi (défaut : nom du module capitalisé)
+DISPLAY_NAMES = {
+    'vidmoly': 'Vidmoly',
+    'voe': 'Voe',
+    'streamtape': 'Streamtape',
+    'dood': 'DoodStream',
+    'mixdrop': 'Mixdrop',
+    'filelions': 'Filelions',
+    'netu': 'Netu',
+    'streamlare': 'Streamlare',
+    'streamvid': 'Streamvid',
+    'vudeo': 'Vudeo',
+}
+
+# Hébergeurs sans module Kodi, reconnus par sous-chaîne du domaine
+OTHER_HOSTS = {
+    'mp4upload': 'Mp4Upload',
+    'okru': 'OK.ru',
+    'youtube': 'YouTube',
+    'vimeo': 'Vimeo',
+    'uptostream': 'Uptostream',
+    'mystream': 'MyStream',
+}
+
+# Domaines mémorisés
+ROUTE_CACHE_SIZE = 1024
+
+# Longueur minimale d'un label connu pour reconnaître ses prolongements
+# ('voe', 'hqq' trop courts : voetbal.nl ne doit pas router vers voe)
+MIN_LABEL_PREFIX = 4
+
+NETLOC_END_RE = re.compile(r'[/?#]')
+
+def url_netloc(url):
+    """Partie réseau d'une URL (sans urlparse), schéma facultatif"""
+    rest = url.partition('//')[2] if '//' in url else url
+    return NETLOC_END_RE.split(rest, 1)[0]
+
+def netloc_host(netloc):
+    """Nom d'hôte en minuscules (sans identifiants ni port)"""
+    host = netloc.rpartition('@')[2]
+    if host.startswith('['):
+        return host[1:host.find(']')].lower()
+    return host.partition(':')[0].lower()
+
+def exact_match(host, domains, labels):
+    """(nom, règle) pour un domaine enregistré ou un label exact, sinon (None, None)"""
+    # 1. Domaine enregistré (exact puis parents : a.b.vidmoly.to → vidmoly.to)
+    candidate = host
+    while candidate:
+        name = domains.get(candidate)
+        if name is not None:
+            return name, f'domain:{candidate}'
+        _, _, candidate = candidate.partition('.')
+
+    # 2. Label du domaine (sans le TLD)
+    for label in host.split('.')[:-1] or [host]:
+        name = labels.get(label)
+        if name is not None:
+            return name, f'label:{label}'
+
+    return None, None
+
+# ============ INDEX ============
+
+class HosterRouter:
+    """Index domaine/label → nom de module hébergeur"""
+
+    def __init__(self, rules=None):
+        self.domains = {}
+        self.labels = {}
+        # Règles fixes : prolongements de labels et noms affichés
+        self.rule_domains = {}
+        self.rule_labels = {}
+        self.lock = threading.Lock()
+        self._route_host = lru_cache(maxsize=ROUTE_CACHE_SIZE)(self._route_host_uncached)
+        self._label_netloc = lru_cache(maxsize=ROUTE_CACHE_SIZE)(self._label_netloc_uncached)
+        for name, rule in (rules or {}).items():
+            for domain in rule.get('domains', ()):
+                self.rule_domains.setdefault(domain.lower(), name)
+            for label in rule.get('labels', ()):
+                self.rule_labels.setdefault(label.lower(), name)
+            self.add_hoster(name, rule.get('domains', ()), rule.get('labels', ()))
+
+    def add_hoster(self, name, domains=(), labels=None):
+        """
+        Enregistre un hébergeur. Sans labels explicites, le nom du module
+        sert de label (ex: module 'uqload' → uqload.io, uqload.co...).
+        """
+        with self.lock:
+            for domain in domains:
+                self.domains.setdefault(domain.lower(), name)
+            for label in (labels if labels else [name]):
+                self.labels.setdefault(label.lower(), name)
+        self._route_host.cache_clear()
+        self._label_netloc.cache_clear()
+
+    def add_module(self, name, module):
+        """Enregistre un module chargé (domaines optionnels via l'attribut DOMAINS)"""
+        self.add_hoster(name, getattr(module, 'DOMAINS', ()))
+
+    def route(self, url):
+        """Retourne (nom du module, règle utilisée) ou (None, None)"""
+        host = netloc_host(url_netloc(url))
+        if not host:
+            return None, None
+        return self._route_host(host)
+
+    def _route_host_uncached(self, host):
+        name, rule = exact_match(host, self.domains, self.labels)
+        if name is not None:
+            return name, rule
+
+        # 3. Label prolongeant un label des règles (le plus long d'abord)
+        for label in host.split('.')[:-1] or [host]:
+            for end in range(len(label) - 1, MIN_LABEL_PREFIX - 1, -1):
+                name = self.rule_labels.get(label[:end])
+                if name is not None:
+                    return name, f'label_prefix:{label[:end]}'
+
+        return None, None
+
+    def label(self, url):
+        """Nom d'hébergeur affiché pour une URL (ex: 'DoodStream')"""
+        return self._label_netloc(url_netloc(url))
+
+    def _label_netloc_uncached(self, netloc):
+        host = netloc_host(netloc)
+        name, _ = exact_match(host, self.rule_domains, self.rule_labels) if host else (None, None)
+        if name is not None:
+            return DISPLAY_NAMES.get(name, name.capitalize())
+
+        hostname = netloc.lower()
+        for host_key, host_name in OTHER_HOSTS.items():
+            if host_key in hostname:
+                return host_name
+
+        # Extraire le nom de domaine principal
+        parts = hostname.split('.')
+        if len(parts) >= 2:
+            return parts[-2].capitalize()
+        return hostname
+
+    def cache_info(self):
+        info = self._route_host.cache_info()
+        return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize}
+
+    def names(self):
+        return set(self.domains.values()) | set(self.labels.values())
+
+# Index global partagé
+hoster_router = HosterRouter(HOSTER_RULES)
@@ -0,0 +1,140 @@
+"""
+http_client.py
+Client HTTP partagé par les scrapers et les extracteurs
+- Pools de connexions par hôte (keep-alive, évite un handshake TCP+TLS par requête)
+- Réessais avec backoff sur les erreurs de connexion
+- Profils de headers par défaut
+- Étapes tracées : connexion (DNS+TCP+TLS), premier octet, corps
+"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import UPSTREAM_BYTES, UPSTREAM_REQUESTS
+from tracing import span, TRACED_POOL_CLASSES
+
+# ============ CONFIGURATION ============
+
+# Nombre d'hôtes distincts gardés en pool
+POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 32))
+
+# Connexions keep-alive maximum par hôte
+POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 16))
+
+# Réessais sur erreur de connexion (jamais sur une réponse reçue)
+CONNECT_RETRIES = int(os.environ.get('HTTP_CONNECT_RETRIES', 2))
+BACKOFF_FACTOR = float(os.environ.get('HTTP_BACKOFF_FACTOR', 0.3))
+
+DEFAULT_TIMEOUT = 15
+
+USER_AGENT_FIREFOX = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:139.0) Gecko/20100101 Firefox/139.0'
+USER_AGENT_CHROME = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# Profils de headers
+HEADER_PROFILES = {
+    # Pages du site (listes, fiches animés)
+    'browser': {
+        'User-Agent': USER_AGENT_CHROME,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'fr,fr-FR;q=0.8,en-US;q=0.5,en;q=0.3',
+        'Accept-Encoding': 'gzip, deflate',
+        'DNT': '1',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1'
+    },
+    # Pages embed des hébergeurs (comme Kodi cRequestHandler)
+    'embed': {
+        'User-Agent': USER_AGENT_FIREFOX,
+        'Sec-Fetch-Dest': 'iframe',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'fr,fr-FR;q=0.8,en-US;q=0.5,en;q=0.3',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1'
+    },
+    'minimal': {
+        'User-Agent': 'Mozilla/5.0'
+    },
+    # API / fichiers bruts GitHub
+    'api': {
+        'User-Agent': 'darkiworld-extractor-backend',
+        'Accept': '*/*'
+    },
+}
+
+# ============ SESSION PARTAGÉE ============
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class TracedAdapter(HTTPAdapter):
+    """Adaptateur dont les connexions ouvertes apparaissent dans les traces"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = TRACED_POOL_CLASSES
+
+
+def _build_session():
+    retry = Retry(
+        total=CONNECT_RETRIES,
+        connect=CONNECT_RETRIES,
+        read=0,
+        status=0,
+        redirect=None,
+        backoff_factor=BACKOFF_FACTOR,
+        raise_on_status=False
+    )
+    adapter = TracedAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session():
+    """Session requests unique (pools par hôte) pour tout le processus"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def build_headers(profile='browser', headers=None):
+    """Headers du profil, complétés/écrasés par ceux fournis"""
+    merged = dict(HEADER_PROFILES.get(profile, HEADER_PROFILES['browser']))
+    if headers:
+        merged.update(headers)
+    return merged
+
+
+def get(url, profile='browser', headers=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """GET via la session partagée (octets et statuts comptés par profil)"""
+    stream = kwargs.pop('stream', False)
+    
+    # Corps lu séparément : le span http.request s'arrête aux headers (premier octet)
+    with span('http.request', url=url, profile=profile):
+        response = get_session().get(
+            url,
+            headers=build_headers(profile, headers),
+            timeout=timeout,
+            stream=True,
+            **kwargs
+        )
+    UPSTREAM_REQUESTS.inc(profile, str(response.status_code))
+    
+    if not stream:
+        with span('http.body'):
+            content = response.content
+        UPSTREAM_BYTES.inc(profile, amount=len(content))
+    return response
@@ -2,120 +2,231 @@
 kodi_downloader.py
 Télécharge UNIQUEMENT les extracteurs Kodi depuis GitHub
 Poids total : ~5-10 Mo (au lieu de 500 Mo)
+- Téléchargements parallèles (pool borné + limitation de débit token bucket)
+- Fichiers inchangés ignorés (SHA de l'arbre GitHub, ETag / Last-Modified)
+- Écriture atomique (fichier temporaire + rename)
 """
 import os
-import requests
+import hashlib
+import json
+import tempfile
+import http_client
 import time
 import threading
-from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+
+# ============ CONFIGURATION ============
+
+# Téléchargements simultanés
+DOWNLOAD_WORKERS = 4
+
+# Débit maximal vers GitHub (requêtes/seconde, rafale)
+RATE_PER_SECOND = 3.0
+RATE_BURST = 5
+
+# Métadonnées des fichiers téléchargés (sha, etag, last-modified)
+MANIFEST_NAME = '.manifest.json'
+
+# KODI_AUTO_DOWNLOAD=0 : pas de téléchargement à l'import (vérifications hors-ligne)
+AUTO_DOWNLOAD = os.environ.get('KODI_AUTO_DOWNLOAD', '1') != '0'
+
+class TokenBucket:
+    """Limiteur de débit : `rate` jetons/seconde, au plus `capacity` en réserve"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def git_blob_sha(data):
+    """SHA git d'un contenu (identique au champ 'sha' de l'API GitHub)"""
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
 
 class KodiDownloader:
-    def __init__(self):
-        self.base_url = "https://api.github.com/repos/Kodi-vStream/venom-xbmc-addons/contents/resources/hosters"
-        self.raw_base_url = "https://raw.githubusercontent.com/Kodi-vStream/venom-xbmc-addons/master/resources/hosters"
-        self.extractors_dir = os.path.join(os.path.dirname(__file__), "kodi_extractors")
+    def __init__(self, base_url=None, raw_base_url=None, extractors_dir=None):
+        self.base_url = base_url or "https://api.github.com/repos/Kodi-vStream/venom-xbmc-addons/contents/resources/hosters"
+        self.raw_base_url = raw_base_url or "https://raw.githubusercontent.com/Kodi-vStream/venom-xbmc-addons/master/resources/hosters"
+        self.extractors_dir = extractors_dir or os.path.join(os.path.dirname(__file__), "kodi_extractors")
         self.downloaded = []
-        
+        self.remote_shas = {}
+        self.manifest = {}
+        self.lock = threading.Lock()
+        self.rate_limiter = TokenBucket(RATE_PER_SECOND, RATE_BURST)
+
     def ensure_directory(self):
         """Crée le dossier pour les extracteurs"""
         if not os.path.exists(self.extractors_dir):
             os.makedirs(self.extractors_dir)
             print(f"📁 Dossier créé: {self.extractors_dir}")
-    
+
+    def load_manifest(self):
+        try:
+            with open(os.path.join(self.extractors_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    def save_manifest(self):
+        with self.lock:
+            data = json.dumps(self.manifest, indent=1, sort_keys=True).encode('utf-8')
+        self.write_atomic(MANIFEST_NAME, data)
+
+    def write_atomic(self, filename, data):
+        """Écrit via un fichier temporaire puis rename : jamais de module à moitié écrit"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.extractors_dir, prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, os.path.join(self.extractors_dir, filename))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
     def get_extractor_list(self):
-        """Récupère la liste des extracteurs depuis GitHub API"""
+        """Récupère la liste des extracteurs (et leur SHA) depuis GitHub API"""
         try:
-            response = requests.get(self.base_url, timeout=10)
+            self.rate_limiter.acquire()
+            response = http_client.get(self.base_url, profile='api', timeout=10)
             if response.status_code == 200:
                 files = response.json()
                 # Filtrer seulement les fichiers .py (les extracteurs)
                 extractors = [f['name'] for f in files if f['name'].endswith('.py')]
+                self.remote_shas = {f['name']: f.get('sha') for f in files if f['name'].endswith('.py')}
                 return extractors
         except Exception as e:
             print(f"❌ Erreur liste extracteurs: {e}")
-        
+
         # Liste de fallback (les plus importants)
         return [
             'vidmoly.py', 'voe.py', 'streamtape.py', 'dood.py',
             'mixdrop.py', 'filelions.py', 'netu.py', 'streamlare.py',
             'streamvid.py', 'vudeo.py', 'upstream.py', 'videobin.py'
         ]
-    
-    def download_extractor(self, extractor_name):
-        """Télécharge un extracteur spécifique"""
+
+    def local_sha(self, extractor_name):
+        file_path = os.path.join(self.extractors_dir, extractor_name)
         try:
+            with open(file_path, 'rb') as f:
+                return git_blob_sha(f.read())
+        except OSError:
+            return None
+
+    def fetch_extractor(self, extractor_name):
+        """
+        Télécharge un extracteur s'il a changé.
+        Retourne 'downloaded', 'unchanged' ou 'failed'.
+        """
+        try:
+            # 1. SHA de l'arbre GitHub identique au fichier local : rien à faire
+            remote_sha = self.remote_shas.get(extractor_name)
+            if remote_sha and remote_sha == self.local_sha(extractor_name):
+                return 'unchanged'
+
+            # 2. Requête conditionnelle (ETag / Last-Modified)
+            headers = {}
+            file_exists = os.path.exists(os.path.join(self.extractors_dir, extractor_name))
+            with self.lock:
+                meta = dict(self.manifest.get(extractor_name, {}))
+            if file_exists and meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if file_exists and meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+            self.rate_limiter.acquire()
             url = f"{self.raw_base_url}/{extractor_name}"
-            response = requests.get(url, timeout=15)
-            
-            if response.status_code == 200:
-                file_path = os.path.join(self.extractors_dir, extractor_name)
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(response.text)
-                
-                self.downloaded.append(extractor_name)
-                print(f"✅ {extractor_name}")
-                return True
-            else:
+            response = http_client.get(url, profile='api', headers=headers, timeout=15)
+
+            if response.status_code == 304:
+                return 'unchanged'
+
+            if response.status_code != 200:
                 print(f"❌ {extractor_name} (HTTP {response.status_code})")
-                
+                return 'failed'
+
+            data = response.content
+            with self.lock:
+                self.manifest[extractor_name] = {
+                    'sha': git_blob_sha(data),
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')
+                }
+
+            if self.local_sha(extractor_name) == git_blob_sha(data):
+                return 'unchanged'
+
+            self.write_atomic(extractor_name, data)
+            with self.lock:
+                self.downloaded.append(extractor_name)
+            print(f"✅ {extractor_name}")
+            return 'downloaded'
+
         except Exception as e:
             print(f"❌ Erreur {extractor_name}: {e}")
-        
-        return False
-    
+
+        return 'failed'
+
+    def download_extractor(self, extractor_name):
+        """Télécharge un extracteur spécifique"""
+        return self.fetch_extractor(extractor_name) != 'failed'
+
+    def fetch_many(self, extractors):
+        """Télécharge une liste d'extracteurs en parallèle ; retourne le décompte par statut"""
+        self.ensure_directory()
+        self.load_manifest()
+
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+            statuses = list(pool.map(self.fetch_extractor, extractors))
+
+        self.save_manifest()
+        return {status: statuses.count(status) for status in ('downloaded', 'unchanged', 'failed')}
+
     def download_all(self, limit=20):
         """Télécharge tous les extracteurs (limité pour éviter la surcharge)"""
         self.ensure_directory()
-        
+
         print("📥 Téléchargement des extracteurs Kodi...")
         print("🔧 Seulement les fichiers .py (extracteurs)")
-        
+
         extractors = self.get_extractor_list()
         print(f"📋 {len(extractors)} extracteurs trouvés")
-        
+
         # Télécharger les plus importants d'abord
         priority_extractors = ['vidmoly.py', 'voe.py', 'streamtape.py', 'dood.py']
-        
-        success_count = 0
-        for extractor in priority_extractors:
-            if extractor in extractors:
-                if self.download_extractor(extractor):
-                    success_count += 1
-                time.sleep(0.5)  # Éviter le rate limiting
-        
-        # Télécharger les autres (limit)
+
         others = [e for e in extractors if e not in priority_extractors]
-        for extractor in others[:limit]:
-            if self.download_extractor(extractor):
-                success_count += 1
-            time.sleep(0.3)
-        
-        print(f"🎯 {success_count} extracteurs téléchargés")
+        to_fetch = [e for e in priority_extractors if e in extractors] + others[:limit]
+
+        counts = self.fetch_many(to_fetch)
+        success_count = counts['downloaded'] + counts['unchanged']
+
+        print(f"🎯 {success_count} extracteurs prêts "
+              f"({counts['downloaded']} téléchargés, {counts['unchanged']} inchangés, {counts['failed']} échecs)")
         return success_count
-    
+
     def update_extractors(self):
-        """Met à jour les extracteurs existants"""
+        """Met à jour les extracteurs existants (seuls les fichiers modifiés sont téléchargés)"""
         print("🔄 Vérification des mises à jour...")
         extractors = self.get_extractor_list()
-        
-        updated = 0
-        for extractor in extractors:
-            file_path = os.path.join(self.extractors_dir, extractor)
-            if os.path.exists(file_path):
-                # Vérifier si besoin de mise à jour (simplifié)
-                url = f"{self.raw_base_url}/{extractor}"
-                response = requests.get(url, timeout=10)
-                
-                if response.status_code == 200:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        current_content = f.read()
-                    
-                    if current_content != response.text:
-                        with open(file_path, 'w', encoding='utf-8') as f:
-                            f.write(response.text)
-                        print(f"🔄 {extractor} mis à jour")
-                        updated += 1
-        
+        existing = [e for e in extractors if os.path.exists(os.path.join(self.extractors_dir, e))]
+
+        counts = self.fetch_many(existing)
+        updated = counts['downloaded']
+
         print(f"📦 {updated} extracteurs mis à jour")
         return updated
 
@@ -129,4 +240,5 @@ def start_background_download():
     thread.start()
 
 # Démarrer automatiquement
-start_background_download()
+if AUTO_DOWNLOAD:
+    start_background_download()
@@ -2,20 +2,44 @@
 kodi_extractors.py
 Charge et utilise les extracteurs Kodi téléchargés
 """
+import contextvars
 import os
-import sys
-import importlib.util
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+from extraction_cache import extraction_cache, normalize_url
+from hoster_health import hoster_health
+from hoster_loader import open_module_cache
+from hoster_routing import hoster_router
+from metrics import record_extraction
+from singleflight import SingleFlight
+from tracing import span
+
+# Extractions Kodi simultanées (exécutées avec un timeout par hébergeur)
+EXTRACT_WORKERS = 16
+
+# Part du pool qu'un même hébergeur peut occuper : un hébergeur qui ne
+# répond plus garde ses threads jusqu'au retour de l'appel, pas ceux des autres
+PER_HOSTER_WORKERS = 6
 
 class KodiExtractorSystem:
     def __init__(self):
         self.extractors_dir = os.path.join(os.path.dirname(__file__), "kodi_extractors")
-        self.extractors = {}
+        self.modules = open_module_cache(self.extractors_dir)
+        self.extractors = self.modules.classes
         self.ready = False
         self.loading = False
+        self.executor = ThreadPoolExecutor(max_workers=EXTRACT_WORKERS)
+        # Places libres du pool (global et par hébergeur) : jamais de file d'attente
+        self.slots = threading.BoundedSemaphore(EXTRACT_WORKERS)
+        self.hoster_slots = {}
+        self.slots_lock = threading.Lock()
+        
+        # Indexer les modules (listing seulement, les imports sont faits à la demande)
+        self.index_extractors()
         
-        # Démarrer le chargement en arrière-plan
+        # Précharger les hébergeurs les plus demandés en arrière-plan
         self.load_thread = threading.Thread(target=self.load_all_extractors, daemon=True)
         self.load_thread.start()
     
@@ -29,92 +53,62 @@ class KodiExtractorSystem:
             time.sleep(1)
         return self.ready
     
+    def index_extractors(self):
+        """Indexe les extracteurs disponibles sans les importer"""
+        names = self.modules.scan()
+        if not names:
+            print("❌ Dossier extracteurs non trouvé ou vide")
+        else:
+            print(f"📋 {len(names)} extracteurs Kodi indexés")
+        self.ready = True
+    
     def load_extractor(self, extractor_name):
-        """Charge un extracteur spécifique"""
-        try:
-            file_path = os.path.join(self.extractors_dir, f"{extractor_name}.py")
-            
-            if not os.path.exists(file_path):
-                return None
-            
-            # Charger dynamiquement
-            spec = importlib.util.spec_from_file_location(extractor_name, file_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            
-            # Récupérer la classe cHoster
-            if hasattr(module, 'cHoster'):
-                return module.cHoster
-                
-        except Exception as e:
-            print(f"⚠️  Erreur chargement {extractor_name}: {e}")
-        
-        return None
+        """Charge un extracteur spécifique (cache d'import partagé)"""
+        return self.modules.get(extractor_name)
     
     def load_all_extractors(self):
-        """Charge tous les extracteurs disponibles"""
+        """Précharge les extracteurs prioritaires (les autres sont chargés à la demande)"""
         if self.loading:
             return
         
         self.loading = True
-        print("🔄 Chargement des extracteurs Kodi...")
-        
         try:
-            if not os.path.exists(self.extractors_dir):
-                print("❌ Dossier extracteurs non trouvé")
-                self.ready = True
-                return
-            
-            # Ajouter au chemin Python
-            if self.extractors_dir not in sys.path:
-                sys.path.insert(0, self.extractors_dir)
-            
-            # Liste des extracteurs à charger (priorité)
-            extractors_to_load = [
-                'vidmoly', 'voe', 'streamtape', 'dood',
-                'mixdrop', 'filelions', 'netu', 'streamlare'
-            ]
-            
-            for name in extractors_to_load:
-                extractor_class = self.load_extractor(name)
-                if extractor_class:
-                    self.extractors[name] = extractor_class
-                    print(f"✅ {name}")
-            
-            self.ready = True
-            print(f"🎯 {len(self.extractors)} extracteurs chargés")
-            
+            self.modules.preload()
         except Exception as e:
-            print(f"❌ Erreur chargement: {e}")
-            self.ready = True
-        
+            print(f"❌ Erreur préchargement: {e}")
         self.loading = False
     
-    def get_extractor_for_url(self, url):
-        """Trouve l'extracteur approprié pour une URL"""
-        url_lower = url.lower()
-        
-        mapping = {
-            'vidmoly': ['vidmoly', 'vidmoly.to', 'vidmoly.net'],
-            'voe': ['voe', 'voe.sx', 'voe-unblock'],
-            'streamtape': ['streamtape', 'strtape', 'stape'],
-            'dood': ['dood', 'doodstream', 'ds2play', 'dood.'],
-            'mixdrop': ['mixdrop', 'mixdroop'],
-            'filelions': ['filelions', 'fviplions'],
-            'netu': ['netu', 'waaw', 'hqq', 'netu.tv'],
-            'streamlare': ['streamlare', 'slares'],
-        }
+    def route(self, url):
+        """Retourne (classe cHoster, nom, règle de routage) pour une URL"""
+        with span('routing'):
+            extractor_name, rule = hoster_router.route(url)
+        if extractor_name is None:
+            return None, None, rule
         
-        for extractor_name, keywords in mapping.items():
-            if extractor_name in self.extractors:
-                for keyword in keywords:
-                    if keyword in url_lower:
-                        return self.extractors[extractor_name], extractor_name
+        # Dossier rempli après le démarrage (kodi_downloader) : ré-indexer
+        if extractor_name not in self.modules.available:
+            self.modules.refresh()
+        if extractor_name not in self.modules.available:
+            return None, None, rule
         
-        return None, None
+        extractor_class = self.modules.get(extractor_name)
+        if extractor_class is None:
+            return None, None, rule
+        return extractor_class, extractor_name, rule
+    
+    def get_extractor_for_url(self, url):
+        """Trouve l'extracteur approprié pour une URL"""
+        extractor_class, extractor_name, _ = self.route(url)
+        return extractor_class, extractor_name
     
     def extract(self, url):
-        """Extrait un lien vidéo avec l'extracteur Kodi"""
+        """Extrait un lien vidéo avec l'extracteur Kodi (mesuré par hébergeur)"""
+        started = time.perf_counter()
+        result = self._extract(url)
+        record_extraction('kodi', result, time.perf_counter() - started)
+        return result
+    
+    def _extract(self, url):
         if not self.ready:
             return {
                 'success': False,
@@ -123,7 +117,7 @@ class KodiExtractorSystem:
             }
         
         try:
-            extractor_class, extractor_name = self.get_extractor_for_url(url)
+            extractor_class, extractor_name, rule = self.route(url)
             
             if not extractor_class:
                 return {
@@ -132,47 +126,82 @@ class KodiExtractorSystem:
                     'extractor': 'kodi_system'
                 }
             
-            print(f"🔧 Utilisation extracteur Kodi: {extractor_name}")
+            # Pool saturé (ou part de l'hébergeur épuisée) : échec immédiat,
+            # sans toucher au disjoncteur, l'hébergeur n'y est pour rien
+            hoster_slots = self._acquire_slots(extractor_name)
+            if hoster_slots is None:
+                return {
+                    'success': False,
+                    'error': f'Extracteurs Kodi saturés ({extractor_name}), réessayer',
+                    'extractor': f'kodi_{extractor_name}',
+                    'busy': True
+                }
             
-            # Utiliser l'extracteur comme Kodi le fait
-            extractor_instance = extractor_class()
-            extractor_instance._url = url
+            # Hébergeur en panne : échec immédiat au lieu d'attendre le timeout
+            health = hoster_health.get(extractor_name)
+            if not health.allow():
+                self._release_slots(hoster_slots)
+                return {
+                    'success': False,
+                    'error': f'Hébergeur {extractor_name} indisponible (disjoncteur ouvert)',
+                    'extractor': f'kodi_{extractor_name}',
+                    'circuit_open': True,
+                    'retry_after': health.retry_after()
+                }
             
-            if hasattr(extractor_instance, '_getMediaLinkForGuest'):
-                success, result = extractor_instance._getMediaLinkForGuest()
+            print(f"🔧 Utilisation extracteur Kodi: {extractor_name} ({rule})")
+            
+            timeout = health.timeout()
+            # Contexte copié : les spans du thread d'extraction rejoignent la trace
+            context = contextvars.copy_context()
+            try:
+                future = self.executor.submit(context.run, self._run_extractor, extractor_class, url, hoster_slots)
+            except Exception:
+                self._release_slots(hoster_slots)
+                raise
+            try:
+                success, result, latency = future.result(timeout=timeout)
+            except FuturesTimeout:
+                health.record_failure(timeout=True)
+                return {
+                    'success': False,
+                    'error': f'Délai dépassé ({timeout:.1f}s)',
+                    'extractor': f'kodi_{extractor_name}',
+                    'timeout': True
+                }
+            except Exception:
+                health.record_failure()
+                raise
+            
+            if success:
+                health.record_success(latency)
                 
-                if success:
-                    # Format Kodi: "url|Referer=hostname"
-                    if isinstance(result, str) and '|Referer=' in result:
-                        video_url, referer_part = result.split('|Referer=', 1)
-                        referer = f"https://{referer_part}"
-                    else:
-                        video_url = result
-                        from urllib.parse import urlparse as parse_url
-                        referer = f"https://{parse_url(url).netloc}"
-                    
-                    return {
-                        'success': True,
-                        'url': video_url,
-                        'extractor': f'kodi_{extractor_name}',
-                        'kodi_result': result,
-                        'headers': {
-                            'Referer': referer,
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                        }
-                    }
+                # Format Kodi: "url|Referer=hostname"
+                if isinstance(result, str) and '|Referer=' in result:
+                    video_url, referer_part = result.split('|Referer=', 1)
+                    referer = f"https://{referer_part}"
                 else:
-                    return {
-                        'success': False,
-                        'error': f'Kodi extraction failed: {result}',
-                        'extractor': f'kodi_{extractor_name}'
-                    }
-            else:
+                    video_url = result
+                    from urllib.parse import urlparse as parse_url
+                    referer = f"https://{parse_url(url).netloc}"
+                
                 return {
-                    'success': False,
-                    'error': 'Méthode _getMediaLinkForGuest non trouvée',
-                    'extractor': f'kodi_{extractor_name}'
+                    'success': True,
+                    'url': video_url,
+                    'extractor': f'kodi_{extractor_name}',
+                    'kodi_result': result,
+                    'headers': {
+                        'Referer': referer,
+                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+                    }
                 }
+            
+            health.record_failure()
+            return {
+                'success': False,
+                'error': f'Kodi extraction failed: {result}',
+                'extractor': f'kodi_{extractor_name}'
+            }
                 
         except Exception as e:
             print(f"❌ Erreur extraction Kodi: {e}")
@@ -182,12 +211,67 @@ class KodiExtractorSystem:
                 'extractor': 'kodi_system'
             }
 
+    def _acquire_slots(self, extractor_name):
+        """Réserve une place du pool et de l'hébergeur sans attendre ; None si saturé"""
+        with self.slots_lock:
+            hoster_slots = self.hoster_slots.get(extractor_name)
+            if hoster_slots is None:
+                hoster_slots = self.hoster_slots[extractor_name] = threading.BoundedSemaphore(PER_HOSTER_WORKERS)
+        if not hoster_slots.acquire(blocking=False):
+            return None
+        if not self.slots.acquire(blocking=False):
+            hoster_slots.release()
+            return None
+        return hoster_slots
+    
+    def _release_slots(self, hoster_slots):
+        self.slots.release()
+        hoster_slots.release()
+    
+    def _run_extractor(self, extractor_class, url, hoster_slots):
+        """
+        Exécute l'extracteur comme Kodi le fait ; retourne (succès, résultat, durée).
+        Les places sont rendues au retour réel de l'appel, même après un timeout.
+        """
+        started = time.monotonic()
+        try:
+            extractor_instance = extractor_class()
+            extractor_instance._url = url
+            
+            if not hasattr(extractor_instance, '_getMediaLinkForGuest'):
+                return False, 'Méthode _getMediaLinkForGuest non trouvée', time.monotonic() - started
+            
+            with span('kodi.extract', hoster=extractor_class.__module__.rsplit('.', 1)[-1]):
+                success, result = extractor_instance._getMediaLinkForGuest()
+            return success, result, time.monotonic() - started
+        finally:
+            self._release_slots(hoster_slots)
+
 # Instance globale
 kodi_system = KodiExtractorSystem()
 
+# Regroupe les extractions concurrentes d'une même URL
+kodi_flight = SingleFlight()
+
+def _extract_and_cache(url):
+    # Relu dans le vol : un appelant qui a manqué le cache juste avant le
+    # set() du vol précédent arrive après sa fin et ne doit pas réextraire
+    cached = extraction_cache.get(url)
+    if cached is not None:
+        return cached
+    result = kodi_system.extract(url)
+    extraction_cache.set(url, result)
+    return result
+
 # Fonctions d'export
-def extract_with_kodi(url):
-    return kodi_system.extract(url)
+def extract_with_kodi(url, use_cache=True):
+    """use_cache=False : l'appelant vient de lire le cache (relu quand même dans le vol)"""
+    if use_cache:
+        cached = extraction_cache.get(url)
+        if cached is not None:
+            return cached
+    
+    return kodi_flight.do(normalize_url(url), _extract_and_cache, url)
 
 def is_kodi_available():
     return kodi_system.is_ready()
@@ -197,5 +281,9 @@ def get_kodi_status():
         'ready': kodi_system.ready,
         'loading': kodi_system.loading,
         'extractors_loaded': list(kodi_system.extractors.keys()),
-        'extractors_count': len(kodi_system.extractors)
+        'extractors_count': len(kodi_system.extractors),
+        'modules': kodi_system.modules.stats(),
+        'cache': extraction_cache.stats(),
+        'singleflight': kodi_flight.stats(),
+        'hosters': hoster_health.stats()
     }
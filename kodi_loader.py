@@ -5,11 +5,12 @@ N'affecte pas le fonctionnement normal de l'API.
 """
 
 import os
-import sys
 import subprocess
 import threading
 import time
-import importlib.util
+
+from hoster_loader import BundleModuleCache, open_module_cache
+from hoster_routing import hoster_router
 
 # ============ CONFIGURATION ============
 
@@ -17,22 +18,12 @@ KODI_PATH = os.path.join(os.path.dirname(__file__), 'kodi-addons')
 KODI_REPO_URL = "https://github.com/TechEnthusiast47/venom-xbmc-addons.git"
 HOSTERS_PATH = os.path.join(KODI_PATH, 'resources', 'hosters')
 
-# Extracteurs à charger (les plus utiles)
-EXTRACTORS_TO_LOAD = [
-    'vidmoly',    # Vidmoly.net
-    'voe',        # Voe.sx
-    'streamtape', # Streamtape.com
-    'dood',       # DoodStream
-    'mixdrop',    # MixDrop
-    'filelions',  # FileLions
-    'netu',       # NetU/Waaw/Hqq
-    'streamlare', # Streamlare
-    'streamvid',  # Streamvid
-    'vudeo',      # Vudeo
-]
+# Modules hébergeurs : indexés au démarrage, importés à la demande
+# (depuis kodi_bundle.zip s'il a été construit au build)
+KODI_MODULES = open_module_cache(HOSTERS_PATH)
 
 # Stockage des extracteurs chargés
-KODI_EXTRACTORS = {}
+KODI_EXTRACTORS = KODI_MODULES.classes
 KODI_LOADED = False
 KODI_LOADING = False
 
@@ -87,47 +78,22 @@ def download_kodi():
         return False
 
 def load_extractors():
-    """Charge les extracteurs Kodi"""
-    global KODI_EXTRACTORS, KODI_LOADED
+    """Indexe les extracteurs Kodi (import à la demande) et précharge les prioritaires"""
+    global KODI_LOADED
     
     try:
         # Vérifier si le dossier hosters existe
-        if not os.path.exists(HOSTERS_PATH):
+        names = KODI_MODULES.scan()
+        if not names:
             log("❌ Dossier hosters non trouvé")
             return
         
-        # Ajouter au chemin Python
-        if HOSTERS_PATH not in sys.path:
-            sys.path.insert(0, HOSTERS_PATH)
+        KODI_LOADED = True
+        log(f"📋 {len(names)} extracteurs indexés")
         
-        # Charger chaque extracteur
-        loaded_count = 0
-        for extractor_name in EXTRACTORS_TO_LOAD:
-            try:
-                file_path = os.path.join(HOSTERS_PATH, f'{extractor_name}.py')
-                
-                if not os.path.exists(file_path):
-                    log(f"⚠️  Fichier non trouvé: {extractor_name}.py")
-                    continue
-                
-                # Charger dynamiquement le module
-                spec = importlib.util.spec_from_file_location(extractor_name, file_path)
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-                
-                # Récupérer la classe cHoster
-                if hasattr(module, 'cHoster'):
-                    KODI_EXTRACTORS[extractor_name] = module.cHoster
-                    loaded_count += 1
-                    log(f"✅ {extractor_name}")
-                else:
-                    log(f"⚠️  cHoster non trouvé dans {extractor_name}")
-                    
-            except Exception as e:
-                log(f"⚠️  Erreur {extractor_name}: {str(e)[:100]}")
-        
-        KODI_LOADED = loaded_count > 0
-        log(f"🎯 {loaded_count}/{len(EXTRACTORS_TO_LOAD)} extracteurs chargés")
+        # Seuls les hébergeurs prioritaires sont importés maintenant
+        KODI_MODULES.preload()
+        log(f"🎯 {len(KODI_EXTRACTORS)} extracteurs préchargés")
         
     except Exception as e:
         log(f"❌ Erreur chargement extracteurs: {e}")
@@ -142,8 +108,8 @@ def background_load():
     KODI_LOADING = True
     log("🚀 Démarrage chargement Kodi...")
     
-    # 1. Télécharger Kodi
-    if download_kodi():
+    # 1. Télécharger Kodi (inutile si l'archive a été construite au build)
+    if isinstance(KODI_MODULES, BundleModuleCache) or download_kodi():
         # 2. Charger les extracteurs
         load_extractors()
     else:
@@ -162,37 +128,20 @@ def extract_with_kodi(url):
         return None
     
     try:
-        url_lower = url.lower()
-        
-        # Mapping URL → extracteur
-        mapping = {
-            'vidmoly': 'vidmoly',
-            'voe.sx': 'voe',
-            'streamtape': 'streamtape',
-            'doodstream': 'dood',
-            'dood.': 'dood',
-            'mixdrop': 'mixdrop',
-            'filelions': 'filelions',
-            'netu': 'netu',
-            'waaw': 'netu',
-            'hqq': 'netu',
-            'streamlare': 'streamlare',
-            'streamvid': 'streamvid',
-            'vudeo': 'vudeo',
-        }
+        # Trouver l'extracteur (index partagé avec kodi_extractors)
+        extractor_name, rule = hoster_router.route(url)
         
-        # Trouver l'extracteur
-        extractor_name = None
-        for key, name in mapping.items():
-            if key in url_lower:
-                extractor_name = name
-                break
+        if not extractor_name or extractor_name not in KODI_MODULES.available:
+            return None
         
-        if not extractor_name or extractor_name not in KODI_EXTRACTORS:
+        # Import du module au premier usage
+        extractor_class = KODI_MODULES.get(extractor_name)
+        if extractor_class is None:
             return None
         
+        log(f"🔧 {extractor_name} ({rule})")
+        
         # Utiliser l'extracteur Kodi
-        extractor_class = KODI_EXTRACTORS[extractor_name]
         extractor = extractor_class()
         extractor._url = url
         
@@ -235,6 +184,7 @@ def get_kodi_status():
         'loading': KODI_LOADING,
         'extractors_available': list(KODI_EXTRACTORS.keys()),
         'extractors_count': len(KODI_EXTRACTORS),
+        'modules': KODI_MODULES.stats(),
         'kodi_path_exists': os.path.exists(KODI_PATH),
         'hosters_path_exists': os.path.exists(HOSTERS_PATH)
     }
@@ -0,0 +1,349 @@
+"""
+metrics.py
+Métriques au format texte Prometheus (/metrics), sans dépendance
+- Compteurs et histogrammes à labels, un verrou par métrique
+- Coût d'une mesure : moins d'une µs (voir benchmarks/bench_metrics.py)
+- Collecteurs : fonctions appelées au rendu pour exposer des valeurs
+  déjà calculées ailleurs (statistiques des caches...)
+- Plusieurs workers gunicorn : chaque worker publie ses compteurs et
+  histogrammes dans shared_cache (toutes les METRICS_PUBLISH_INTERVAL s),
+  /metrics rend la somme de tous les workers, quel que soit celui qui
+  répond. Un worker arrêté reste compté METRICS_RETENTION secondes (les
+  compteurs ne décroissent pas à son arrêt). Les collecteurs (entrées des
+  caches, disjoncteurs...) restent ceux du worker qui répond.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from shared_cache import shared_cache
+from tracing import span
+
+# ============ CONFIGURATION ============
+
+# Bornes des histogrammes de latence (secondes)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Publication des mesures de ce worker dans le cache partagé
+METRICS_PUBLISH_INTERVAL = 10
+METRICS_RETENTION = 24 * 3600
+SHARED_NAMESPACE = 'metrics'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.values)
+
+    def merge(self, values, exported):
+        """Ajoute les valeurs publiées par un autre worker ([[labels], valeur])"""
+        for labels, value in exported:
+            labels = tuple(labels)
+            values[labels] = values.get(labels, 0) + value
+
+    def export(self, values):
+        return [[list(labels), value] for labels, value in values.items()]
+
+    def render(self, values=None):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        items = sorted((self.snapshot() if values is None else values).items())
+        for labels, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {}  # labels → [compte par borne..., +Inf, somme]
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(labels)
+            if state is None:
+                state = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def snapshot(self):
+        with self.lock:
+            return {labels: list(state) for labels, state in self.values.items()}
+
+    def merge(self, values, exported):
+        """Ajoute les valeurs publiées par un autre worker ([[labels], état])"""
+        for labels, state in exported:
+            # Bornes différentes (autre version du code) : ignoré
+            if len(state) != len(self.buckets) + 2:
+                continue
+            labels = tuple(labels)
+            current = values.get(labels)
+            if current is None:
+                values[labels] = list(state)
+            else:
+                values[labels] = [a + b for a, b in zip(current, state)]
+
+    def export(self, values):
+        return [[list(labels), state] for labels, state in values.items()]
+
+    def render(self, values=None):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        items = sorted((self.snapshot() if values is None else values).items())
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_value(round(state[-1], 6))}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self, shared=None):
+        """shared : SharedCache où agréger les mesures des workers (None = ce processus seul)"""
+        self.metrics = []
+        self.collectors = []
+        self.shared = shared
+        self.pid = os.getpid()
+        self.publisher_pid = None
+        self.worker_key = None
+        self.lock = threading.Lock()
+
+    def ensure_publisher(self):
+        """Démarre la publication périodique dans ce processus (après le fork de gunicorn)"""
+        if self.shared is None or not self.shared.enabled or self.publisher_pid == os.getpid():
+            return
+        with self.lock:
+            pid = os.getpid()
+            if self.publisher_pid == pid:
+                return
+            if pid != self.pid:
+                # Forké (gunicorn --preload) : les mesures du maître ne sont pas celles de ce worker
+                for metric in self.metrics:
+                    with metric.lock:
+                        metric.values.clear()
+                self.pid = pid
+            # pid + date de démarrage : un pid réutilisé n'écrase pas un worker arrêté
+            self.worker_key = f'{pid}-{time.time():.0f}'
+            self.publisher_pid = pid
+            threading.Thread(target=self._publish_loop, args=(self.worker_key,), daemon=True).start()
+
+    def _publish_loop(self, worker_key):
+        while self.worker_key == worker_key:
+            self.publish()
+            time.sleep(METRICS_PUBLISH_INTERVAL)
+
+    def publish(self):
+        if self.shared is None or self.worker_key is None:
+            return
+        data = {metric.name: metric.export(metric.snapshot()) for metric in self.metrics}
+        self.shared.set(SHARED_NAMESPACE, self.worker_key, json.dumps(data).encode('utf-8'), METRICS_RETENTION)
+
+    def _merged(self):
+        """Valeurs de ce worker + celles publiées par les autres ; (valeurs par métrique, workers)"""
+        merged = {metric.name: metric.snapshot() for metric in self.metrics}
+        workers = 1
+        if self.shared is not None and self.worker_key is not None:
+            for key, data in self.shared.items(SHARED_NAMESPACE):
+                if key == self.worker_key:
+                    continue
+                try:
+                    exported = json.loads(data)
+                except ValueError:
+                    continue
+                workers += 1
+                for metric in self.metrics:
+                    metric.merge(merged[metric.name], exported.get(metric.name, []))
+        return merged, workers
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """collector() → liste de (nom, aide, type, {labels: valeur})"""
+        self.collectors.append(collector)
+
+    def render(self):
+        self.ensure_publisher()
+        merged, workers = self._merged()
+        lines = [
+            '# HELP metrics_workers Workers dont les mesures sont agrégées',
+            '# TYPE metrics_workers gauge',
+            f'metrics_workers {workers}',
+        ]
+        for metric in self.metrics:
+            lines.extend(metric.render(merged[metric.name]))
+        for collector in self.collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"[Metrics] ⚠️  Collecteur en erreur: {e}")
+                continue
+            for name, documentation, kind, samples in families:
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples.items():
+                    names = [n for n, _ in labels]
+                    values = [v for _, v in labels]
+                    lines.append(f'{name}{_format_labels(names, values)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+# ============ MÉTRIQUES ============
+
+registry = Registry(shared=shared_cache)
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    'http_request_duration_seconds', 'Durée de traitement des requêtes HTTP', ('route',))
+HTTP_REQUESTS = registry.counter(
+    'http_requests_total', 'Requêtes HTTP par route, méthode et statut', ('route', 'method', 'status'))
+
+EXTRACT_DURATION = registry.histogram(
+    'extract_duration_seconds', "Durée d'extraction par couche (kodi/native) et extracteur", ('layer', 'extractor'))
+EXTRACT_RESULTS = registry.counter(
+    'extract_results_total', "Résultats d'extraction par couche et extracteur", ('layer', 'extractor', 'result'))
+
+SCRAPER_DURATION = registry.histogram(
+    'scraper_duration_seconds', 'Durée des fonctions de scraping', ('function',))
+SCRAPER_CALLS = registry.counter(
+    'scraper_calls_total', 'Appels des fonctions de scraping', ('function', 'result'))
+
+UPSTREAM_BYTES = registry.counter(
+    'upstream_bytes_total', 'Octets téléchargés en amont par profil HTTP', ('profile',))
+UPSTREAM_REQUESTS = registry.counter(
+    'upstream_requests_total', 'Requêtes en amont par profil HTTP et statut', ('profile', 'status'))
+
+# ============ INSTRUMENTATION ============
+
+def result_label(result):
+    """Issue d'un résultat {'success': ...} : success, failure, timeout, circuit_open, busy"""
+    if not isinstance(result, dict):
+        return 'failure'
+    if result.get('success'):
+        return 'success'
+    if result.get('timeout'):
+        return 'timeout'
+    if result.get('circuit_open'):
+        return 'circuit_open'
+    if result.get('busy'):
+        return 'busy'
+    return 'failure'
+
+
+def record_extraction(layer, result, duration):
+    """Mesure d'une extraction (label : champ 'extractor' du résultat)"""
+    extractor = (result.get('extractor') if isinstance(result, dict) else None) or 'unknown'
+    EXTRACT_DURATION.observe(duration, layer, extractor)
+    EXTRACT_RESULTS.inc(layer, extractor, result_label(result))
+
+
+def record_request(route, method, status, duration):
+    """Mesure d'une requête HTTP (Flask ou routes ASGI)"""
+    registry.ensure_publisher()
+    HTTP_REQUEST_DURATION.observe(duration, route)
+    HTTP_REQUESTS.inc(route, method, str(status))
+
+
+def instrumented(function_name):
+    """Décorateur pour les fonctions de scraping (durée + issue, span dans la trace)"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = 'error'
+            try:
+                with span(function_name):
+                    result = fn(*args, **kwargs)
+                outcome = result_label(result)
+                return result
+            finally:
+                SCRAPER_DURATION.observe(time.perf_counter() - started, function_name)
+                SCRAPER_CALLS.inc(function_name, outcome)
+        return wrapper
+    return decorator
+
+
+def instrument_app(app):
+    """Durée et compteur par route (règle Flask, pas l'URL brute)"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            record_request(route, request.method, response.status_code, time.perf_counter() - started)
+        return response
+
+    return app
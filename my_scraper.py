@@ -2,133 +2,93 @@
 import requests
 import re
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
+from page_cache import page_cache
+from parse_cache import parsed_cache
+from metrics import instrumented
+from hoster_routing import hoster_router
+
+try:
+    import lxml.html
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+    print("⚠️  lxml non installé - parsing BeautifulSoup (plus lent)")
+
+# Nombre maximal de pages parcourues par crawl_catalogue
+MAX_CRAWL_PAGES = 200
+
+# ============ REGEX ET SÉLECTEURS PRÉCOMPILÉS ============
+
+MOV_CLEARFIX_RE = re.compile(r'mov\s+clearfix')
+MOV_ANY_RE = re.compile(r'.*mov.*')
+SEASON_CLASS_RE = re.compile(r'sai')
+DESC_CLASS_RE = re.compile(r'desc')
+VERSION_RE = re.compile(r'Version[^>]*>([^<]+)')
+WHITESPACE_RE = re.compile(r'\s+')
+YEAR_RE = re.compile(r'\b(19|20)\d{2}\b')
+SYNOPSIS_RE = re.compile(r'Synopsis[:\s]*(.+)', re.IGNORECASE)
+LEADING_YEAR_RE = re.compile(r'^\s*(19|20)\d{2}\s*[-:]?\s*')
+NEXT_PAGE_CLASS_RE = re.compile(r'next|suivant|>', re.I)
+PAGE_NUMBER_RE = re.compile(r'page/(\d+)/')
+
+# Section des épisodes : paires numéro!url, ou URLs seules
+EPISODES_START_MARKER = 'class="eps"'
+EPISODES_END_MARKER = '/div>'
+EPISODE_RE = re.compile(r'(\d+)!([^\s,]+)')
+BARE_URL_RE = re.compile(r'https?://[^\s,]+')
+
+# Qualités reconnues (par ordre de priorité) et fenêtre de contexte autour d'une URL
+QUALITY_KEYWORDS = (
+    ('1080p', ('1080p', 'fullhd', 'fhd')),
+    ('720p', ('720p', 'hdready', 'hd')),
+    ('4K', ('4k', '2160p', 'uhd')),
+    ('480p', ('480p', 'sd')),
+    ('360p', ('360p', 'low')),
+)
+QUALITY_CONTEXT = 150
+
+# Genres : conteneur dont la classe/l'id parle de genre ou de catégorie, sinon liens /genre/
+GENRE_CONTAINER_CSS = ', '.join(
+    f'{tag}[{attr}*="{word}"] a[href]'
+    for tag in ('div', 'section', 'ul', 'nav')
+    for attr in ('class', 'id')
+    for word in ('genre', 'categor')
+)
+GENRE_HREF_CSS = 'a[href*="/genre"]'
+
+if LXML_AVAILABLE:
+    XPATH_MOV_DIVS = etree.XPath("//div[contains(@class, 'mov')]")
+    XPATH_FIRST_IMG = etree.XPath("(.//img)[1]")
+    XPATH_FIRST_LINK = etree.XPath("(.//a[@href])[1]")
+    XPATH_FIRST_SEASON = etree.XPath("(.//*[contains(@class, 'sai')])[1]")
+    XPATH_FIRST_DESC = etree.XPath("(.//*[contains(@class, 'desc')])[1]")
+    XPATH_TEXTS = etree.XPath(".//text()[not(ancestor::script or ancestor::style)]")
+    XPATH_CLASSED_LINKS = etree.XPath("//a[@class]")
+    XPATH_GENRE_CONTAINER_LINKS = etree.XPath(
+        "//*[self::div or self::section or self::ul or self::nav]"
+        "[contains(@class, 'genre') or contains(@id, 'genre') or contains(@class, 'categor') or contains(@id, 'categor')]"
+        "//a[@href]"
+    )
+    XPATH_GENRE_HREF_LINKS = etree.XPath("//a[contains(@href, '/genre')]")
+
+@instrumented('get_animes_from_page')
 def get_animes_from_page(page_url, max_results=30):
     """
     Récupère la liste des animés depuis une page
     Remplace la fonction showAnimes() de l'addon Kodi
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Accept-Language': 'fr,fr-FR;q=0.8,en-US;q=0.5,en;q=0.3',
-        'Accept-Encoding': 'gzip, deflate',
-        'DNT': '1',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1'
-    }
-    
     try:
-        # 1. Récupération de la page
-        response = requests.get(page_url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        # Forcer l'encodage UTF-8
-        response.encoding = 'utf-8'
-        html_content = response.text
-        
-        # 2. Utiliser BeautifulSoup pour parser
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # 3. Chercher les animés
-        anime_containers = soup.find_all('div', class_=re.compile(r'mov\s+clearfix'))
-        
-        # Si pas trouvé avec classe, chercher par structure
-        if not anime_containers:
-            anime_containers = soup.find_all('div', {'class': re.compile(r'.*mov.*')})
-        
-        animes_list = []
-        
-        # 4. Extraire les données pour chaque animé
-        for container in anime_containers[:max_results]:
-            try:
-                anime_data = {}
-                
-                # Image et titre
-                img_tag = container.find('img')
-                if img_tag:
-                    anime_data['thumbnail'] = img_tag.get('src', '')
-                    anime_data['title'] = img_tag.get('alt', '')
-                else:
-                    anime_data['thumbnail'] = ''
-                    anime_data['title'] = ''
-                
-                # Lien vers la page de l'animé
-                link_tag = container.find('a', href=True)
-                if link_tag:
-                    anime_data['url'] = link_tag['href']
-                else:
-                    anime_data['url'] = ''
-                
-                # Saison (nettoyée des tabulations)
-                season_tag = container.find(class_=re.compile(r'sai'))
-                if season_tag:
-                    # Nettoyer les tabulations et sauts de ligne
-                    season_text = season_tag.get_text()
-                    season_text = re.sub(r'[\t\n]+', ' ', season_text)
-                    season_text = re.sub(r'\s+', ' ', season_text)
-                    anime_data['season'] = season_text.strip()
-                else:
-                    anime_data['season'] = ''
-                
-                # Version (VF/VOSTFR)
-                version_match = re.search(r'Version[^>]*>([^<]+)', str(container))
-                anime_data['version'] = version_match.group(1).strip() if version_match else ''
-                
-                # Description et année
-                desc_tag = container.find(class_=re.compile(r'desc'))
-                if desc_tag:
-                    full_text = desc_tag.get_text(strip=True)
-                    
-                    # Extraire l'année
-                    year_match = re.search(r'\b(19|20)\d{2}\b', full_text)
-                    anime_data['year'] = year_match.group(0) if year_match else ''
-                    
-                    # Extraire la vraie description
-                    synopsis_match = re.search(r'Synopsis[:\s]*(.+)', full_text, re.IGNORECASE)
-                    if synopsis_match:
-                        anime_data['description'] = synopsis_match.group(1).strip()
-                    else:
-                        # Enlever l'année au début si présente
-                        cleaned_text = re.sub(r'^\s*(19|20)\d{2}\s*[-:]?\s*', '', full_text)
-                        if cleaned_text and len(cleaned_text) > 10:
-                            anime_data['description'] = cleaned_text[:100] + '...' if len(cleaned_text) > 100 else cleaned_text
-                        else:
-                            anime_data['description'] = 'Description non disponible'
-                else:
-                    anime_data['description'] = ''
-                    anime_data['year'] = ''
-                
-                # Nettoyer et compléter les URLs
-                if anime_data['thumbnail'] and anime_data['thumbnail'].startswith('/'):
-                    anime_data['thumbnail'] = 'https://www.frenchanime.com' + anime_data['thumbnail']
-                
-                if anime_data['url'] and anime_data['url'].startswith('/'):
-                    anime_data['url'] = 'https://www.frenchanime.com' + anime_data['url']
-                
-                # Nettoyer le titre
-                if anime_data['title']:
-                    anime_data['title'] = anime_data['title'].replace(' wiflix', '').strip()
-                
-                # Déterminer le type (film ou série)
-                anime_data['type'] = 'film' if 'films-vf-vostfr' in anime_data['url'] else 'serie'
-                
-                # Ajouter seulement si on a au moins un titre
-                if anime_data['title']:
-                    animes_list.append(anime_data)
-                    
-            except Exception as e:
-                # Ignorer les erreurs sur un animé spécifique
-                continue
-        
-        return {
-            'success': True,
-            'source_url': page_url,
-            'count': len(animes_list),
-            'results': animes_list,
-            'next_page': _find_next_page(html_content, page_url)
-        }
+        # Page récupérée via le cache ; parsing sauté si le HTML n'a pas changé
+        return parsed_cache.get(
+            'animes', page_url,
+            fetch=lambda: page_cache.fetch(page_url, profile='browser', encoding='utf-8', timeout=15),
+            parse=lambda page: parse_animes_html(page.text('utf-8'), page_url, max_results),
+            variant=max_results
+        )
         
     except requests.RequestException as e:
         return {
@@ -145,93 +105,299 @@ def get_animes_from_page(page_url, max_results=30):
             'results': []
         }
 
-def get_episodes_from_anime(anime_url):
+def _fetch_listing_html(page_url):
+    """Télécharge une page de liste (encodage UTF-8 forcé, via le cache de pages)"""
+    return page_cache.fetch_text(page_url, profile='browser', encoding='utf-8', timeout=15)
+
+def crawl_catalogue(start_url, max_pages=50, known_urls=None, state=None):
     """
-    Récupère tous les épisodes d'un animé
-    Version améliorée avec détection de qualité
+    Parcourt les pages de liste en suivant next_page et produit les animés
+    au fur et à mesure. La page suivante est téléchargée en arrière-plan
+    pendant que l'appelant consomme la page courante.
+    S'arrête sur page déjà vue (cycle), page sans nouvel animé, ou erreur.
+    known_urls(urls) -> set : animés déjà indexés ; une page qui n'en
+    contient que des connus arrête le crawl (rafraîchissement incrémental).
+    state (dict) : state['resume'] reçoit la page d'où reprendre un crawl
+    interrompu (erreur, max_pages), None quand la liste a été parcourue
+    (dernière page ou 404 au-delà).
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
+    seen_pages = set()
+    seen_animes = set()
+    if state is None:
+        state = {}
+    state['resume'] = start_url
     
-    try:
-        response = requests.get(anime_url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        # Technique pour garder la structure
-        html_content = response.text.replace('\n', '###NEWLINE###')
-        
-        # Chercher la section des épisodes
-        start_marker = 'class="eps"'
-        end_marker = '/div>'
-        
-        start_index = html_content.find(start_marker)
-        if start_index == -1:
-            return {
-                'success': False,
-                'error': 'Section des épisodes non trouvée',
-                'episodes': []
-            }
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        page_url = start_url
+        pending = prefetcher.submit(_fetch_listing_html, page_url)
         
-        # Trouver la fin de la section
-        end_index = html_content.find(end_marker, start_index)
-        if end_index == -1:
-            eps_section = html_content[start_index:]
+        for _ in range(max_pages):
+            seen_pages.add(page_url)
+            state['resume'] = page_url
+            try:
+                html_content = pending.result()
+            except Exception as e:
+                # 404 : page devinée au-delà de la dernière, la liste est finie
+                if getattr(getattr(e, 'response', None), 'status_code', None) == 404:
+                    state['resume'] = None
+                print(f"[Crawler] Arrêt sur {page_url}: {e}")
+                return
+            
+            page = parse_animes_html(html_content, page_url, max_results=1000)
+            next_url = page.get('next_page')
+            
+            # Précharger la page suivante avant de rendre la main
+            if next_url and next_url not in seen_pages:
+                pending = prefetcher.submit(_fetch_listing_html, next_url)
+            else:
+                next_url = None
+            
+            known = known_urls([a['url'] for a in page['results']]) if known_urls else set()
+            
+            new_count = 0
+            for anime in page['results']:
+                key = anime['url'] or anime['title']
+                if key in seen_animes:
+                    continue
+                seen_animes.add(key)
+                if anime['url'] not in known:
+                    new_count += 1
+                yield anime
+            
+            if not next_url or new_count == 0:
+                if next_url:
+                    pending.cancel()
+                state['resume'] = None
+                return
+            page_url = next_url
+            state['resume'] = next_url
+
+@instrumented('parse_animes_html')
+def parse_animes_html(html_content, page_url, max_results=30):
+    """
+    Extrait les animés d'une page de liste déjà téléchargée (sans I/O)
+    Un seul parsing lxml pour les cartes et la pagination
+    """
+    if not LXML_AVAILABLE:
+        return _parse_animes_html_bs4(html_content, page_url, max_results)
+    
+    root = _lxml_document(html_content)
+    
+    # 1. Chercher les animés (un seul passage XPath, filtre regex sur la classe)
+    candidates = XPATH_MOV_DIVS(root) if root is not None else []
+    anime_containers = [div for div in candidates if MOV_CLEARFIX_RE.search(' '.join(div.get('class', '').split()))]
+    
+    # Si pas trouvé avec classe, chercher par structure
+    if not anime_containers:
+        anime_containers = candidates
+    
+    animes_list = []
+    
+    # 2. Extraire les données pour chaque animé
+    for container in anime_containers[:max_results]:
+        try:
+            img_tag = _first(XPATH_FIRST_IMG(container))
+            link_tag = _first(XPATH_FIRST_LINK(container))
+            season_tag = _first(XPATH_FIRST_SEASON(container))
+            desc_tag = _first(XPATH_FIRST_DESC(container))
+            
+            anime_data = _build_anime_record(
+                thumbnail=img_tag.get('src', '') if img_tag is not None else '',
+                title=img_tag.get('alt', '') if img_tag is not None else '',
+                url=link_tag.get('href') if link_tag is not None else '',
+                season_text=''.join(XPATH_TEXTS(season_tag)) if season_tag is not None else None,
+                version=_lxml_version(container),
+                desc_text=''.join(s.strip() for s in XPATH_TEXTS(desc_tag)) if desc_tag is not None else None
+            )
+            
+            # Ajouter seulement si on a au moins un titre
+            if anime_data['title']:
+                animes_list.append(anime_data)
+                
+        except Exception as e:
+            # Ignorer les erreurs sur un animé spécifique
+            continue
+    
+    return {
+        'success': True,
+        'source_url': page_url,
+        'count': len(animes_list),
+        'results': animes_list,
+        'next_page': _find_next_page_lxml(root, page_url)
+    }
+
+def _build_anime_record(thumbnail, title, url, season_text, version, desc_text):
+    """
+    Construit la fiche d'un animé à partir des champs bruts d'une carte
+    (season_text / desc_text à None si la balise est absente)
+    """
+    anime_data = {
+        'thumbnail': thumbnail or '',
+        'title': title or '',
+        'url': url or '',
+        'season': '',
+        'version': version,
+        'year': '',
+        'description': ''
+    }
+    
+    # Saison (nettoyée des tabulations et sauts de ligne)
+    if season_text is not None:
+        anime_data['season'] = WHITESPACE_RE.sub(' ', season_text).strip()
+    
+    # Description et année
+    if desc_text is not None:
+        full_text = desc_text
+        
+        # Extraire l'année
+        year_match = YEAR_RE.search(full_text)
+        anime_data['year'] = year_match.group(0) if year_match else ''
+        
+        # Extraire la vraie description
+        synopsis_match = SYNOPSIS_RE.search(full_text)
+        if synopsis_match:
+            anime_data['description'] = synopsis_match.group(1).strip()
         else:
-            eps_section = html_content[start_index:end_index]
-        
-        # Restaurer les sauts de ligne
-        eps_section = eps_section.replace('###NEWLINE###', '\n')
-        
-        # Nettoyer les URLs
-        eps_section = eps_section.replace('!//', '!https://').replace(',//', ',https://')
-        
-        # Chercher les épisodes avec regex
-        episodes = []
-        
-        # Méthode 1: Chercher les paires numéro!url avec qualité
-        pattern1 = r'(\d+)!([^\s,]+)'
-        matches1 = re.findall(pattern1, eps_section)
-        
-        for episode_num, url in matches1:
-            quality = _detect_video_quality(url, eps_section)
-            host = _extract_host_from_url(url)
+            # Enlever l'année au début si présente
+            cleaned_text = LEADING_YEAR_RE.sub('', full_text)
+            if cleaned_text and len(cleaned_text) > 10:
+                anime_data['description'] = cleaned_text[:100] + '...' if len(cleaned_text) > 100 else cleaned_text
+            else:
+                anime_data['description'] = 'Description non disponible'
+    
+    # Nettoyer et compléter les URLs
+    if anime_data['thumbnail'].startswith('/'):
+        anime_data['thumbnail'] = 'https://www.frenchanime.com' + anime_data['thumbnail']
+    
+    if anime_data['url'].startswith('/'):
+        anime_data['url'] = 'https://www.frenchanime.com' + anime_data['url']
+    
+    # Nettoyer le titre
+    if anime_data['title']:
+        anime_data['title'] = anime_data['title'].replace(' wiflix', '').strip()
+    
+    # Déterminer le type (film ou série)
+    anime_data['type'] = 'film' if 'films-vf-vostfr' in anime_data['url'] else 'serie'
+    
+    return anime_data
+
+def _lxml_document(html_content):
+    """Parse le HTML une seule fois avec lxml (None si document vide)"""
+    try:
+        return lxml.html.document_fromstring(html_content)
+    except ValueError:
+        # Chaîne avec déclaration d'encodage XML : passer par les octets
+        return lxml.html.document_fromstring(html_content.encode('utf-8'))
+    except etree.ParserError:
+        return None
+
+def _first(nodes):
+    return nodes[0] if nodes else None
+
+def _tag_chunks(element, is_root=True):
+    """
+    Parcourt le sous-arbre dans l'ordre de sérialisation :
+    (valeurs contenues dans la balise, texte qui suit la balise)
+    """
+    if isinstance(element.tag, str):
+        yield element.attrib.values(), element.text
+        for child in element:
+            yield from _tag_chunks(child, False)
+        yield (), (None if is_root else element.tail)
+    else:
+        # Commentaire : son contenu fait partie de la balise
+        yield (element.text or '',), element.tail
+
+def _lxml_version(container):
+    """
+    Équivalent de re.search(r'Version[^>]*>([^<]+)', str(container)) sans
+    re-sérialiser la carte : texte qui suit la première balise après 'Version'
+    """
+    capture_next = False
+    for tag_values, chunk in _tag_chunks(container):
+        if not capture_next and any('Version' in value for value in tag_values):
+            capture_next = True
+        
+        if capture_next:
+            if chunk:
+                return chunk.strip()
+            capture_next = False
+        if chunk and 'Version' in chunk:
+            capture_next = True
+    return ''
+
+def _find_next_page_lxml(root, current_url):
+    """Trouve l'URL de la page suivante dans le document déjà parsé"""
+    try:
+        if root is not None:
+            for link in XPATH_CLASSED_LINKS(root):
+                if NEXT_PAGE_CLASS_RE.search(' '.join(link.get('class', '').split())) and link.get('href'):
+                    next_url = link.get('href')
+                    if next_url.startswith('/'):
+                        parsed = urlparse(current_url)
+                        next_url = f"{parsed.scheme}://{parsed.netloc}{next_url}"
+                    return next_url
+        
+        return _guess_next_page(current_url)
+        
+    except Exception:
+        return None
+
+def _parse_animes_html_bs4(html_content, page_url, max_results=30):
+    """
+    Ancienne implémentation BeautifulSoup (repli sans lxml, référence des benchmarks)
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    
+    anime_containers = soup.find_all('div', class_=MOV_CLEARFIX_RE)
+    if not anime_containers:
+        anime_containers = soup.find_all('div', {'class': MOV_ANY_RE})
+    
+    animes_list = []
+    
+    for container in anime_containers[:max_results]:
+        try:
+            img_tag = container.find('img')
+            link_tag = container.find('a', href=True)
+            season_tag = container.find(class_=SEASON_CLASS_RE)
+            version_match = VERSION_RE.search(str(container))
+            desc_tag = container.find(class_=DESC_CLASS_RE)
             
-            episodes.append({
-                'episode': episode_num,
-                'url': url,
-                'quality': quality,
-                'host': host
-            })
-        
-        # Méthode 2: Chercher les URLs seules
-        if not episodes:
-            pattern2 = r'(https?://[^\s,]+)'
-            urls = re.findall(pattern2, eps_section)
+            anime_data = _build_anime_record(
+                thumbnail=img_tag.get('src', '') if img_tag else '',
+                title=img_tag.get('alt', '') if img_tag else '',
+                url=link_tag['href'] if link_tag else '',
+                season_text=season_tag.get_text() if season_tag else None,
+                version=version_match.group(1).strip() if version_match else '',
+                desc_text=desc_tag.get_text(strip=True) if desc_tag else None
+            )
             
-            for i, url in enumerate(urls, 1):
-                quality = _detect_video_quality(url, eps_section)
-                host = _extract_host_from_url(url)
+            if anime_data['title']:
+                animes_list.append(anime_data)
                 
-                episodes.append({
-                    'episode': str(i),
-                    'url': url,
-                    'quality': quality,
-                    'host': host
-                })
-        
-        # Analyser les qualités disponibles
-        qualities = list(set(ep['quality'] for ep in episodes))
-        hosts = list(set(ep['host'] for ep in episodes))
-        
-        return {
-            'success': True,
-            'anime_url': anime_url,
-            'episodes': episodes,
-            'total_episodes': len(episodes),
-            'qualities_available': qualities,
-            'hosts_available': hosts
-        }
+        except Exception as e:
+            continue
+    
+    return {
+        'success': True,
+        'source_url': page_url,
+        'count': len(animes_list),
+        'results': animes_list,
+        'next_page': _find_next_page(html_content, page_url)
+    }
+
+@instrumented('get_episodes_from_anime')
+def get_episodes_from_anime(anime_url):
+    """
+    Récupère tous les épisodes d'un animé
+    Version améliorée avec détection de qualité
+    """
+    try:
+        return parsed_cache.get(
+            'episodes', anime_url,
+            fetch=lambda: page_cache.fetch(anime_url, profile='browser', timeout=15),
+            parse=lambda page: parse_episodes_html(page.text(), anime_url)
+        )
         
     except Exception as e:
         return {
@@ -241,58 +407,84 @@ def get_episodes_from_anime(anime_url):
             'episodes': []
         }
 
+@instrumented('parse_episodes_html')
+def parse_episodes_html(html, anime_url):
+    """
+    Extrait les épisodes d'une page d'animé déjà téléchargée (sans I/O)
+    Un seul passage sur la section class="eps" : numéro, url, qualité
+    et hébergeur produits au fil de l'eau (pas de copie de la page entière)
+    """
+    # Chercher la section des épisodes
+    start_index = html.find(EPISODES_START_MARKER)
+    if start_index == -1:
+        return {
+            'success': False,
+            'error': 'Section des épisodes non trouvée',
+            'episodes': []
+        }
+    
+    # Trouver la fin de la section
+    end_index = html.find(EPISODES_END_MARKER, start_index)
+    eps_section = html[start_index:end_index] if end_index != -1 else html[start_index:]
+    
+    # Nettoyer les URLs
+    eps_section = eps_section.replace('!//', '!https://').replace(',//', ',https://')
+    
+    # Minuscules une seule fois pour les fenêtres de contexte
+    # (sauf si la conversion change la longueur : positions décalées)
+    lowered = eps_section.lower()
+    if len(lowered) != len(eps_section):
+        lowered = None
+    
+    # Méthode 1: paires numéro!url ; méthode 2: URLs seules
+    matches = [(m.group(1), m.group(2), m.start(2)) for m in EPISODE_RE.finditer(eps_section)]
+    if not matches:
+        matches = [(str(i), m.group(0), m.start()) for i, m in enumerate(BARE_URL_RE.finditer(eps_section), 1)]
+    
+    episodes = []
+    first_position = {}
+    for episode_num, url, position in matches:
+        # Contexte autour de la première occurrence de l'URL
+        position = first_position.setdefault(url, position)
+        episodes.append({
+            'episode': episode_num,
+            'url': url,
+            'quality': _episode_quality(url, eps_section, lowered, position),
+            'host': _extract_host_from_url(url)
+        })
+    
+    # Analyser les qualités disponibles
+    qualities = list(dict.fromkeys(ep['quality'] for ep in episodes))
+    hosts = list(dict.fromkeys(ep['host'] for ep in episodes))
+    
+    return {
+        'success': True,
+        'anime_url': anime_url,
+        'episodes': episodes,
+        'total_episodes': len(episodes),
+        'qualities_available': qualities,
+        'hosts_available': hosts
+    }
+
+def _episode_quality(url, section, lowered, position):
+    """Qualité d'un épisode : l'URL d'abord, puis ±QUALITY_CONTEXT caractères autour"""
+    quality = _quality_in(url.lower())
+    if quality:
+        return quality
+    
+    start = max(0, position - QUALITY_CONTEXT)
+    end = min(len(section), position + QUALITY_CONTEXT)
+    surrounding = lowered[start:end] if lowered is not None else section[start:end].lower()
+    return _quality_in(surrounding) or 'Qualité variable'
+
+@instrumented('get_genres_from_page')
 def get_genres_from_page(base_url):
     """
     Récupère la liste des genres disponibles
     """
     try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(base_url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Chercher la section des genres
-        genres_section = None
-        
-        for tag in soup.find_all(['div', 'section']):
-            if 'genre' in str(tag).lower() or 'catégorie' in str(tag).lower():
-                genres_section = tag
-                break
-        
-        genres_list = []
-        
-        if genres_section:
-            genre_links = genres_section.find_all('a', href=True)
-            
-            for link in genre_links:
-                genre_name = link.get_text(strip=True)
-                genre_url = link['href']
-                
-                if genre_name and len(genre_name) > 1:
-                    if genre_url.startswith('/'):
-                        genre_url = 'https://www.frenchanime.com' + genre_url
-                    
-                    genres_list.append({
-                        'name': genre_name.capitalize(),
-                        'url': genre_url,
-                        'slug': genre_name.lower().replace(' ', '-')
-                    })
-        
-        # Liste par défaut si rien trouvé
-        if not genres_list:
-            default_genres = ['Action', 'Aventure', 'Comédie', 'Drame', 'Fantaisie', 
-                            'Horreur', 'Mystère', 'Romance', 'Sci-Fi', 'Sport']
-            genres_list = [
-                {'name': g, 'url': f'{base_url}/genre/{g.lower()}', 'slug': g.lower()}
-                for g in default_genres
-            ]
-        
-        return {
-            'success': True,
-            'genres': genres_list,
-            'count': len(genres_list)
-        }
+        html = page_cache.fetch_text(base_url, profile='minimal', timeout=15)
+        return parse_genres_html(html, base_url)
         
     except Exception as e:
         return {
@@ -301,6 +493,59 @@ def get_genres_from_page(base_url):
             'genres': []
         }
 
+@instrumented('parse_genres_html')
+def parse_genres_html(html, base_url):
+    """
+    Extrait les genres d'une page déjà téléchargée (sans I/O)
+    Sélecteurs ciblés : liens d'un conteneur dont la classe/l'id parle de
+    genre ou de catégorie, sinon liens vers /genre/
+    """
+    if LXML_AVAILABLE:
+        root = _lxml_document(html)
+        links = []
+        if root is not None:
+            links = XPATH_GENRE_CONTAINER_LINKS(root) or XPATH_GENRE_HREF_LINKS(root)
+        pairs = [(link.text_content(), link.get('href', '')) for link in links]
+    else:
+        soup = BeautifulSoup(html, 'html.parser')
+        links = soup.select(GENRE_CONTAINER_CSS) or soup.select(GENRE_HREF_CSS)
+        pairs = [(link.get_text(), link.get('href', '')) for link in links]
+    
+    genres_list = []
+    seen_urls = set()
+    
+    for genre_name, genre_url in pairs:
+        genre_name = genre_name.strip()
+        
+        if genre_name and len(genre_name) > 1 and genre_url:
+            if genre_url.startswith('/'):
+                genre_url = 'https://www.frenchanime.com' + genre_url
+            
+            if genre_url in seen_urls:
+                continue
+            seen_urls.add(genre_url)
+            
+            genres_list.append({
+                'name': genre_name.capitalize(),
+                'url': genre_url,
+                'slug': genre_name.lower().replace(' ', '-')
+            })
+    
+    # Liste par défaut si rien trouvé
+    if not genres_list:
+        default_genres = ['Action', 'Aventure', 'Comédie', 'Drame', 'Fantaisie', 
+                        'Horreur', 'Mystère', 'Romance', 'Sci-Fi', 'Sport']
+        genres_list = [
+            {'name': g, 'url': f'{base_url}/genre/{g.lower()}', 'slug': g.lower()}
+            for g in default_genres
+        ]
+    
+    return {
+        'success': True,
+        'genres': genres_list,
+        'count': len(genres_list)
+    }
+
 def _find_next_page(html_content, current_url):
     """
     Trouve l'URL de la page suivante
@@ -308,7 +553,7 @@ def _find_next_page(html_content, current_url):
     try:
         soup = BeautifulSoup(html_content, 'html.parser')
         
-        next_link = soup.find('a', class_=re.compile(r'next|suivant|>', re.I))
+        next_link = soup.find('a', class_=NEXT_PAGE_CLASS_RE)
         
         if next_link and next_link.get('href'):
             next_url = next_link['href']
@@ -317,49 +562,47 @@ def _find_next_page(html_content, current_url):
                 next_url = f"{parsed.scheme}://{parsed.netloc}{next_url}"
             return next_url
         
-        pattern = r'page/(\d+)/'
-        match = re.search(pattern, current_url)
-        
-        if match:
-            current_page = int(match.group(1))
-            return current_url.replace(f'page/{current_page}/', f'page/{current_page + 1}/')
-        
-        return None
+        return _guess_next_page(current_url)
         
     except:
         return None
 
+def _guess_next_page(current_url):
+    """Page suivante déduite de l'URL (…/page/N/ → …/page/N+1/)"""
+    match = PAGE_NUMBER_RE.search(current_url)
+    
+    if match:
+        current_page = int(match.group(1))
+        return current_url.replace(f'page/{current_page}/', f'page/{current_page + 1}/')
+    
+    return None
+
+def _quality_in(text_lower):
+    """Première qualité (par ordre de priorité) dont un mot-clé apparaît dans le texte"""
+    for quality_name, keywords in QUALITY_KEYWORDS:
+        if any(keyword in text_lower for keyword in keywords):
+            return quality_name
+    return None
+
 def _detect_video_quality(url, context=''):
     """
     Détecte la qualité vidéo depuis l'URL et le contexte
     """
-    url_lower = url.lower()
-    
     # Recherche directe dans l'URL
-    quality_keywords = [
-        ('1080p', ['1080p', 'fullhd', 'fhd']),
-        ('720p', ['720p', 'hdready', 'hd']),
-        ('4K', ['4k', '2160p', 'uhd']),
-        ('480p', ['480p', 'sd']),
-        ('360p', ['360p', 'low']),
-    ]
-    
-    for quality_name, keywords in quality_keywords:
-        if any(keyword in url_lower for keyword in keywords):
-            return quality_name
+    quality = _quality_in(url.lower())
+    if quality:
+        return quality
     
     # Recherche dans le contexte
     if context:
         url_index = context.find(url)
         if url_index != -1:
             # Regarder autour de l'URL
-            start = max(0, url_index - 150)
-            end = min(len(context), url_index + 150)
-            surrounding = context[start:end].lower()
-            
-            for quality_name, keywords in quality_keywords:
-                if any(keyword in surrounding for keyword in keywords):
-                    return quality_name
+            start = max(0, url_index - QUALITY_CONTEXT)
+            end = min(len(context), url_index + QUALITY_CONTEXT)
+            quality = _quality_in(context[start:end].lower())
+            if quality:
+                return quality
     
     # Si aucun marqueur trouvé
     return 'Qualité variable'
@@ -367,35 +610,6 @@ def _detect_video_quality(url, context=''):
 def _extract_host_from_url(url):
     """
     Extrait le nom de l'hébergeur depuis l'URL
+    (index partagé avec le routage des extracteurs Kodi, mémorisé par domaine)
     """
-    try:
-        parsed = urlparse(url)
-        hostname = parsed.netloc.lower()
-        
-        # Mapping des hébergeurs connus
-        host_mapping = {
-            'vidmoly': 'Vidmoly',
-            'voe': 'Voe',
-            'streamtape': 'Streamtape',
-            'dood': 'DoodStream',
-            'mp4upload': 'Mp4Upload',
-            'okru': 'OK.ru',
-            'youtube': 'YouTube',
-            'vimeo': 'Vimeo',
-            'uptostream': 'Uptostream',
-            'mystream': 'MyStream'
-        }
-        
-        for host_key, host_name in host_mapping.items():
-            if host_key in hostname:
-                return host_name
-        
-        # Extraire le nom de domaine principal
-        parts = hostname.split('.')
-        if len(parts) >= 2:
-            return parts[-2].capitalize()
-        
-        return hostname
-        
-    except:
-        return 'Hébergeur inconnu'
+    return hoster_router.label(url)
@@ -0,0 +1,352 @@
+"""
+page_cache.py
+Cache des pages du site (listes, fiches animés, genres)
+- LRU en mémoire borné en octets, corps stockés compressés (zlib)
+- Niveau partagé entre les workers (shared_cache) : une page téléchargée
+  ou revalidée par un worker est fraîche pour tous
+- Niveau disque optionnel (PAGE_CACHE_DIR) partagé entre redémarrages
+- Page fraîche (< PAGE_FRESH_TTL) servie directement, sinon
+  revalidation par GET conditionnel (If-None-Match / If-Modified-Since) :
+  un 304 évite de retélécharger le corps
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import http_client
+from shared_cache import shared_cache
+
+# ============ CONFIGURATION ============
+
+# Taille maximale des corps compressés gardés en mémoire
+PAGE_CACHE_MAX_BYTES = int(os.environ.get('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+# Durée pendant laquelle une page est servie sans revalidation (secondes)
+PAGE_FRESH_TTL = int(os.environ.get('PAGE_FRESH_TTL', 60))
+
+# Niveau disque (désactivé si vide) et sa taille maximale
+PAGE_CACHE_DIR = os.environ.get('PAGE_CACHE_DIR', '')
+PAGE_CACHE_DISK_MAX_BYTES = int(os.environ.get('PAGE_CACHE_DISK_MAX_BYTES', 256 * 1024 * 1024))
+
+# Durée de vie dans le cache partagé (les validateurs gèrent la fraîcheur)
+PAGE_SHARED_TTL = int(os.environ.get('PAGE_SHARED_TTL', 24 * 3600))
+SHARED_NAMESPACE = 'pages'
+
+COMPRESSION_LEVEL = 6
+
+
+class CachedPage:
+    """Corps compressé + validateurs d'une page"""
+
+    __slots__ = ('url', 'compressed', 'size', 'encoding', 'etag', 'last_modified', 'digest', 'validated_at')
+
+    def __init__(self, url, body, encoding, etag=None, last_modified=None, validated_at=None):
+        self.url = url
+        self.compressed = zlib.compress(body, COMPRESSION_LEVEL)
+        self.size = len(body)
+        self.encoding = encoding
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = hashlib.sha1(body).hexdigest()
+        self.validated_at = validated_at or time.time()
+
+    @classmethod
+    def restore(cls, header, compressed):
+        """Page relue depuis le niveau disque"""
+        return cls(header['url'], zlib.decompress(compressed), header.get('encoding'),
+                   etag=header.get('etag'), last_modified=header.get('last_modified'),
+                   validated_at=header.get('validated_at') or 0)
+
+    @property
+    def body(self):
+        return zlib.decompress(self.compressed)
+
+    def text(self, encoding=None):
+        return self.body.decode(encoding or self.encoding or 'utf-8', errors='replace')
+
+    def is_fresh(self, ttl, now):
+        return now - self.validated_at < ttl
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def header(self):
+        return {
+            'url': self.url,
+            'encoding': self.encoding,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'validated_at': self.validated_at,
+        }
+
+    def serialize(self):
+        """En-tête JSON sur une ligne + corps compressé (disque et cache partagé)"""
+        return json.dumps(self.header()).encode('utf-8') + b'\n' + self.compressed
+
+    @classmethod
+    def deserialize(cls, url, data):
+        """Page depuis serialize(), ou None si illisible ou d'une autre URL"""
+        try:
+            line, compressed = data.split(b'\n', 1)
+            header = json.loads(line)
+            if header.get('url') != url:
+                return None
+            return cls.restore(header, compressed)
+        except (ValueError, zlib.error):
+            return None
+
+
+class PageCache:
+    def __init__(self, max_bytes=PAGE_CACHE_MAX_BYTES, fresh_ttl=PAGE_FRESH_TTL,
+                 disk_dir=PAGE_CACHE_DIR, disk_max_bytes=PAGE_CACHE_DISK_MAX_BYTES, shared=shared_cache):
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.fresh_ttl = fresh_ttl
+        self.disk_dir = disk_dir or None
+        self.disk_max_bytes = disk_max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.disk_lock = threading.Lock()
+        self.disk_bytes = 0
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.not_modified = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self.disk_bytes = sum(e.stat().st_size for e in os.scandir(self.disk_dir) if e.is_file())
+
+    # ---------- Accès ----------
+
+    def fetch(self, url, profile='browser', encoding=None, timeout=http_client.DEFAULT_TIMEOUT):
+        """
+        Retourne la CachedPage à jour d'une URL (téléchargée, revalidée
+        ou servie depuis le cache). Lève requests.HTTPError sur statut d'erreur.
+        """
+        now = time.time()
+        page = self._lookup(url, now)
+
+        if page is not None and page.is_fresh(self.fresh_ttl, now):
+            with self.lock:
+                self.hits += 1
+                self.bytes_saved += page.size
+            return page
+
+        headers = page.conditional_headers() if page is not None else {}
+        response = http_client.get(url, profile=profile, headers=headers, timeout=timeout)
+
+        if page is not None and response.status_code == 304:
+            page.validated_at = now
+            with self.lock:
+                self.revalidations += 1
+                self.not_modified += 1
+                self.bytes_saved += page.size
+            self._store(page, persist=False)
+            self._touch(page)
+            return page
+
+        response.raise_for_status()
+        with self.lock:
+            if page is not None:
+                self.revalidations += 1
+            else:
+                self.misses += 1
+
+        page = CachedPage(
+            url,
+            response.content,
+            encoding or response.encoding or response.apparent_encoding,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            validated_at=now
+        )
+        self._store(page)
+        return page
+
+    def fetch_text(self, url, profile='browser', encoding=None, timeout=http_client.DEFAULT_TIMEOUT):
+        """Texte de la page (encodage forcé si `encoding`)"""
+        return self.fetch(url, profile=profile, encoding=encoding, timeout=timeout).text(encoding)
+
+    def _lookup(self, url, now):
+        with self.lock:
+            page = self.entries.get(url)
+            if page is not None:
+                self.entries.move_to_end(url)
+        if page is not None and page.is_fresh(self.fresh_ttl, now):
+            return page
+
+        # Absente ou périmée ici : un autre worker a pu la télécharger ou la revalider
+        shared = self._read_shared(url)
+        if shared is not None and (page is None or shared.validated_at > page.validated_at):
+            with self.lock:
+                self.shared_hits += 1
+            self._store(shared, persist=False)
+            return shared
+        if page is not None:
+            return page
+
+        page = self._read_disk(url)
+        if page is not None:
+            with self.lock:
+                self.disk_hits += 1
+            self._store(page, persist=False)
+        return page
+
+    def _store(self, page, persist=True):
+        stored = len(page.compressed)
+        if stored > self.max_bytes:
+            return
+
+        with self.lock:
+            previous = self.entries.pop(page.url, None)
+            if previous is not None:
+                self.bytes -= len(previous.compressed)
+            self.entries[page.url] = page
+            self.bytes += stored
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= len(evicted.compressed)
+                self.evictions += 1
+
+        if persist:
+            self._write_shared(page)
+            self._write_disk(page)
+
+    def invalidate(self, url):
+        with self.lock:
+            page = self.entries.pop(url, None)
+            if page is not None:
+                self.bytes -= len(page.compressed)
+        if self.shared is not None:
+            self.shared.delete(SHARED_NAMESPACE, url)
+        if self.disk_dir:
+            try:
+                os.remove(self._disk_path(url))
+            except OSError:
+                pass
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    # ---------- Niveau partagé ----------
+
+    def _read_shared(self, url):
+        if self.shared is None:
+            return None
+        data = self.shared.get(SHARED_NAMESPACE, url)
+        return CachedPage.deserialize(url, data) if data is not None else None
+
+    def _write_shared(self, page):
+        if self.shared is not None:
+            self.shared.set(SHARED_NAMESPACE, page.url, page.serialize(), PAGE_SHARED_TTL)
+
+    # ---------- Niveau disque ----------
+
+    def _disk_path(self, url):
+        return os.path.join(self.disk_dir, hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def _read_disk(self, url):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(url), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        return CachedPage.deserialize(url, data)
+
+    def _write_disk(self, page):
+        """Écriture atomique (fichier temporaire + rename)"""
+        if not self.disk_dir:
+            return
+        data = page.serialize()
+        path = self._disk_path(page.url)
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            with self.disk_lock:
+                try:
+                    self.disk_bytes -= os.path.getsize(path)
+                except OSError:
+                    pass
+                os.replace(tmp_path, path)
+                self.disk_bytes += len(data)
+        except OSError as e:
+            print(f"[PageCache] ⚠️  Écriture disque impossible: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        if self.disk_bytes > self.disk_max_bytes:
+            self._prune_disk()
+
+    def _touch(self, page):
+        """Après un 304 : date de validation mise à jour pour les autres workers et sur disque"""
+        self._write_shared(page)
+        if self.disk_dir:
+            self._write_disk(page)
+
+    def _prune_disk(self):
+        """Supprime les fichiers les plus anciens jusqu'à 90 % de la taille maximale"""
+        with self.disk_lock:
+            files = sorted(
+                (e for e in os.scandir(self.disk_dir) if e.is_file() and not e.name.startswith('.')),
+                key=lambda e: e.stat().st_mtime
+            )
+            target = self.disk_max_bytes * 0.9
+            for entry in files:
+                if self.disk_bytes <= target:
+                    break
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                    self.disk_bytes -= size
+                except OSError:
+                    pass
+
+    # ---------- Statistiques ----------
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.revalidations + self.misses
+            raw = sum(page.size for page in self.entries.values())
+            return {
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'uncompressed_bytes': raw,
+                'compression_ratio': round(raw / self.bytes, 2) if self.bytes else 0.0,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'not_modified': self.not_modified,
+                'hit_rate': round((self.hits + self.not_modified) / lookups, 4) if lookups else 0.0,
+                'bytes_saved': self.bytes_saved,
+                'evictions': self.evictions,
+                'disk_bytes': self.disk_bytes if self.disk_dir else None,
+            }
+
+# Instance globale
+page_cache = PageCache()
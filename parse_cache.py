@@ -0,0 +1,130 @@
+"""
+parse_cache.py
+Cache des résultats parsés de my_scraper (listes d'animés, épisodes)
+- Clé : (fonction, URL, variante) ; le résultat garde le hash du HTML
+  dont il est issu → une page inchangée n'est jamais re-parsée
+- stale-while-revalidate : après PARSED_TTL le résultat en cache est
+  servi immédiatement et rafraîchi en arrière-plan
+"""
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# ============ CONFIGURATION ============
+
+# Durée pendant laquelle un résultat est servi sans rafraîchissement (secondes)
+PARSED_TTL = int(os.environ.get('PARSED_TTL', 300))
+
+# Au-delà, un résultat périmé n'est plus servi (rafraîchissement bloquant)
+PARSED_MAX_STALE = int(os.environ.get('PARSED_MAX_STALE', 24 * 3600))
+
+PARSED_MAX_ENTRIES = 1000
+
+# Rafraîchissements simultanés en arrière-plan
+REFRESH_WORKERS = 2
+
+
+class ParsedCache:
+    def __init__(self, ttl=PARSED_TTL, max_stale=PARSED_MAX_STALE, max_entries=PARSED_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # clé → (digest, résultat, date)
+        self.lock = threading.Lock()
+        self.refreshing = set()
+        self.executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS)
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.parses = 0
+        self.parses_skipped = 0
+        self.refresh_errors = 0
+
+    def get(self, name, url, fetch, parse, variant=None):
+        """
+        Résultat de parse(fetch()) pour cette URL, depuis le cache si possible.
+        fetch() → CachedPage (attribut digest) ; parse(page) → dict.
+        """
+        key = (name, url, variant)
+        now = time.time()
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                age = now - entry[2]
+                if age < self.ttl:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(entry[1])
+                if age < self.max_stale:
+                    self.entries.move_to_end(key)
+                    self.stale_hits += 1
+                    if key not in self.refreshing:
+                        self.refreshing.add(key)
+                        self.executor.submit(self._background_refresh, key, fetch, parse)
+                    return copy.deepcopy(entry[1])
+            self.misses += 1
+
+        return copy.deepcopy(self._refresh(key, fetch, parse))
+
+    def _refresh(self, key, fetch, parse):
+        page = fetch()
+
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and entry[0] == page.digest:
+            # HTML identique : on garde le résultat parsé
+            with self.lock:
+                self.parses_skipped += 1
+                self._put(key, entry[0], entry[1])
+            return entry[1]
+
+        result = parse(page)
+        with self.lock:
+            self.parses += 1
+            if result.get('success'):
+                self._put(key, page.digest, result)
+        return result
+
+    def _put(self, key, digest, result):
+        self.entries[key] = (digest, result, time.time())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _background_refresh(self, key, fetch, parse):
+        try:
+            self._refresh(key, fetch, parse)
+        except Exception as e:
+            with self.lock:
+                self.refresh_errors += 1
+            print(f"[ParsedCache] ⚠️  Rafraîchissement {key[0]} {key[1]}: {e}")
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+                'parses': self.parses,
+                'parses_skipped': self.parses_skipped,
+                'refreshing': len(self.refreshing),
+                'refresh_errors': self.refresh_errors,
+            }
+
+# Instance globale
+parsed_cache = ParsedCache()
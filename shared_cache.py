@@ -0,0 +1,263 @@
+"""
+shared_cache.py
+Cache partagé entre les workers gunicorn d'une même machine (SQLite WAL)
+- Second niveau de extraction_cache et page_cache : un lien extrait ou une
+  page téléchargée par un worker sert à tous les autres
+- Entrées par espace de noms, avec expiration (TTL) ; au-delà de
+  SHARED_CACHE_MAX_BYTES, les entrées les moins récemment lues sont
+  supprimées
+- Toute erreur SQLite (base verrouillée, disque plein...) est traitée
+  comme un miss : le cache partagé ne bloque jamais une requête
+- Une lecture n'écrit rien : les dates de dernière lecture sont notées en
+  mémoire et écrites par lot, hors des requêtes
+"""
+import os
+import sqlite3
+import threading
+import time
+
+# ============ CONFIGURATION ============
+
+SHARED_CACHE_PATH = os.environ.get(
+    'SHARED_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shared_cache.db')
+)
+
+# SHARED_CACHE=0 désactive le niveau partagé (caches par worker uniquement)
+SHARED_CACHE_ENABLED = os.environ.get('SHARED_CACHE', '1') != '0'
+
+# Taille maximale des valeurs stockées
+SHARED_CACHE_MAX_BYTES = int(os.environ.get('SHARED_CACHE_MAX_BYTES', 128 * 1024 * 1024))
+
+# Attente maximale d'un verrou d'écriture (secondes)
+BUSY_TIMEOUT = 1.0
+
+# Nettoyage (expirés + taille) toutes les PRUNE_EVERY écritures de ce worker
+PRUNE_EVERY = 200
+
+# La date de dernière lecture n'est réécrite qu'au-delà de cet intervalle ;
+# les dates en attente sont écrites par lot à cette fréquence (thread
+# d'arrière-plan du worker) et avant chaque nettoyage
+TOUCH_INTERVAL = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at);
+"""
+
+
+def log(message):
+    print(f"[SharedCache] {message}")
+
+
+class SharedCache:
+    """Clé/valeur (octets) avec TTL, une connexion par thread et par processus"""
+
+    def __init__(self, path=SHARED_CACHE_PATH, max_bytes=SHARED_CACHE_MAX_BYTES, enabled=SHARED_CACHE_ENABLED):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.writes = 0
+        self.touches = {}  # (espace, clé) → date de lecture à écrire
+        self.flusher_pid = None
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if self.enabled:
+            try:
+                with self.connection() as conn:
+                    conn.executescript(SCHEMA)
+            except sqlite3.Error as e:
+                log(f"⚠️  Désactivé ({self.path}): {e}")
+                self.enabled = False
+
+    def connection(self):
+        # Connexion propre au processus : gunicorn --preload forke après l'import
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def _error(self, action, e):
+        with self.lock:
+            self.errors += 1
+        log(f"⚠️  {action}: {e}")
+
+    def get(self, namespace, key):
+        """Valeur (octets) si présente et non expirée, sinon None"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            conn = self.connection()
+            row = conn.execute(
+                'SELECT value, expires_at, accessed_at FROM cache WHERE namespace = ? AND key = ?',
+                (namespace, key)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                with self.lock:
+                    self.misses += 1
+                return None
+        except sqlite3.Error as e:
+            self._error('Lecture', e)
+            return None
+
+        with self.lock:
+            self.hits += 1
+            if now - row[2] > TOUCH_INTERVAL:
+                self.touches[(namespace, key)] = now
+                start_flusher = self.flusher_pid != os.getpid()
+                if start_flusher:
+                    self.flusher_pid = os.getpid()
+            else:
+                start_flusher = False
+        if start_flusher:
+            # Un thread par processus (les workers forkés ne l'héritent pas)
+            threading.Thread(target=self._flush_loop, name='shared-cache-touch', daemon=True).start()
+        return row[0]
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(TOUCH_INTERVAL)
+            self.flush_touches()
+
+    def flush_touches(self):
+        """Écrit en une transaction les dates de lecture en attente"""
+        with self.lock:
+            touches, self.touches = self.touches, {}
+        if not touches or not self.enabled:
+            return 0
+        try:
+            with self.connection() as conn:
+                conn.executemany(
+                    'UPDATE cache SET accessed_at = MAX(accessed_at, ?) WHERE namespace = ? AND key = ?',
+                    [(at, namespace, key) for (namespace, key), at in touches.items()]
+                )
+        except sqlite3.Error as e:
+            # Dates perdues : l'éviction sera seulement moins précise
+            self._error('Dates de lecture', e)
+            return 0
+        return len(touches)
+
+    def set(self, namespace, key, value, ttl):
+        """Stocke une valeur (octets) pour `ttl` secondes"""
+        if not self.enabled or ttl <= 0 or len(value) > self.max_bytes:
+            return False
+        now = time.time()
+        try:
+            with self.connection() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache (namespace, key, value, size, expires_at, accessed_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (namespace, key, sqlite3.Binary(value), len(value), now + ttl, now)
+                )
+        except sqlite3.Error as e:
+            self._error('Écriture', e)
+            return False
+
+        with self.lock:
+            self.writes += 1
+            prune = self.writes % PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+        return True
+
+    def items(self, namespace):
+        """[(clé, valeur)] non expirées d'un espace de noms"""
+        if not self.enabled:
+            return []
+        try:
+            rows = self.connection().execute(
+                'SELECT key, value FROM cache WHERE namespace = ? AND expires_at > ?', (namespace, time.time())
+            ).fetchall()
+        except sqlite3.Error as e:
+            self._error('Lecture', e)
+            return []
+        return [(key, bytes(value)) for key, value in rows]
+
+    def delete(self, namespace, key):
+        if not self.enabled:
+            return
+        try:
+            with self.connection() as conn:
+                conn.execute('DELETE FROM cache WHERE namespace = ? AND key = ?', (namespace, key))
+        except sqlite3.Error as e:
+            self._error('Suppression', e)
+
+    def prune(self):
+        """Supprime les entrées expirées, puis les moins lues jusqu'à 90 % de la taille maximale"""
+        if not self.enabled:
+            return
+        # Dates de lecture à jour avant de choisir les entrées à évincer
+        self.flush_touches()
+        try:
+            with self.connection() as conn:
+                expired = conn.execute('DELETE FROM cache WHERE expires_at <= ?', (time.time(),)).rowcount
+                total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+
+                evicted = []
+                excess = total - self.max_bytes * 0.9
+                if total > self.max_bytes:
+                    for namespace, key, size in conn.execute(
+                        'SELECT namespace, key, size FROM cache ORDER BY accessed_at'
+                    ).fetchall():
+                        if excess <= 0:
+                            break
+                        evicted.append((namespace, key))
+                        excess -= size
+                    conn.executemany('DELETE FROM cache WHERE namespace = ? AND key = ?', evicted)
+        except sqlite3.Error as e:
+            self._error('Nettoyage', e)
+            return
+
+        with self.lock:
+            self.expirations += expired
+            self.evictions += len(evicted)
+
+    def stats(self):
+        """Compteurs de ce worker + contenu de la base (partagé)"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'enabled': self.enabled,
+                'path': self.path,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'errors': self.errors,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+        if self.enabled:
+            try:
+                rows = self.connection().execute(
+                    'SELECT namespace, COUNT(*), COALESCE(SUM(size), 0) FROM cache GROUP BY namespace'
+                ).fetchall()
+                stats['namespaces'] = {ns: {'entries': n, 'bytes': b} for ns, n, b in rows}
+                stats['entries'] = sum(n for _, n, _ in rows)
+                stats['bytes'] = sum(b for _, _, b in rows)
+            except sqlite3.Error as e:
+                self._error('Statistiques', e)
+        return stats
+
+# Instance globale
+shared_cache = SharedCache()
@@ -0,0 +1,71 @@
+"""
+singleflight.py
+Regroupement des requêtes concurrentes (single-flight)
+Plusieurs appelants pour la même clé attendent une seule exécution
+et partagent son résultat
+"""
+import copy
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Une seule exécution en vol par clé"""
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Exécute fn(*args, **kwargs) ou attend l'exécution déjà en cours
+        pour la même clé. Chaque appelant reçoit sa propre copie du résultat.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self.calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if leader:
+            try:
+                call.result = fn(*args, **kwargs)
+            except Exception as e:
+                call.error = e
+            finally:
+                with self.lock:
+                    self.calls.pop(key, None)
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return copy.deepcopy(call.result)
+
+    def in_flight(self):
+        with self.lock:
+            return len(self.calls)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'in_flight': len(self.calls),
+                'executions': self.executions,
+                'shared': self.shared,
+            }
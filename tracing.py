@@ -0,0 +1,207 @@
+"""
+tracing.py
+Traces par étapes d'une requête (routage, chargement de module,
+connexion / premier octet / corps HTTP, parsing, patterns...)
+- Trace courante dans un contextvar : span() ne coûte presque rien
+  quand aucune trace n'est active
+- ?trace=1 ajoute la trace à la réponse JSON ; TRACE_SAMPLE_RATE des
+  requêtes sont résumées dans les logs
+- Les connexions urllib3 sont tracées (DNS + TCP + TLS) via des
+  classes de connexion dédiées montées dans http_client
+"""
+import contextvars
+import os
+import random
+import threading
+import time
+
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# ============ CONFIGURATION ============
+
+# Part des requêtes dont la trace est écrite dans les logs
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 0.01))
+
+# Spans gardés au maximum par trace (crawl, listes d'épisodes...)
+MAX_SPANS = 500
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+_current_depth = contextvars.ContextVar('current_depth', default=0)
+
+
+class Trace:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans = []
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def add(self, name, start, duration, depth, attrs):
+        with self.lock:
+            if len(self.spans) >= MAX_SPANS:
+                self.dropped += 1
+                return
+            self.spans.append((name, start - self.started, duration, depth, attrs))
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def to_dict(self):
+        with self.lock:
+            spans = sorted(self.spans, key=lambda s: s[1])
+            dropped = self.dropped
+        return {
+            'name': self.name,
+            'total_ms': round(self.total() * 1000, 2),
+            'spans': [
+                dict({
+                    'name': name,
+                    'start_ms': round(start * 1000, 2),
+                    'duration_ms': round(duration * 1000, 2),
+                    'depth': depth,
+                }, **attrs)
+                for name, start, duration, depth, attrs in spans
+            ],
+            'dropped_spans': dropped,
+        }
+
+    def summary(self):
+        """Une ligne : durée totale puis temps cumulé par étape"""
+        totals = {}
+        with self.lock:
+            for name, _, duration, _, _ in self.spans:
+                totals[name] = totals.get(name, 0) + duration
+        stages = ' | '.join(f'{name} {duration * 1000:.1f}' for name, duration in totals.items())
+        return f"{self.name} {self.total() * 1000:.1f} ms | {stages}"
+
+
+class _Span:
+    __slots__ = ('trace', 'name', 'attrs', 'started', 'depth', 'token')
+
+    def __init__(self, trace, name, attrs):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.depth = _current_depth.get()
+        self.token = _current_depth.set(self.depth + 1)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.started
+        _current_depth.reset(self.token)
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.trace.add(self.name, self.started, duration, self.depth, self.attrs)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, **attrs):
+    """Mesure un bloc `with` dans la trace courante (aucun effet sans trace)"""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NO_SPAN
+    return _Span(trace, name, attrs)
+
+
+def start_trace(name):
+    """Démarre une trace pour le contexte courant ; retourne (trace, jeton)"""
+    trace = Trace(name)
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token=None):
+    # set(None) plutôt que reset : sûr même si le contexte a changé entre-temps
+    _current_trace.set(None)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def should_sample():
+    return TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+
+
+def log_trace(trace):
+    print(f"[Trace] {trace.summary()}")
+
+# ============ CONNEXIONS TRACÉES (urllib3) ============
+
+class TracedHTTPConnection(HTTPConnection):
+    def connect(self):
+        with span('http.connect', host=self.host):
+            return super().connect()
+
+
+class TracedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        with span('http.connect', host=self.host):
+            return super().connect()
+
+
+class TracedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TracedHTTPConnection
+
+
+class TracedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TracedHTTPSConnection
+
+
+TRACED_POOL_CLASSES = {
+    'http': TracedHTTPConnectionPool,
+    'https': TracedHTTPSConnectionPool,
+}
+
+# ============ FLASK ============
+
+def instrument_app(app):
+    """?trace=1 → trace jointe à la réponse JSON ; échantillon écrit dans les logs"""
+    from flask import g, request
+
+    @app.before_request
+    def _start():
+        requested = request.args.get('trace') == '1'
+        if requested or should_sample():
+            trace, token = start_trace(f'{request.method} {request.path}')
+            g.trace = (trace, token, requested)
+
+    @app.after_request
+    def _finish(response):
+        state = g.get('trace')
+        if state is None:
+            return response
+        trace, _, requested = state
+
+        if requested and response.is_json and not response.is_streamed:
+            payload = response.get_json(silent=True)
+            if isinstance(payload, dict):
+                payload['trace'] = trace.to_dict()
+                response.set_data(app.json.dumps(payload))
+        log_trace(trace)
+        return response
+
+    @app.teardown_request
+    def _cleanup(exc):
+        # Aussi après une exception non gérée : ne pas laisser la trace au thread suivant
+        state = g.pop('trace', None)
+        if state is not None:
+            end_trace(state[1])
+
+    return app
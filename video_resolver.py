@@ -0,0 +1,79 @@
+"""
+video_resolver.py
+Résolution d'un lien embed en URL vidéo, partagée par /extract (app.py),
+la pré-résolution des épisodes et la version async (asgi.py)
+- Flask : cache d'extraction (couche kodi), puis Kodi si disponible
+- ASGI : même chose (cache kodi puis native), puis extracteurs natifs
+  async en dernier recours
+- Les succès natifs sont mis en cache dans leur propre couche : les
+  chemins « Kodi uniquement » ne les voient jamais
+"""
+import asyncio
+
+from extraction_cache import extraction_cache, KODI_LAYER, LAYERS, NATIVE_LAYER
+
+try:
+    from kodi_extractors import extract_with_kodi, is_kodi_available
+    KODI_AVAILABLE = True
+except ImportError:
+    KODI_AVAILABLE = False
+
+
+def kodi_ready():
+    return KODI_AVAILABLE and is_kodi_available()
+
+
+NO_RESULT = {
+    'success': False,
+    'error': 'Aucun extracteur disponible'
+}
+
+
+def _cached(url, layers=(KODI_LAYER,)):
+    """Résultat déjà résolu (clic précédent, pré-résolution, autre worker)"""
+    cached = extraction_cache.get(url, layers=layers)
+    if cached is not None:
+        cached.setdefault('method', 'kodi_primary')
+    return cached
+
+
+def _kodi(url):
+    """Résultat Kodi réussi (mis en cache par extract_with_kodi), sinon None"""
+    if not kodi_ready():
+        return None
+    result = extract_with_kodi(url, use_cache=False)
+    if result.get('success'):
+        result['method'] = 'kodi_primary'
+        return result
+    return None
+
+
+def _native_done(url, result):
+    if result.get('success'):
+        result['method'] = 'native_fallback'
+        extraction_cache.set(url, result, layer=NATIVE_LAYER)
+    return result
+
+
+def resolve_video(url):
+    """Cache, puis Kodi ; retourne le résultat (succès ou échec)"""
+    result = _cached(url) or _kodi(url)
+    return result if result is not None else dict(NO_RESULT)
+
+
+async def resolve_video_async(url):
+    """
+    Même logique que resolve_video, puis extracteurs natifs async (entrée
+    ASGI seulement ; la route Flask s'arrête à Kodi). Le cache et le
+    chemin Kodi (modules cHoster synchrones) tournent encore dans des
+    threads (asyncio.to_thread) : un extracteur Kodi lent occupe un thread
+    du pool par défaut, pas la boucle.
+    """
+    import async_engine
+
+    result = await asyncio.to_thread(_cached, url, LAYERS) or await asyncio.to_thread(_kodi, url)
+    if result is not None:
+        return result
+
+    result = await async_engine.extract_video_url(url)
+    return await asyncio.to_thread(_native_done, url, result)